@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Bulk Glossary Operations
+Select glossaries by name pattern, language pair or age and delete,
+fetch or recreate them with a bounded pool of workers.
+
+Every worker shares one pooled DeepL client, so 429/5xx responses are
+retried with backoff and Retry-After inside each request; items that still
+fail are retried a few more times before being reported as failed. When
+the client has an adaptive limiter, the worker count is only an upper
+bound and the limiter decides how many requests are in flight.
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import fnmatch
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from terms import parse_tsv
+
+# Parallel requests; keep at or below the client's connection pool size
+# (a client with an adaptive limiter sizes its pool to the limiter maximum)
+DEFAULT_WORKERS = 16
+
+# Extra attempts per item after the client's own retries are exhausted
+DEFAULT_ITEM_RETRIES = 2
+
+
+# ==================== Selection ====================
+
+def parse_creation_time(value):
+    """Parse a DeepL creation_time such as 2021-08-03T14:16:18.329Z"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def select_glossaries(glossaries, name_pattern=None, source_lang=None,
+                      target_lang=None, older_than_days=None):
+    """Filter glossaries by name glob, language pair and minimum age"""
+    cutoff = None
+    if older_than_days is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    selected = []
+    for g in glossaries:
+        if name_pattern and not fnmatch.fnmatchcase(g["name"], name_pattern):
+            continue
+        if source_lang and g["source_lang"].lower() != source_lang.lower():
+            continue
+        if target_lang and g["target_lang"].lower() != target_lang.lower():
+            continue
+        if cutoff and parse_creation_time(g["creation_time"]) > cutoff:
+            continue
+        selected.append(g)
+    return selected
+
+
+# ==================== Actions ====================
+
+def delete_action(client):
+    """Delete a glossary; returns None
+
+    404 counts as deleted: a retry after a delete whose response was lost
+    must not report the glossary as failed.
+    """
+    def action(glossary):
+        response = client.delete(f"/v2/glossaries/{glossary['glossary_id']}")
+        if response.status_code not in (204, 404):
+            response.raise_for_status()
+            raise RuntimeError(f"unexpected status {response.status_code}")
+        return None
+    return action
+
+
+def fetch_entries_action(client):
+    """Fetch a glossary's entries; returns a list of (source, target)"""
+    def action(glossary):
+        response = client.get(
+            f"/v2/glossaries/{glossary['glossary_id']}/entries",
+            headers={"Accept": "text/tab-separated-values"},
+        )
+        response.raise_for_status()
+        return parse_tsv(response.text)
+    return action
+
+
+def recreate_action(client):
+    """Recreate a glossary from its own entries; returns the new ID
+
+    The copy is created before the original is deleted, so a failed
+    creation leaves the original untouched. Once the copy exists its ID
+    is kept, and a retry only repeats the delete instead of creating
+    another copy.
+    """
+    fetch = fetch_entries_action(client)
+    delete = delete_action(client)
+    created = {}
+
+    def action(glossary):
+        new_glossary_id = created.get(glossary["glossary_id"])
+        if new_glossary_id is not None:
+            delete(glossary)
+            return new_glossary_id
+
+        entries = fetch(glossary)
+        response = client.post("/v2/glossaries", json={
+            "name": glossary["name"],
+            "source_lang": glossary["source_lang"],
+            "target_lang": glossary["target_lang"],
+            "entries": "\n".join(f"{source}\t{target}" for source, target in entries),
+            "entries_format": "tsv",
+        })
+        response.raise_for_status()
+        new_glossary_id = created[glossary["glossary_id"]] = response.json()["glossary_id"]
+        delete(glossary)
+        return new_glossary_id
+    return action
+
+
+ACTIONS = {
+    "delete": delete_action,
+    "fetch": fetch_entries_action,
+    "recreate": recreate_action,
+}
+
+
+# ==================== Engine ====================
+
+def run_bulk(glossaries, action, workers=DEFAULT_WORKERS,
+             retries=DEFAULT_ITEM_RETRIES, on_result=None):
+    """Apply action to every glossary with a bounded worker pool
+
+    Returns one result dict per glossary, in input order, with the keys
+    glossary_id, name, ok, value, error, attempts and elapsed (seconds).
+    on_result, if given, is called from the calling thread with each
+    result as soon as it is done.
+    """
+    def run_one(glossary):
+        start = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                value = action(glossary)
+                error = None
+                break
+            except Exception as e:
+                if attempts > retries:
+                    value = None
+                    error = str(e)
+                    break
+                time.sleep(min(2 ** attempts, 30))
+
+        return {
+            "glossary_id": glossary["glossary_id"],
+            "name": glossary["name"],
+            "ok": error is None,
+            "value": value,
+            "error": error,
+            "attempts": attempts,
+            "elapsed": time.perf_counter() - start,
+        }
+
+    if not glossaries:
+        return []
+
+    results = [None] * len(glossaries)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(glossaries)))) as pool:
+        futures = {pool.submit(run_one, g): i for i, g in enumerate(glossaries)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if on_result:
+                on_result(result)
+    return results
+
+
+def print_bulk_result(result):
+    """Print one per-item result line"""
+    if result["ok"]:
+        print(f"✅ {result['name']} ({result['glossary_id']})")
+    else:
+        print(f"❌ {result['name']} ({result['glossary_id']}): {result['error']}")
+
+
+def print_bulk_summary(results, label, elapsed):
+    """Print the summary of a bulk run"""
+    succeeded = sum(1 for r in results if r["ok"])
+    retried = sum(1 for r in results if r["attempts"] > 1)
+    print("\n" + "=" * 60)
+    print(f"📊 Bulk {label}: {succeeded}/{len(results)} succeeded "
+          f"in {elapsed:.1f}s ({retried} retried)")
+    print("=" * 60)
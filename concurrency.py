@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency
+An AIMD (additive increase, multiplicative decrease) limit on the number
+of DeepL requests in flight, shared by every thread using one client.
+
+    healthy response    the limit grows: doubling per round trip until the
+                        first throttle (slow start), then by one per round
+    429 / 503 / 529     the limit is halved; Retry-After pauses every new
+                        request until it has passed
+    5xx, network error  the limit is halved
+    slow response       latency above LATENCY_TOLERANCE times the fastest
+                        seen for that endpoint shrinks the limit slightly
+
+Only one decrease is applied per round trip, so a burst of 429s answering
+requests sent under the old limit counts as one signal. The limit only
+grows while callers actually fill it, so a pool of 8 workers never
+pushes it far beyond 8.
+
+Callers keep their own worker pools, sized as the upper bound; the
+limiter decides how many of those workers may have a request in flight.
+
+TokenBucket adds a fixed requests-per-second ceiling on top, for callers
+that must stay under a known rate (e.g. a proxy shared by a team).
+
+Usage:
+    limiter = AdaptiveLimiter(maximum=16)
+    client = DeepLClient(api_key, base_url, limiter=limiter)
+    ... run requests from many threads ...
+    print(limiter.snapshot())
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import threading
+import time
+from collections import deque
+
+import instrumentation
+
+# Limit used before any feedback, and its bounds
+DEFAULT_INITIAL = 4
+DEFAULT_MINIMUM = 1
+DEFAULT_MAXIMUM = 16
+
+# Multiplier applied on throttling, errors and slow responses
+THROTTLE_DECREASE = 0.5
+LATENCY_DECREASE = 0.9
+
+# A response is slow if it took this many times the endpoint's fastest one
+LATENCY_TOLERANCE = 3.0
+
+# Never pause new requests for longer than this on Retry-After
+MAX_PAUSE = 120.0
+
+# Seconds of completed requests used for the throughput figure
+THROUGHPUT_WINDOW = 10.0
+
+# Statuses that mean "send less": rate limited or temporarily overloaded
+THROTTLE_STATUS_CODES = frozenset({429, 503, 529})
+
+
+class Slot:
+    """One acquired request slot"""
+
+    __slots__ = ("key", "start", "saturated")
+
+    def __init__(self, key, start, saturated):
+        self.key = key
+        self.start = start
+        self.saturated = saturated
+
+
+class TokenBucket:
+    """Blocking token bucket: on average at most rate acquisitions per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting for it; False if that would exceed timeout"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if timeout is not None and wait > timeout:
+                return False
+            # Reserve the token now so waiting callers queue up in order
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class AdaptiveLimiter:
+    """Thread-safe AIMD limit on in-flight requests"""
+
+    def __init__(self, initial=DEFAULT_INITIAL, minimum=DEFAULT_MINIMUM,
+                 maximum=DEFAULT_MAXIMUM):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.slow_start = True
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.baselines = {}
+        self.started = None
+        self.completed = deque()
+
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "errors": 0,
+            "slow": 0,
+            "decreases": 0,
+            "peak_in_flight": 0,
+            "wait_seconds": 0.0,
+        }
+
+    # ==================== Slots ====================
+
+    def acquire(self, key=None):
+        """Block until a request may be sent; returns a Slot for release()"""
+        with self.condition:
+            waited = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    self.condition.wait(self.paused_until - now)
+                elif self.in_flight >= int(self.limit):
+                    self.condition.wait()
+                else:
+                    break
+            if self.started is None:
+                self.started = now
+            self.in_flight += 1
+            self.stats["requests"] += 1
+            self.stats["wait_seconds"] += now - waited
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+            return Slot(key, now, self.in_flight >= int(self.limit))
+
+    def release(self, slot, status=None, error=False, retry_after=None):
+        """Free a slot and adjust the limit from the request's outcome
+
+        status is the HTTP status (None if no response arrived), error is
+        True for network errors and timeouts, retry_after the seconds the
+        server asked to wait.
+        """
+        with self.condition:
+            now = time.monotonic()
+            latency = now - slot.start
+            self.in_flight -= 1
+            self.completed.append(now)
+            while self.completed and self.completed[0] < now - THROUGHPUT_WINDOW:
+                self.completed.popleft()
+
+            if status in THROTTLE_STATUS_CODES:
+                self.stats["throttled"] += 1
+                if retry_after:
+                    self.paused_until = max(self.paused_until,
+                                            now + min(retry_after, MAX_PAUSE))
+                self._decrease(slot, now, THROTTLE_DECREASE)
+            elif error or (status is not None and status >= 500):
+                self.stats["errors"] += 1
+                self._decrease(slot, now, THROTTLE_DECREASE)
+            elif status is not None and status < 400:
+                baseline = self.baselines.get(slot.key)
+                if baseline is None or latency < baseline:
+                    self.baselines[slot.key] = latency
+                elif latency > baseline * LATENCY_TOLERANCE:
+                    self.stats["slow"] += 1
+                    self._decrease(slot, now, LATENCY_DECREASE)
+                    self.condition.notify_all()
+                    return
+                if slot.saturated:
+                    step = 1.0 if self.slow_start else 1.0 / self.limit
+                    self.limit = min(self.limit + step, float(self.maximum))
+
+            self.condition.notify_all()
+
+    def _decrease(self, slot, now, factor):
+        # Requests sent before the last decrease reflect the old limit
+        if slot.start < self.last_decrease:
+            return
+        self.slow_start = False
+        self.last_decrease = now
+        self.limit = max(self.limit * factor, float(self.minimum))
+        self.stats["decreases"] += 1
+
+    # ==================== Monitoring ====================
+
+    def throughput(self):
+        """Completed requests per second over the last THROUGHPUT_WINDOW"""
+        with self.condition:
+            if self.started is None:
+                return 0.0
+            now = time.monotonic()
+            recent = sum(1 for t in self.completed if t >= now - THROUGHPUT_WINDOW)
+            window = min(THROUGHPUT_WINDOW, now - self.started)
+        return recent / window if window > 0 else 0.0
+
+    def snapshot(self):
+        """Current limit, in-flight requests, throughput and counters"""
+        throughput = self.throughput()
+        with self.condition:
+            return dict(self.stats,
+                        limit=int(self.limit),
+                        in_flight=self.in_flight,
+                        throughput=throughput,
+                        paused=max(self.paused_until - time.monotonic(), 0.0))
+
+    def register_gauges(self):
+        """Publish the limiter state through instrumentation gauges"""
+        gauges = (
+            ("deepl_concurrency_limit", "Adaptive limit on in-flight requests", "limit"),
+            ("deepl_requests_in_flight", "Requests currently in flight", "in_flight"),
+            ("deepl_requests_in_flight_peak", "Most requests in flight at once",
+             "peak_in_flight"),
+            ("deepl_throughput_requests_per_second",
+             f"Completed requests per second over the last {THROUGHPUT_WINDOW:g}s",
+             "throughput"),
+            ("deepl_throttled_responses", "429/503/529 responses seen by the limiter",
+             "throttled"),
+            ("deepl_concurrency_decreases", "Times the limit was cut", "decreases"),
+        )
+        for name, help_text, field in gauges:
+            instrumentation.add_gauge(name, help_text,
+                                      lambda field=field: self.snapshot()[field])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Configuration Loader
+Resolves settings such as the DeepL API key lazily, only when a command
+actually needs them, so offline commands work without any key set.
+
+Each setting is looked up in this order:
+1. An explicit value (set in the script or given on the command line)
+2. An environment variable
+3. A JSON config file: $DEEPL_GLOSSARY_CONFIG, ./deepl_glossary_config.json
+   or ~/.config/deepl-glossary/config.json (first one found)
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import json
+import os
+from pathlib import Path
+
+# Environment variable pointing at a config file
+CONFIG_FILE_ENV = "DEEPL_GLOSSARY_CONFIG"
+
+# Config files searched when CONFIG_FILE_ENV is not set
+DEFAULT_CONFIG_FILES = [
+    "deepl_glossary_config.json",
+    "~/.config/deepl-glossary/config.json",
+]
+
+FREE_API_BASE_URL = "https://api-free.deepl.com"
+PRO_API_BASE_URL = "https://api.deepl.com"
+
+
+class ConfigError(Exception):
+    """A required setting could not be resolved"""
+
+
+_config_file = None
+_config = None
+
+
+def set_config_file(path):
+    """Use a specific config file (e.g. from --config) instead of searching"""
+    global _config_file, _config
+    _config_file = path
+    _config = None
+
+
+def load_config():
+    """Load the config file once; returns {} if there is none"""
+    global _config
+    if _config is not None:
+        return _config
+
+    if _config_file:
+        candidates = [_config_file]
+    elif os.environ.get(CONFIG_FILE_ENV):
+        candidates = [os.environ[CONFIG_FILE_ENV]]
+    else:
+        candidates = DEFAULT_CONFIG_FILES
+
+    _config = {}
+    for candidate in candidates:
+        path = Path(candidate).expanduser()
+        if path.is_file():
+            with open(path, "r", encoding="utf-8") as f:
+                _config = json.load(f)
+            break
+    return _config
+
+
+def resolve(name, explicit=None, env_var=None, default=None):
+    """Resolve one setting from an explicit value, the environment or the config file"""
+    if explicit:
+        return explicit
+    if env_var and os.environ.get(env_var):
+        return os.environ[env_var]
+    value = load_config().get(name)
+    if value:
+        return value
+    return default
+
+
+def resolve_api_key(explicit=None):
+    """Resolve the DeepL API key, raising ConfigError if it is not set"""
+    api_key = resolve("api_key", explicit, env_var="API_KEY")
+    if not api_key or api_key == "YOUR_DEEPL_API_KEY_HERE":
+        raise ConfigError(
+            "DeepL API key not set: use --api-key, the API_KEY environment "
+            "variable, or \"api_key\" in deepl_glossary_config.json"
+        )
+    return api_key
+
+
+def resolve_api_base_url(api_key, explicit=None):
+    """Resolve the API endpoint; Free API keys end with ':fx'"""
+    default = FREE_API_BASE_URL if api_key.endswith(":fx") else PRO_API_BASE_URL
+    return resolve("api_base_url", explicit, env_var="DEEPL_API_BASE_URL",
+                   default=default)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+DeepL HTTP Client
+A shared, connection-pooled client used by every DeepL API call in
+glossary_manager.py and test_glossary.py.
+
+One client keeps TCP/TLS connections alive between calls, sends the
+authorization header once per session, applies timeouts and retries
+429/5xx responses with exponential backoff, jitter and Retry-After.
+Requests that may have been applied (other 5xx, read timeouts) are only
+retried for idempotent methods, so a POST never creates a glossary twice.
+With an AdaptiveLimiter (concurrency.py) every attempt also takes a slot
+from it, so all threads sharing the client adapt to the server's limits.
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import asyncio
+import json
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+
+# ==================== Defaults ====================
+
+# (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+# Retries after the first attempt for 429/5xx and connection errors
+DEFAULT_MAX_RETRIES = 5
+
+# Exponential backoff: base * 2 ** attempt, capped, with full jitter
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Never wait longer than this, even if Retry-After asks for more
+MAX_RETRY_AFTER = 120.0
+
+# Keep-alive connections per host
+DEFAULT_POOL_SIZE = 10
+
+# /v2/translate limits: texts per request and total request body size
+MAX_TEXTS_PER_REQUEST = 50
+MAX_REQUEST_BYTES = 128 * 1024
+
+# Default number of in-flight requests for the async helpers
+DEFAULT_CONCURRENCY = 4
+
+# 429 Too Many Requests, 5xx server errors, 529 DeepL "too many requests"
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+# Statuses meaning the request was not processed; retried for every method
+THROTTLE_STATUS_CODES = frozenset({429, 503, 529})
+
+# Methods that are safe to repeat after a 5xx or a read timeout
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class DeepLClient:
+    """Reusable DeepL API client with keep-alive pooling and retries"""
+
+    def __init__(self, api_key, base_url,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX,
+                 pool_size=DEFAULT_POOL_SIZE,
+                 limiter=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = limiter
+        if limiter is not None:
+            # Every slot the limiter may open needs a pooled connection
+            pool_size = max(pool_size, limiter.maximum)
+            limiter.register_gauges()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"DeepL-Auth-Key {api_key}",
+        })
+
+        # Retries are handled in request() so Retry-After is honoured
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=pool_size,
+                              max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+    def request(self, method, path, characters=0, idempotent=None, **kwargs):
+        """Send a request, retrying 429/5xx, connection errors and timeouts
+
+        Returns the final response; callers decide how to handle
+        non-2xx statuses (e.g. with response.raise_for_status()).
+        characters is the billed source text length reported to
+        instrumentation hooks. idempotent defaults to the method being in
+        IDEMPOTENT_METHODS; other requests are retried only on 429/503/529
+        and connection errors, where the server did not apply them.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUS_CODES if idempotent else THROTTLE_STATUS_CODES
+        retry_errors = ((requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+                        if idempotent else requests.exceptions.ConnectionError)
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        instrumented = instrumentation.enabled()
+        start = time.perf_counter()
+        backoff = 0.0
+
+        limiter = self.limiter
+        key = f"{method} {instrumentation.endpoint_template(path)}"
+
+        attempt = 0
+        while True:
+            slot = limiter.acquire(key) if limiter is not None else None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if slot is not None:
+                    limiter.release(slot, error=True)
+                # A read timeout may follow a request the server applied, so
+                # only idempotent requests retry it
+                if not isinstance(e, retry_errors) or attempt >= self.max_retries:
+                    if instrumented:
+                        instrumentation.record_request(
+                            method, path, time.perf_counter() - start, backoff,
+                            attempt + 1, error=str(e), characters=characters,
+                            concurrency=self._concurrency())
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                retry_after = self._retry_after_delay(response)
+                if slot is not None:
+                    limiter.release(slot, status=response.status_code,
+                                    retry_after=retry_after)
+                if (response.status_code not in retry_statuses
+                        or attempt >= self.max_retries):
+                    if instrumented:
+                        instrumentation.record_request(
+                            method, path, time.perf_counter() - start, backoff,
+                            attempt + 1, response=response, characters=characters,
+                            streamed=kwargs.get("stream", False),
+                            concurrency=self._concurrency())
+                    return response
+                delay = retry_after
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                response.close()
+
+            time.sleep(delay)
+            backoff += delay
+            attempt += 1
+
+    def _concurrency(self):
+        return int(self.limiter.limit) if self.limiter is not None else None
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def translate_texts(self, texts, target_lang, source_lang=None,
+                        glossary_id=None, **options):
+        """Translate many segments with as few requests as possible
+
+        Identical segments are sent once. Segments are packed into
+        requests up to DeepL's per-request text count and body size
+        limits. Returns translations in input order.
+        Raises requests.exceptions.HTTPError if a request fails.
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(texts))
+        base_payload = build_translate_payload([], target_lang, source_lang,
+                                               glossary_id, **options)
+
+        translated = {}
+        for batch in pack_texts(unique, base_payload):
+            payload = dict(base_payload, text=[unique[i] for i in batch])
+            translations = self.post_translate(payload)
+            for i, translation in zip(batch, translations):
+                translated[unique[i]] = translation["text"]
+        return [translated[text] for text in texts]
+
+    async def translate_texts_async(self, texts, target_lang, source_lang=None,
+                                    glossary_id=None, semaphore=None,
+                                    executor=None, **options):
+        """Async variant of translate_texts that sends batches concurrently
+
+        Batches run in worker threads over the shared pooled session, in
+        executor if given (size it to the semaphore) or the loop's default
+        one. Pass one asyncio.Semaphore to several calls to bound their
+        combined in-flight requests; by default DEFAULT_CONCURRENCY is used,
+        or the limiter's maximum when the client has one.
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(texts))
+        base_payload = build_translate_payload([], target_lang, source_lang,
+                                               glossary_id, **options)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limiter.maximum if self.limiter is not None
+                                          else DEFAULT_CONCURRENCY)
+
+        async def send(batch):
+            payload = dict(base_payload, text=[unique[i] for i in batch])
+            async with semaphore:
+                if executor is None:
+                    return await asyncio.to_thread(self.post_translate, payload)
+                return await asyncio.get_running_loop().run_in_executor(
+                    executor, self.post_translate, payload)
+
+        batches = list(pack_texts(unique, base_payload))
+        batch_results = await asyncio.gather(*(send(b) for b in batches))
+
+        translated = {}
+        for batch, translations in zip(batches, batch_results):
+            for i, translation in zip(batch, translations):
+                translated[unique[i]] = translation["text"]
+        return [translated[text] for text in texts]
+
+    def post_translate(self, payload):
+        """POST one /v2/translate payload and return its translations list"""
+        response = self.post(
+            "/v2/translate",
+            data=encode_json(payload),
+            headers={"Content-Type": "application/json"},
+            characters=sum(len(text) for text in payload["text"]),
+            # Translating changes nothing on the server: safe to repeat
+            idempotent=True,
+        )
+        response.raise_for_status()
+        return response.json()["translations"]
+
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    @staticmethod
+    def _retry_after_delay(response):
+        """Parse Retry-After (seconds or HTTP date), or None if absent"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            delay = retry_at.timestamp() - time.time()
+
+        return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+# ==================== Batching ====================
+
+def encode_json(payload):
+    """Encode a payload as compact UTF-8 JSON (the bytes we send)"""
+    return json.dumps(payload, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def build_translate_payload(texts, target_lang, source_lang=None,
+                            glossary_id=None, **options):
+    """Build a /v2/translate payload; options are passed through as-is"""
+    payload = {"text": list(texts), "target_lang": target_lang}
+    if source_lang:
+        payload["source_lang"] = source_lang
+    if glossary_id:
+        payload["glossary_id"] = glossary_id
+    payload.update(options)
+    return payload
+
+
+def pack_texts(texts, base_payload,
+               max_texts=MAX_TEXTS_PER_REQUEST,
+               max_bytes=MAX_REQUEST_BYTES):
+    """Split texts into request-sized batches of indices, preserving order
+
+    Each batch holds at most max_texts segments and encodes to at most
+    max_bytes together with base_payload. A single segment that is larger
+    than the limit on its own is sent alone and left for the API to reject.
+    """
+    overhead = len(encode_json(dict(base_payload, text=[])))
+
+    batch = []
+    size = overhead
+    for i, text in enumerate(texts):
+        # Encoded string plus a separating comma
+        text_size = len(encode_json(text)) + (1 if batch else 0)
+        if batch and (len(batch) >= max_texts or size + text_size > max_bytes):
+            yield batch
+            batch = []
+            size = overhead
+            text_size -= 1
+        batch.append(i)
+        size += text_size
+
+    if batch:
+        yield batch
+
+
+# ==================== Shared Clients ====================
+
+_clients = {}
+
+
+def get_client(api_key, base_url, limiter_factory=None, **options):
+    """Return the shared client for an API key and endpoint
+
+    The first call creates the client with the given options; later calls
+    with the same key and endpoint reuse its connection pool. Pass
+    limiter_factory instead of a limiter: it is only called when the
+    client is created, so later calls do not build limiters that are
+    never used.
+    """
+    key = (api_key, base_url.rstrip("/"))
+    client = _clients.get(key)
+    if client is None:
+        if limiter_factory is not None:
+            options["limiter"] = limiter_factory()
+        client = DeepLClient(api_key, base_url, **options)
+        _clients[key] = client
+    return client
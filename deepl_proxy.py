@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+DeepL Proxy
+A local HTTP proxy for several people or tools sharing one DeepL API key
+(scripts, the Zotero plugin, a team on one machine or network).
+
+Clients talk to it exactly as to the DeepL API (same /v2 paths, JSON or
+form bodies); the proxy forwards requests with its own key.
+
+    POST /v2/translate         texts already translated are answered from a
+                               shared SQLite cache; concurrent identical
+                               requests are sent upstream once (singleflight)
+    GET  /v2/glossaries        served from a TTL listing cache, and concurrent
+                               fetches are collapsed into one
+    GET  /v2/glossaries/{id}   served from the cached listing when present
+    glossary changes           POST/DELETE on /v2 and every /v3 change are
+                               passed through, then the listing cache and the
+                               glossary's content hash are updated or dropped
+    anything else              passed through unchanged
+
+Cached translations are keyed by the glossary's content hash (terms.entries_hash).
+Glossary changes made through the proxy drop the hash at once. Changes made
+elsewhere, e.g. a v3 dictionary edited in place against the real API, are
+picked up when the hash is fetched again after GLOSSARY_HASH_TTL seconds;
+until then translations made with the old terms may still be served.
+
+Every upstream request takes a token from a global rate limit first, and
+the adaptive limiter (concurrency.py) caps requests in flight, so clients
+stop tripping 429s. A request that would wait longer than
+MAX_QUEUE_SECONDS for its turn is answered with 429 and Retry-After.
+
+Usage:
+    python deepl_proxy.py --port 8788 --requests-per-second 20
+    DEEPL_API_BASE_URL=http://127.0.0.1:8788 python test_glossary.py
+    curl http://127.0.0.1:8788/proxy/stats
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlsplit
+
+import requests
+
+import config
+from concurrency import AdaptiveLimiter, TokenBucket
+from deepl_client import build_translate_payload, encode_json, get_client, pack_texts
+from metadata_cache import DEFAULT_TTL, V2_LISTING, V3_LISTING, MetadataCache
+from terms import entries_hash, parse_tsv
+from translation_cache import TranslationCache
+
+# ==================== Configuration ====================
+
+API_KEY = None
+API_BASE_URL = None
+
+PROXY_HOST = "127.0.0.1"
+PROXY_PORT = 8788
+
+# Global limit on upstream requests, whoever sends them (token bucket)
+REQUESTS_PER_SECOND = 20
+BURST = 20
+
+# Most upstream requests in flight (adapted to 429/503 and latency)
+MAX_UPSTREAM_CONCURRENCY = 8
+
+# Longest a client request waits for the rate limit before getting a 429
+MAX_QUEUE_SECONDS = 30
+
+# Shared translation cache; it stores whole translation objects, so it is
+# kept apart from the test script's cache
+PROXY_CACHE_PATH = ".deepl_proxy_cache.sqlite3"
+
+# Seconds a glossary listing is served without asking DeepL
+METADATA_CACHE_TTL = DEFAULT_TTL
+
+# Seconds a glossary's content hash is trusted before its entries are
+# fetched again, bounding how long edits made outside the proxy go unseen
+GLOSSARY_HASH_TTL = 60
+
+# HTTP settings: (connect, read) timeout in seconds and retries for 429/5xx
+HTTP_TIMEOUT = (10, 60)
+HTTP_MAX_RETRIES = 5
+
+# Fields of a translate request that are not part of the cache key options
+TRANSLATE_FIELDS = ("text", "target_lang", "source_lang", "glossary_id", "auth_key")
+
+GLOSSARY_PATH = re.compile(r"/v[23]/glossaries/([^/]+)(?:/.*)?")
+
+
+class UpstreamError(Exception):
+    """A non-2xx DeepL response, relayed to the client as it is"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class Throttled(Exception):
+    """The global rate limit could not be met within MAX_QUEUE_SECONDS"""
+
+
+class SingleFlight:
+    """Run a function once per key while concurrent callers wait for its result"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Return fn()'s result; callers arriving while it runs share it
+
+        Exceptions are raised in every waiting caller too.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {"done": threading.Event(),
+                                          "result": None, "error": None}
+            else:
+                self.shared += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call["done"].set()
+        return call["result"]
+
+
+class DeepLProxy:
+    """Shared state of the proxy: upstream client, caches and limits"""
+
+    def __init__(self, client, cache, metadata,
+                 requests_per_second=REQUESTS_PER_SECOND, burst=BURST,
+                 max_queue_seconds=MAX_QUEUE_SECONDS, client_keys=None,
+                 glossary_hash_ttl=GLOSSARY_HASH_TTL):
+        self.client = client
+        self.cache = cache
+        self.cache_lock = threading.Lock()
+        self.metadata = metadata
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_queue_seconds = max_queue_seconds
+        self.client_keys = set(client_keys or ())
+        self.flights = SingleFlight()
+        self.glossary_hashes = {}
+        self.glossary_hash_ttl = glossary_hash_ttl
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "upstream_requests": 0,
+            "texts": 0,
+            "texts_cached": 0,
+            "throttled": 0,
+            "rejected": 0,
+        }
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def serve(self, host=PROXY_HOST, port=PROXY_PORT):
+        """Create the HTTP server (call serve_forever() on it)"""
+        handler = type("Handler", (_Handler,), {"proxy": self})
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        return server
+
+    # ==================== Upstream ====================
+
+    def upstream(self, method, path, **kwargs):
+        """Send one request upstream under the global rate limit"""
+        if not self.bucket.acquire(timeout=self.max_queue_seconds):
+            self.count("throttled")
+            raise Throttled()
+        self.count("upstream_requests")
+        return self.client.request(method, path, **kwargs)
+
+    def glossary_hash(self, glossary_id):
+        """Content hash of a glossary's entries, or None if it cannot be fetched
+
+        A hash is reused for glossary_hash_ttl seconds, then fetched again.
+        """
+        with self.lock:
+            cached = self.glossary_hashes.get(glossary_id)
+            if cached is not None and time.monotonic() - cached[1] < self.glossary_hash_ttl:
+                return cached[0]
+
+        def fetch():
+            response = self.upstream("GET", f"/v2/glossaries/{glossary_id}/entries",
+                                     headers={"Accept": "text/tab-separated-values"})
+            if response.status_code != 200:
+                return None
+            return entries_hash(parse_tsv(response.text))
+
+        content_hash = self.flights.do(("entries", glossary_id), fetch)
+        if content_hash is not None:
+            with self.lock:
+                self.glossary_hashes[glossary_id] = (content_hash, time.monotonic())
+        return content_hash
+
+    def forget_glossary(self, glossary_id):
+        """Drop a changed glossary's hash; it is fetched again when next used"""
+        with self.lock:
+            self.glossary_hashes.pop(glossary_id, None)
+
+    # ==================== Translate ====================
+
+    def translate(self, body):
+        """Translation objects for a parsed /v2/translate body, in text order"""
+        texts = body.get("text") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        target_lang = body.get("target_lang")
+        source_lang = body.get("source_lang")
+        glossary_id = body.get("glossary_id")
+        options = {k: v for k, v in body.items() if k not in TRANSLATE_FIELDS}
+        self.count("texts", len(texts))
+
+        # Without the glossary's content hash results cannot be cached safely,
+        # but identical requests are still coalesced
+        cacheable = self.cache.enabled
+        glossary_hash = None
+        if glossary_id and cacheable:
+            glossary_hash = self.glossary_hash(glossary_id)
+            cacheable = glossary_hash is not None
+
+        keys = [TranslationCache.make_key(text, source_lang, target_lang, glossary_hash, options)
+                for text in texts]
+        found = {}
+        if cacheable:
+            with self.cache_lock:
+                found = {key: json.loads(value)
+                         for key, value in self.cache.get_many(keys).items()}
+        self.count("texts_cached", sum(1 for key in keys if key in found))
+
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        if missing:
+            base_payload = build_translate_payload([], target_lang, source_lang,
+                                                   glossary_id, **options)
+            flight_key = hashlib.sha256(encode_json([missing, base_payload])).hexdigest()
+            translated = self.flights.do(flight_key,
+                                         lambda: self.translate_upstream(missing, base_payload))
+            by_text = dict(zip(missing, translated))
+            for text, key in zip(texts, keys):
+                if key not in found:
+                    found[key] = by_text[text]
+            if cacheable:
+                new = {key: found[key] for text, key in zip(texts, keys) if text in by_text}
+                with self.cache_lock:
+                    self.cache.put_many((key, json.dumps(translation, ensure_ascii=False))
+                                        for key, translation in new.items())
+
+        return [found[key] for key in keys]
+
+    def translate_upstream(self, texts, base_payload):
+        """Translate texts in request-sized batches; returns translation objects"""
+        translations = []
+        for batch in pack_texts(texts, base_payload):
+            payload = dict(base_payload, text=[texts[i] for i in batch])
+            response = self.upstream("POST", "/v2/translate",
+                                     data=encode_json(payload),
+                                     headers={"Content-Type": "application/json"},
+                                     characters=sum(len(text) for text in payload["text"]),
+                                     idempotent=True)
+            if response.status_code != 200:
+                raise UpstreamError(response)
+            translations.extend(response.json()["translations"])
+        return translations
+
+    # ==================== Glossaries ====================
+
+    def list_glossaries(self):
+        """The v2 glossary listing, from the cache or one shared fetch"""
+        def fetch():
+            response = self.upstream("GET", V2_LISTING)
+            if response.status_code != 200:
+                raise UpstreamError(response)
+            return response.json().get("glossaries", [])
+
+        return self.metadata.listing(V2_LISTING,
+                                     lambda: self.flights.do(("listing", V2_LISTING), fetch))
+
+    def glossary_changed(self, method, path, response):
+        """Keep caches current after a glossary request passed through"""
+        if method == "GET" or not 200 <= response.status_code < 300:
+            return
+        match = GLOSSARY_PATH.fullmatch(path)
+        if match:
+            glossary_id = match.group(1)
+            self.forget_glossary(glossary_id)
+            if method == "DELETE" and path.count("/") == 3:
+                self.metadata.remove(glossary_id)
+            else:
+                self.metadata.invalidate()
+        elif method == "POST" and path == V2_LISTING:
+            self.metadata.put(V2_LISTING, response.json())
+            self.metadata.invalidate(V3_LISTING)
+        elif method == "POST" and path == V3_LISTING:
+            self.metadata.invalidate()
+
+    def snapshot(self):
+        """Counters of the proxy, its caches and the upstream limiter"""
+        with self.lock:
+            stats = dict(self.stats)
+        with self.cache_lock:
+            stats["cache"] = self.cache.stats()
+        stats["coalesced"] = self.flights.shared
+        stats["metadata_hits"] = self.metadata.hits
+        stats["metadata_misses"] = self.metadata.misses
+        if self.client.limiter is not None:
+            stats["limiter"] = self.client.limiter.snapshot()
+        return stats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+    proxy = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # ==================== Plumbing ====================
+
+    def _dispatch(self):
+        proxy = self.proxy
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.raw_body = self.rfile.read(length) if length else b""
+        self.form = not self.headers.get("Content-Type", "").startswith("application/json")
+        proxy.count("requests")
+
+        if url.path == "/proxy/stats":
+            return self.send_json(200, proxy.snapshot())
+        if proxy.client_keys and self.client_key(url) not in proxy.client_keys:
+            proxy.count("rejected")
+            return self.send_json(403, {"message": "Authorization failure"})
+
+        try:
+            self._handle(url)
+        except Throttled:
+            self.send_json(429, {"message": "Too many requests (proxy rate limit)"},
+                           {"Retry-After": "1"})
+        except UpstreamError as e:
+            self.relay(e.response)
+        except requests.exceptions.RequestException as e:
+            self.send_json(502, {"message": f"Upstream request failed: {e}"})
+
+    def _handle(self, url):
+        proxy = self.proxy
+        method, path = self.command, url.path
+
+        if method == "POST" and path == "/v2/translate":
+            try:
+                body = self.body()
+            except ValueError as e:
+                return self.send_json(400, {"message": f"Invalid request body: {e}"})
+            if not body.get("text") or not body.get("target_lang"):
+                return self.send_json(400, {"message": "text and target_lang are required"})
+            texts = body["text"]
+            if not isinstance(body["target_lang"], str) or not (
+                    isinstance(texts, str)
+                    or isinstance(texts, list) and all(isinstance(t, str) for t in texts)):
+                return self.send_json(400, {"message": "text must be a string or a list of "
+                                                       "strings, target_lang a string"})
+            return self.send_json(200, {"translations": proxy.translate(body)})
+
+        if method == "GET" and path == V2_LISTING:
+            return self.send_json(200, {"glossaries": proxy.list_glossaries()})
+
+        match = GLOSSARY_PATH.fullmatch(path)
+        if method == "GET" and path.startswith("/v2/") and match and path.count("/") == 3:
+            glossary = proxy.metadata.get(V2_LISTING, match.group(1))
+            if glossary is not None:
+                return self.send_json(200, glossary)
+
+        # Pass through, without any key the client sent in the body or query
+        query = urlencode([(k, v) for k, v in parse_qsl(url.query) if k != "auth_key"])
+        data = self.raw_body
+        headers = {}
+        if data:
+            headers["Content-Type"] = self.headers.get("Content-Type")
+            if self.form:
+                try:
+                    fields = parse_qsl(data.decode("utf-8"))
+                except UnicodeDecodeError:
+                    return self.send_json(400, {"message": "Form body is not UTF-8"})
+                data = urlencode([(k, v) for k, v in fields if k != "auth_key"]).encode("utf-8")
+        if self.headers.get("Accept"):
+            headers["Accept"] = self.headers["Accept"]
+        response = proxy.upstream(method, path + (f"?{query}" if query else ""),
+                                  data=data or None, headers=headers)
+        proxy.glossary_changed(method, path, response)
+        self.relay(response)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    def body(self):
+        """Parsed JSON or form body; repeated form "text" fields form a list
+
+        Raises ValueError if the body is not valid UTF-8 or JSON, or the
+        JSON is not an object.
+        """
+        if not self.raw_body:
+            return {}
+        if not self.form:
+            body = json.loads(self.raw_body)
+            if not isinstance(body, dict):
+                raise ValueError("JSON body must be an object")
+            return body
+        form = parse_qs(self.raw_body.decode("utf-8"))
+        return {k: v if k == "text" else v[0] for k, v in form.items() if k != "auth_key"}
+
+    def client_key(self, url):
+        """API key the client authenticated with (header, form or query)"""
+        header = self.headers.get("Authorization", "")
+        if header.startswith("DeepL-Auth-Key "):
+            return header[len("DeepL-Auth-Key "):].strip()
+        fields = parse_qs(url.query)
+        if self.form and self.raw_body:
+            fields.update(parse_qs(self.raw_body.decode("utf-8", errors="replace")))
+        return (fields.get("auth_key") or [None])[0]
+
+    def send_raw(self, status, data, content_type, headers=None):
+        self.send_response(status)
+        if data or status != 204:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload, headers=None):
+        data = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_raw(status, data, "application/json", headers)
+
+    def relay(self, response):
+        """Send an upstream response back as it is"""
+        headers = {}
+        if response.headers.get("Retry-After"):
+            headers["Retry-After"] = response.headers["Retry-After"]
+        self.send_raw(response.status_code, response.content,
+                      response.headers.get("Content-Type", "application/json"), headers)
+
+
+# ==================== Main ====================
+
+def get_api_client(concurrency=MAX_UPSTREAM_CONCURRENCY):
+    """Return the shared upstream DeepL client"""
+    global API_KEY, API_BASE_URL
+    API_KEY = config.resolve_api_key(API_KEY)
+    API_BASE_URL = config.resolve_api_base_url(API_KEY, API_BASE_URL)
+    return get_client(API_KEY, API_BASE_URL, timeout=HTTP_TIMEOUT,
+                      max_retries=HTTP_MAX_RETRIES,
+                      limiter_factory=lambda: AdaptiveLimiter(maximum=concurrency))
+
+
+def print_stats(stats):
+    cache = stats["cache"]
+    print(f"📊 {stats['requests']} requests, {stats['upstream_requests']} sent upstream, "
+          f"{stats['coalesced']} coalesced, {stats['throttled']} throttled")
+    print(f"💾 {stats['texts_cached']}/{stats['texts']} texts from the cache "
+          f"({cache['entries']} entries), glossary listings: "
+          f"{stats['metadata_hits']} cached, {stats['metadata_misses']} fetched")
+
+
+def main():
+    global API_KEY
+
+    parser = argparse.ArgumentParser(description="Local caching proxy for the DeepL API")
+    parser.add_argument("--host", default=PROXY_HOST, help=f"Address to listen on (default: {PROXY_HOST})")
+    parser.add_argument("--port", type=int, default=PROXY_PORT, help=f"Port (default: {PROXY_PORT})")
+    parser.add_argument("--requests-per-second", type=float, default=REQUESTS_PER_SECOND,
+                        help=f"Global upstream rate limit (default: {REQUESTS_PER_SECOND})")
+    parser.add_argument("--burst", type=int, default=BURST,
+                        help=f"Requests allowed at once above the rate (default: {BURST})")
+    parser.add_argument("--concurrency", "-c", type=int, default=MAX_UPSTREAM_CONCURRENCY,
+                        help=f"Most upstream requests in flight (default: {MAX_UPSTREAM_CONCURRENCY})")
+    parser.add_argument("--max-queue-seconds", type=float, default=MAX_QUEUE_SECONDS,
+                        help="Answer 429 instead of waiting longer than this for the rate limit")
+    parser.add_argument("--cache-path", default=PROXY_CACHE_PATH, help="Translation cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Do not cache translations")
+    parser.add_argument("--cache-ttl", type=float, default=METADATA_CACHE_TTL, metavar="SECONDS",
+                        help=f"Seconds glossary listings are cached (default: {METADATA_CACHE_TTL})")
+    parser.add_argument("--glossary-hash-ttl", type=float, default=GLOSSARY_HASH_TTL,
+                        metavar="SECONDS",
+                        help="Seconds a glossary's content hash is reused before its entries "
+                             f"are fetched again (default: {GLOSSARY_HASH_TTL})")
+    parser.add_argument("--client-key", action="append", default=[], metavar="KEY",
+                        help="Only accept clients sending this key (repeatable; default: anyone)")
+    parser.add_argument("--api-key", help="DeepL API key (default: $API_KEY or config file)")
+    parser.add_argument("--config", metavar="FILE", help="JSON config file with api_key/api_base_url")
+    args = parser.parse_args()
+
+    if args.config:
+        config.set_config_file(args.config)
+    API_KEY = args.api_key or API_KEY
+
+    try:
+        client = get_api_client(args.concurrency)
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    cache = TranslationCache(args.cache_path, enabled=not args.no_cache, check_same_thread=False)
+    metadata = MetadataCache(ttl=args.cache_ttl)
+    metadata.register_gauges()
+    proxy = DeepLProxy(client, cache, metadata, args.requests_per_second, args.burst,
+                       args.max_queue_seconds, args.client_key, args.glossary_hash_ttl)
+    server = proxy.serve(args.host, args.port)
+
+    print(f"🚀 DeepL proxy on http://{args.host}:{server.server_address[1]} → {API_BASE_URL}")
+    print(f"🎚️  {args.requests_per_second:g} req/s, at most {args.concurrency} in flight; "
+          f"stats at /proxy/stats")
+    start = time.perf_counter()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n🛑 Stopped after {time.perf_counter() - start:.0f}s")
+        print_stats(proxy.snapshot())
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
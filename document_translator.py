@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Document Translator
+Translate whole plain-text and Markdown files (papers, theses, literature
+collections) with the glossary.
+
+Files are streamed: they are read line by line and cut into segments
+(paragraphs, headings, list items, table cells). Segments are grouped into
+request-sized chunks, and chunks are translated concurrently and written
+back in order, so memory stays bounded whatever the file size.
+
+Markdown structure is kept: code blocks, front matter, math blocks, HTML
+lines, rules and table separators are copied unchanged, and only the text
+after heading, list and quote markers is translated. Inline code, math,
+link targets and HTML tags are sent in ignored XML tags. Hard-wrapped
+paragraphs, list items and quotes are joined into one line so sentences
+translate as a whole.
+
+A checkpoint next to the output records how many chunks were written;
+an interrupted run continues from there when started again.
+
+Usage:
+    python document_translator.py paper.md
+    python document_translator.py papers/*.md --output-dir translated/ --concurrency 4
+    python document_translator.py thesis.txt --dry-run
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import config
+import quota
+
+# ==================== Configuration ====================
+
+API_KEY = None
+API_BASE_URL = None
+
+SOURCE_LANG = "EN"
+TARGET_LANG = "ZH"
+
+# HTTP settings: (connect, read) timeout in seconds and retries for 429/5xx
+HTTP_TIMEOUT = (10, 60)
+HTTP_MAX_RETRIES = 5
+
+# Most chunks translated at the same time
+DEFAULT_CONCURRENCY = 8
+
+# Adapt the number of chunks in flight to 429/503 responses and latency
+# (concurrency.py), up to the concurrency above; False always uses all of it
+ADAPTIVE_CONCURRENCY = True
+
+# A chunk is about one /v2/translate request
+CHUNK_MAX_SEGMENTS = 50
+CHUNK_MAX_CHARACTERS = 60000
+
+# Chunks kept in memory per worker (translated but not yet written, or queued)
+CHUNKS_PER_WORKER = 2
+
+# Print progress every this many chunks
+PROGRESS_EVERY = 20
+
+MARKDOWN_SUFFIXES = {".md", ".markdown", ".mdown"}
+
+# ==================== Segmentation ====================
+
+FENCE = re.compile(r"^\s{0,3}(`{3,}|~{3,})")
+HEADING = re.compile(r"^(\s{0,3}#{1,6}\s+)(.*?)(\s+#+)?\s*$")
+LIST_ITEM = re.compile(r"^(\s*(?:[-*+]|\d{1,9}[.)])\s+(?:\[[ xX]\]\s+)?)(.*?)\s*$")
+QUOTE = re.compile(r"^(\s*(?:>\s?)+)(.*?)\s*$")
+RULE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+SETEXT_UNDERLINE = re.compile(r"^\s{0,3}=+\s*$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)+\|?\s*$")
+HTML_LINE = re.compile(r"^\s*</?[A-Za-z!][^>]*>\s*$")
+LINK_DEFINITION = re.compile(r"^\s{0,3}\[[^\]]+\]:\s")
+MATH_FENCE = "$$"
+
+# Inline spans DeepL must not translate: code spans, inline math, link and
+# image targets, autolinks and inline HTML tags
+INLINE_PROTECTED = re.compile(
+    r"(`+).+?\1"
+    r"|(?<![\\$])\$(?=\S)[^$\n]+?(?<=\S)\$(?!\d)"
+    r"|(?<=\])\([^)\s]*(?:\s+\"[^\"]*\")?\)"
+    r"|<(?:https?://|mailto:)[^>\s]+>"
+    r"|</?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>"
+)
+
+# Protected spans are sent inside this tag with tag_handling="xml"
+KEEP_TAG = "keep"
+KEEP_TAGS = re.compile(rf"</?{KEEP_TAG}>")
+
+
+def raw(line):
+    """A block copied to the output unchanged"""
+    return ([line + "\n"], [])
+
+
+def text_block(prefix, text, suffix="\n"):
+    """A block whose text is translated between a fixed prefix and suffix"""
+    if not text.strip():
+        return raw(prefix + text + suffix.rstrip("\n"))
+    return ([prefix, suffix], [text])
+
+
+def table_row(line):
+    """Translate each non-empty cell of a table row"""
+    cells = line.split("|")
+    literals = [""]
+    texts = []
+    for i, cell in enumerate(cells):
+        separator = "|" if i < len(cells) - 1 else "\n"
+        content = cell.strip()
+        if content:
+            start = cell.index(content)
+            literals[-1] += cell[:start]
+            texts.append(content)
+            literals.append(cell[start + len(content):] + separator)
+        else:
+            literals[-1] += cell + separator
+    return (literals, texts)
+
+
+def protect_inline(text):
+    """The text as XML with INLINE_PROTECTED spans in KEEP_TAG, or None if it has none"""
+    parts = []
+    position = 0
+    for match in INLINE_PROTECTED.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(f"<{KEEP_TAG}>{escape(match.group(0))}</{KEEP_TAG}>")
+        position = match.end()
+    if not parts:
+        return None
+    parts.append(escape(text[position:]))
+    return "".join(parts)
+
+
+def restore_inline(translation):
+    """Plain text from an XML translation made with protect_inline"""
+    return html.unescape(KEEP_TAGS.sub("", translation))
+
+
+def iter_plain_blocks(lines):
+    """Blocks of a plain text file: paragraphs separated by blank lines"""
+    paragraph = []
+    for line in lines:
+        if line.strip():
+            paragraph.append(line.strip())
+            continue
+        if paragraph:
+            yield text_block("", " ".join(paragraph))
+            paragraph = []
+        yield raw(line)
+    if paragraph:
+        yield text_block("", " ".join(paragraph))
+
+
+def iter_markdown_blocks(lines):
+    """Blocks of a Markdown file, keeping its structure
+
+    Paragraphs, list items and quotes are open blocks: their wrapped
+    continuation lines are joined into one segment. Inside a list, an
+    indented paragraph after a blank line continues the item instead of
+    starting an indented code block.
+    """
+    paragraph = []
+    prefix = ""     # marker or indentation written before the joined text
+    quote = None    # marker of an open quote, so "> a\n> b" is one segment
+    closing = None  # fence, "$$" or "---" that ends a verbatim region
+    previous_blank = True
+    in_list = False
+
+    def flush():
+        nonlocal prefix, quote
+        block = text_block(prefix, " ".join(paragraph)) if paragraph else None
+        paragraph.clear()
+        prefix, quote = "", None
+        return block
+
+    for line_number, line in enumerate(lines):
+        stripped = line.strip()
+
+        if closing is not None:
+            yield raw(line)
+            if (stripped.startswith(closing) and set(stripped) == set(closing)) \
+                    or (closing == MATH_FENCE and stripped.endswith(MATH_FENCE)):
+                closing = None
+            previous_blank = False
+            continue
+
+        indented = line.startswith((" ", "\t"))
+        list_item = LIST_ITEM.match(line)
+        quote_line = QUOTE.match(line)
+        # A list ends at the first unindented line after a blank one
+        if stripped and previous_blank and not indented and not list_item:
+            in_list = False
+
+        fence = FENCE.match(line)
+        block = None
+        verbatim = False
+        if line_number == 0 and stripped == "---":
+            closing, verbatim = "---", True
+        elif fence:
+            closing, verbatim = fence.group(1)[0] * len(fence.group(1)), True
+        elif stripped.startswith(MATH_FENCE):
+            verbatim = True
+            if not (len(stripped) > 2 and stripped.endswith(MATH_FENCE)):
+                closing = MATH_FENCE
+        elif not stripped or RULE.match(line) or SETEXT_UNDERLINE.match(line) \
+                or TABLE_SEPARATOR.match(line) or HTML_LINE.match(line) \
+                or LINK_DEFINITION.match(line):
+            verbatim = True
+        elif (previous_blank and not paragraph and not list_item and not in_list
+              and (line.startswith("    ") or line.startswith("\t"))):
+            # Indented code block
+            verbatim = True
+        elif HEADING.match(line):
+            match = HEADING.match(line)
+            block = text_block(match.group(1), match.group(2), (match.group(3) or "") + "\n")
+        elif stripped.startswith("|"):
+            block = table_row(line)
+        elif list_item:
+            pending = flush()
+            if pending:
+                yield pending
+            prefix = list_item.group(1)
+            paragraph.append(list_item.group(2))
+            in_list = True
+            previous_blank = False
+            continue
+        elif quote_line:
+            marker, text = quote_line.group(1), quote_line.group(2)
+            if quote is not None and marker.replace(" ", "") == quote and text:
+                paragraph.append(text)
+                previous_blank = False
+                continue
+            pending = flush()
+            if pending:
+                yield pending
+            if text:
+                prefix, quote = marker, marker.replace(" ", "")
+                paragraph.append(text)
+            else:
+                yield raw(line)
+            previous_blank = False
+            continue
+        else:
+            # Continuation of the open paragraph, item or quote, or a new
+            # paragraph (indented like its item when inside a list)
+            if not paragraph and in_list and indented:
+                prefix = line[:len(line) - len(line.lstrip())]
+            paragraph.append(stripped)
+            previous_blank = False
+            continue
+
+        pending = flush()
+        if pending:
+            yield pending
+        yield raw(line) if verbatim else block
+        previous_blank = not stripped
+
+    pending = flush()
+    if pending:
+        yield pending
+
+
+def iter_blocks(path):
+    """Stream the blocks of a file: (literals, texts) with one more literal than texts"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        lines = (line.rstrip("\r\n") for line in f)
+        if Path(path).suffix.lower() in MARKDOWN_SUFFIXES:
+            yield from iter_markdown_blocks(lines)
+        else:
+            yield from iter_plain_blocks(lines)
+
+
+def iter_chunks(blocks, max_segments=CHUNK_MAX_SEGMENTS, max_characters=CHUNK_MAX_CHARACTERS):
+    """Group blocks into chunks of about one request each"""
+    chunk = []
+    segments = 0
+    characters = 0
+    for block in blocks:
+        chunk.append(block)
+        segments += len(block[1])
+        characters += quota.character_cost(block[1])
+        if segments >= max_segments or characters >= max_characters:
+            yield chunk
+            chunk = []
+            segments = 0
+            characters = 0
+    if chunk:
+        yield chunk
+
+
+def render(chunk, translations):
+    """Put translated texts back between the literals of their blocks"""
+    parts = []
+    position = 0
+    for literals, texts in chunk:
+        parts.append(literals[0])
+        for i in range(len(texts)):
+            parts.append(translations[position])
+            parts.append(literals[i + 1])
+            position += 1
+    return "".join(parts)
+
+
+# ==================== Checkpoints ====================
+
+def checkpoint_path(output):
+    return f"{output}.checkpoint.json"
+
+
+def source_fingerprint(source, glossary_id, source_lang, target_lang):
+    """What a checkpoint must match to be resumed"""
+    stat = os.stat(source)
+    return {
+        "source": str(Path(source).resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "glossary_id": glossary_id,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+    }
+
+
+def load_checkpoint(output, fingerprint):
+    """Return (chunks written, output bytes) to resume from, or (0, 0)"""
+    try:
+        with open(checkpoint_path(output), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0, 0
+
+    if state.get("fingerprint") != fingerprint or not os.path.exists(output) \
+            or os.path.getsize(output) < state["output_bytes"]:
+        print(f"⚠️  Checkpoint for {output} does not match the source or output, starting over")
+        return 0, 0
+    return state["chunks"], state["output_bytes"]
+
+
+def save_checkpoint(output, fingerprint, chunks, output_bytes):
+    """Record progress atomically"""
+    path = checkpoint_path(output)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "chunks": chunks,
+                   "output_bytes": output_bytes}, f)
+    os.replace(tmp_path, path)
+
+
+# ==================== Pipeline ====================
+
+def get_api_client(concurrency=DEFAULT_CONCURRENCY):
+    """Return the shared DeepL client"""
+    global API_KEY, API_BASE_URL
+    from concurrency import AdaptiveLimiter
+    from deepl_client import get_client
+
+    API_KEY = config.resolve_api_key(API_KEY)
+    API_BASE_URL = config.resolve_api_base_url(API_KEY, API_BASE_URL)
+
+    def limiter():
+        return AdaptiveLimiter(maximum=concurrency) if ADAPTIVE_CONCURRENCY else None
+
+    return get_client(API_KEY, API_BASE_URL, timeout=HTTP_TIMEOUT,
+                      max_retries=HTTP_MAX_RETRIES, limiter_factory=limiter)
+
+
+def find_glossary(client, source_lang, target_lang):
+    """ID of the first glossary for the language pair, or None"""
+    response = client.get("/v2/glossaries")
+    response.raise_for_status()
+    for glossary in response.json().get("glossaries", []):
+        if (glossary["source_lang"].lower() == source_lang.lower()
+                and glossary["target_lang"].lower() == target_lang.split("-")[0].lower()):
+            return glossary["glossary_id"]
+    return None
+
+
+def translate_chunk(client, chunk, source_lang, target_lang, glossary_id):
+    """Translate one chunk and return its rendered text"""
+    texts = [text for _, block_texts in chunk for text in block_texts]
+    translations = []
+    protected = [protect_inline(text) for text in texts]
+    if any(xml is not None for xml in protected):
+        # Code, math and link targets go in ignored tags; the whole chunk is
+        # then XML, so the other texts are escaped too
+        xml_texts = [escape(text) if xml is None else xml for text, xml in zip(texts, protected)]
+        translations = client.translate_texts(xml_texts, target_lang, source_lang, glossary_id,
+                                              preserve_formatting=True, tag_handling="xml",
+                                              ignore_tags=[KEEP_TAG])
+        translations = [restore_inline(translation) for translation in translations]
+    elif texts:
+        translations = client.translate_texts(texts, target_lang, source_lang, glossary_id,
+                                              preserve_formatting=True)
+    return render(chunk, translations)
+
+
+def translate_file(client, source, output, source_lang=SOURCE_LANG, target_lang=TARGET_LANG,
+                   glossary_id=None, concurrency=DEFAULT_CONCURRENCY, resume=True):
+    """Translate one file into output, resuming from its checkpoint
+
+    Returns a dict with the number of chunks, segments and characters
+    translated in this run.
+    """
+    fingerprint = source_fingerprint(source, glossary_id, source_lang, target_lang)
+    done, output_bytes = load_checkpoint(output, fingerprint) if resume else (0, 0)
+    if done:
+        print(f"↩️  Resuming {source} after chunk {done}")
+
+    stats = {"chunks": 0, "segments": 0, "characters": 0}
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    out = open(output, "r+b" if done else "wb")
+    out.truncate(output_bytes)
+    out.seek(output_bytes)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    pending = deque()
+
+    def write_oldest():
+        nonlocal output_bytes
+        index, future = pending.popleft()
+        data = future.result().encode("utf-8")
+        out.write(data)
+        out.flush()
+        output_bytes += len(data)
+        save_checkpoint(output, fingerprint, index + 1, output_bytes)
+        if (index + 1) % PROGRESS_EVERY == 0:
+            print(f"   … {index + 1} chunks written")
+
+    try:
+        for index, chunk in enumerate(iter_chunks(iter_blocks(source))):
+            if index < done:
+                continue
+            texts = [text for _, block_texts in chunk for text in block_texts]
+            stats["chunks"] += 1
+            stats["segments"] += len(texts)
+            stats["characters"] += quota.character_cost(texts)
+            pending.append((index, pool.submit(translate_chunk, client, chunk,
+                                               source_lang, target_lang, glossary_id)))
+            if len(pending) >= max(1, concurrency) * CHUNKS_PER_WORKER:
+                write_oldest()
+        while pending:
+            write_oldest()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        out.close()
+
+    if os.path.exists(checkpoint_path(output)):
+        os.remove(checkpoint_path(output))
+    return stats
+
+
+def count_file(source):
+    """Segments and characters a file would send (for --dry-run)"""
+    segments = 0
+    characters = 0
+    for _, texts in iter_blocks(source):
+        segments += len(texts)
+        characters += quota.character_cost(texts)
+    return segments, characters
+
+
+def output_path(source, output_dir, target_lang):
+    source = Path(source)
+    directory = Path(output_dir) if output_dir else source.parent
+    return directory / f"{source.stem}.{target_lang.lower()}{source.suffix}"
+
+
+def main():
+    global API_KEY, API_BASE_URL, ADAPTIVE_CONCURRENCY
+
+    parser = argparse.ArgumentParser(description="Translate plain text / Markdown files with the glossary")
+    parser.add_argument("files", nargs="+", help="Files to translate")
+    parser.add_argument("--output-dir", help="Directory for translations (default: next to each file)")
+    parser.add_argument("--source-lang", default=SOURCE_LANG)
+    parser.add_argument("--target-lang", default=TARGET_LANG)
+    parser.add_argument("--glossary-id", help="Glossary to use (default: first one for the language pair)")
+    parser.add_argument("--no-glossary", action="store_true", help="Translate without a glossary")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Most chunks translated at the same time (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--fixed-concurrency", action="store_true",
+                        help="Always keep --concurrency chunks in flight instead of adapting")
+    parser.add_argument("--restart", action="store_true", help="Ignore checkpoints and start over")
+    parser.add_argument("--force", action="store_true", help="Translate files whose output already exists")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only count segments and characters, no API calls")
+    parser.add_argument("--no-quota-check", action="store_true",
+                        help="Do not compare the character count with /v2/usage first")
+    parser.add_argument("--api-key", help="DeepL API key (default: $API_KEY or config file)")
+    parser.add_argument("--config", metavar="FILE", help="JSON config file with api_key/api_base_url")
+    args = parser.parse_args()
+
+    if args.config:
+        config.set_config_file(args.config)
+    API_KEY = args.api_key or API_KEY
+    if args.fixed_concurrency:
+        ADAPTIVE_CONCURRENCY = False
+
+    if args.dry_run:
+        total = 0
+        for source in args.files:
+            segments, characters = count_file(source)
+            total += characters
+            print(f"📄 {source}: {segments} segments, {characters:,} characters")
+        print(f"\n💰 Total: {total:,} characters")
+        return
+
+    try:
+        client = get_api_client(args.concurrency)
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if not args.no_quota_check:
+        characters = sum(count_file(source)[1] for source in args.files)
+        try:
+            usage = quota.fetch_usage(client)
+        except Exception as e:
+            print(f"⚠️  Could not check the character quota: {e}")
+        else:
+            plan = quota.plan_job([{"name": "documents", "characters": characters,
+                                    "optional": False}], usage)
+            print(f"💰 {characters:,} characters to translate, "
+                  f"{plan['available']:,} left in the quota")
+            if plan["decision"] == "refuse":
+                print("❌ Not enough character quota (use --no-quota-check to try anyway)")
+                sys.exit(1)
+
+    glossary_id = None
+    if not args.no_glossary:
+        glossary_id = args.glossary_id or find_glossary(client, args.source_lang, args.target_lang)
+        if not glossary_id:
+            print(f"❌ No {args.source_lang} → {args.target_lang} glossary found "
+                  f"(use --glossary-id or --no-glossary)")
+            sys.exit(1)
+        print(f"📋 Using glossary: {glossary_id}")
+
+    failed = 0
+    for source in args.files:
+        output = output_path(source, args.output_dir, args.target_lang)
+        if output.exists() and not os.path.exists(checkpoint_path(output)) and not args.force:
+            print(f"⏭️  {output} already exists (use --force to translate again)")
+            continue
+
+        print(f"\n📄 {source} → {output}")
+        start = time.perf_counter()
+        try:
+            stats = translate_file(client, source, output, args.source_lang, args.target_lang,
+                                   glossary_id, args.concurrency, resume=not args.restart)
+        except Exception as e:
+            failed += 1
+            print(f"❌ {source}: {e} (run again to resume from the checkpoint)")
+            continue
+        print(f"✅ {stats['segments']} segments, {stats['characters']:,} characters "
+              f"in {stats['chunks']} chunks ({time.perf_counter() - start:.1f}s)")
+        if client.limiter is not None:
+            snapshot = client.limiter.snapshot()
+            print(f"🎚️  Concurrency: limit {snapshot['limit']}, "
+                  f"peak {snapshot['peak_in_flight']} in flight, "
+                  f"{snapshot['throttled']} throttled, {snapshot['throughput']:.1f} req/s")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Sorted Entry Diff
+Compare two large sets of glossary entries in bounded memory.
+
+Both sides are brought into source-term order and walked together once
+(a sort-merge join), so only the current entry of each side is held.
+Streams that are not sorted are sorted externally: runs of
+SORT_CHUNK_ENTRIES entries are sorted in memory, spilled to temporary
+files and merged back with heapq.merge. Compiled term stores are
+already sorted and are read as they are.
+
+Differences are written one per row as TSV or JSON, so a diff of two
+200k-entry glossaries never builds its result in memory either.
+
+Usage:
+    remote = external_sort(iter_remote_entries(glossary_id))
+    with open("diff.tsv", "w", encoding="utf-8") as f:
+        counts = write_diff(merge_diff(remote, sorted_entries(TERMS)), f, "tsv")
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import hashlib
+import heapq
+import json
+import tempfile
+from collections.abc import Mapping
+
+from term_store import TermStore
+
+# Entries sorted in memory at a time before spilling a run to disk
+SORT_CHUNK_ENTRIES = 100000
+
+DIFF_FORMATS = ("tsv", "json")
+
+
+# ==================== Sorting ====================
+
+def _spill(chunk):
+    run = tempfile.TemporaryFile("w+", encoding="utf-8", newline="\n")
+    # Terms cannot contain tabs or newlines (DeepL rejects them)
+    run.writelines(f"{source}\t{target}\n" for source, target in chunk)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    for line in run:
+        source, target = line[:-1].split("\t", 1)
+        yield source, target
+
+
+def external_sort(pairs, chunk_size=SORT_CHUNK_ENTRIES):
+    """Yield (source, target) pairs sorted by source, holding at most chunk_size in memory
+
+    Streams of at most chunk_size pairs are sorted in memory without
+    touching the disk.
+    """
+    runs = []
+    chunk = []
+    try:
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) >= chunk_size:
+                chunk.sort()
+                runs.append(_spill(chunk))
+                chunk = []
+        chunk.sort()
+        if not runs:
+            yield from chunk
+            return
+        if chunk:
+            runs.append(_spill(chunk))
+            chunk = []
+        yield from heapq.merge(*(_read_run(run) for run in runs))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def sorted_entries(entries, chunk_size=SORT_CHUNK_ENTRIES):
+    """Sorted (source, target) pairs of a term store, mapping or pair stream"""
+    if isinstance(entries, TermStore):
+        return entries.iter_items()
+    if isinstance(entries, Mapping):
+        return iter(sorted(entries.items()))
+    return external_sort(entries, chunk_size)
+
+
+# ==================== Merging ====================
+
+def merge_diff(remote, local):
+    """Walk two sorted entry streams and yield their differences
+
+    Yields (change, source, remote target, local target) with change
+    "added" (local only), "removed" (remote only) or "changed". Repeated
+    source terms within one stream are skipped after the first.
+    """
+    def dedup(pairs):
+        previous = None
+        for source, target in pairs:
+            if source != previous:
+                previous = source
+                yield source, target
+
+    remote, local = dedup(remote), dedup(local)
+    r = next(remote, None)
+    l = next(local, None)
+    while r is not None or l is not None:
+        if l is None or (r is not None and r[0] < l[0]):
+            yield "removed", r[0], r[1], None
+            r = next(remote, None)
+        elif r is None or l[0] < r[0]:
+            yield "added", l[0], None, l[1]
+            l = next(local, None)
+        else:
+            if r[1] != l[1]:
+                yield "changed", r[0], r[1], l[1]
+            r = next(remote, None)
+            l = next(local, None)
+
+
+class SortedHash:
+    """Entries hash (terms.entries_hash) of a sorted stream, computed while it passes"""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.digest = hashlib.sha256()
+        self.count = 0
+
+    def __iter__(self):
+        for source, target in self.pairs:
+            self.digest.update(f"{chr(10) if self.count else ''}{source}\t{target}".encode("utf-8"))
+            self.count += 1
+            yield source, target
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+# ==================== Output ====================
+
+def write_diff(changes, out, fmt="tsv"):
+    """Write changes from merge_diff to a text file as TSV or JSON
+
+    TSV has a header row and one row per change (empty cells for missing
+    targets). JSON is {"changes": [...], "summary": {...}}, written one
+    change at a time. Returns the counts per change type.
+    """
+    if fmt not in DIFF_FORMATS:
+        raise ValueError(f"Unknown diff format: {fmt} (use {', '.join(DIFF_FORMATS)})")
+
+    counts = {"added": 0, "removed": 0, "changed": 0}
+    if fmt == "tsv":
+        out.write("change\tsource\tremote_target\tlocal_target\n")
+    else:
+        out.write('{"changes": [')
+
+    for change, source, remote_target, local_target in changes:
+        if fmt == "tsv":
+            out.write(f"{change}\t{source}\t{remote_target or ''}\t{local_target or ''}\n")
+        else:
+            item = {"change": change, "source": source,
+                    "remote_target": remote_target, "local_target": local_target}
+            separator = "," if any(counts.values()) else ""
+            out.write(f"{separator}\n  {json.dumps(item, ensure_ascii=False)}")
+        counts[change] += 1
+
+    if fmt == "json":
+        out.write(f'\n], "summary": {json.dumps(counts)}}}\n')
+    return counts
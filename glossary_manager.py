@@ -9,23 +9,93 @@ License: MIT
 Repository: https://github.com/wzhxzkk/deepl-glossary-manager
 """
 
-import requests
-import json
+import argparse
 import sys
-import os
-from pathlib import Path
+import time
+from itertools import islice
+
+# Network modules (requests, deepl_client) are imported only when a command
+# calls the API, so offline commands start fast and need no API key
+import bulk_ops
+import config
+from concurrency import AdaptiveLimiter
+from entry_diff import DIFF_FORMATS, SortedHash, external_sort, merge_diff, sorted_entries, write_diff
+import glossary_registry
+from glossary_registry import GlossaryRegistry
+import instrumentation
+import metadata_cache
+from metadata_cache import V2_LISTING, V3_LISTING, MetadataCache
+import profiling
+import term_loader
+from terms import TERMS, canonical_tsv, entries_hash, iter_tsv_chunks
 
 # ==================== Configuration ====================
 
 # Your DeepL API Key
 # For Free API: Get from https://www.deepl.com/pro-api (ends with ':fx')
 # For Pro API: Get from your DeepL account
-API_KEY = os.environ["API_KEY"]
+# None: resolved when first needed from --api-key, the API_KEY environment
+# variable, or "api_key" in deepl_glossary_config.json (see config.py)
+API_KEY = None
 
 # API Endpoint
 # Free API users: "https://api-free.deepl.com"
 # Pro/Team users: "https://api.deepl.com"
-API_BASE_URL = "https://api-free.deepl.com"
+# None: --api-base-url, $DEEPL_API_BASE_URL, "api_base_url" in the config
+# file, or picked from the key (Free API keys end with ':fx')
+API_BASE_URL = None
+
+# HTTP settings: (connect, read) timeout in seconds and retries on 429/5xx
+HTTP_TIMEOUT = (10, 60)
+HTTP_MAX_RETRIES = 5
+
+# Local registry of every glossary we created or fetched (IDs, names, entries
+# hashes, term snapshots per version; glossary_registry.py). It lets sync skip
+# unchanged glossaries without any API call, list/view/update work with
+# --offline, and rollback restore earlier terms
+REGISTRY_PATH = glossary_registry.DEFAULT_REGISTRY_PATH
+
+# Info file written by earlier versions, imported into a new registry once
+GLOSSARY_INFO_FILE = "deepl_glossary_info.txt"
+
+# Blue/green updates (Pro accounts only, as they need two glossaries at once):
+# create and verify the new glossary, switch the saved plugin key to it, and
+# only then delete the old one, so translations never run without a glossary
+BLUE_GREEN_UPDATE = False
+
+# Use the v3 multilingual glossary API
+# v3 glossaries hold one dictionary per language pair and can be updated in
+# place, so updates keep the glossary ID (and the Zotero plugin key) stable.
+# v3 glossary IDs work with /v2/translate like v2 ones.
+USE_V3_API = False
+
+# More language pairs of the v3 glossary, each read from its own term files
+# (same formats as TERM_FILES). SOURCE_LANG → TARGET_LANG always uses TERMS;
+# dictionaries on the remote glossary that are not configured are left as
+# they are. Only used with USE_V3_API.
+# e.g. EXTRA_DICTIONARIES = {("en", "de"): ["terms/en-de.tsv"],
+#                            ("zh", "en"): ["terms/zh-en.tsv"]}
+EXTRA_DICTIONARIES = {}
+
+# Parallel workers for bulk operations (delete all, bulk delete/fetch/recreate)
+BULK_WORKERS = bulk_ops.DEFAULT_WORKERS
+
+# Adaptive concurrency: start with a few requests in flight, raise the number
+# while responses are fast and cut it on 429/503 or Retry-After (concurrency.py).
+# BULK_WORKERS is then the upper bound. False always uses BULK_WORKERS.
+ADAPTIVE_CONCURRENCY = True
+
+# Glossary listings are reused for this many seconds within a run, and kept
+# current by our own creates and deletes (metadata_cache.py); 0 disables it
+METADATA_CACHE_TTL = metadata_cache.DEFAULT_TTL
+
+# Entries printed when viewing a glossary, and differences printed by the diff
+# command without --output; the rest are only counted
+VIEW_PRINT_LIMIT = 200
+DIFF_PRINT_LIMIT = 50
+
+# Bytes read at a time when streaming glossary entries
+TSV_CHUNK_SIZE = 65536
 
 # Glossary Name
 GLOSSARY_NAME = "Academic_AI_Terms"
@@ -35,50 +105,84 @@ SOURCE_LANG = "en"  # English
 TARGET_LANG = "zh"  # Chinese
 
 # ==================== Terms Configuration ====================
-# Format: "English term": "Chinese translation" or "English term": "English term" (to keep English)
-#
-# Two types of terms:
-# 1. Keep English: "LLM": "LLM"
-# 2. Translate to Chinese: "policy": "策略"
-
-TERMS = {
-    # ========== Keep English (Abbreviations and Proper Nouns) ==========
-    "LLM": "LLM",
-    "LLMs": "LLM",
-    "GPT": "GPT",
-    "API": "API",
-    "NLP": "NLP",
-
-    # ========== Translate to Chinese (Full Terms) ==========
-    "large language model": "大语言模型",
-    "large language models": "大语言模型",
-    "reinforcement learning": "强化学习",
-    "embodied AI": "具身智能",
-    "embodied decision making": "具身决策",
-    "policy": "策略",
-    "reward": "奖励",
-    "agent": "agent",  # Keep English or change to "智能体"
-    "environment": "环境",
-    "state": "状态",
-    "action": "动作",
-    "Markov Decision Process": "马尔可夫决策过程",
-    "MDP": "马尔可夫决策过程",
-    "Q-learning": "Q学习",
-    "actor-critic": "演员-评论家",
-    "imitation learning": "模仿学习",
-    "demonstration": "演示",
-    "trajectory": "轨迹",
-    "visuomotor control": "视觉-运动控制",
-    "multimodal": "多模态",
-}
+# Terms are defined in terms.py (TERMS), a lightweight module that offline
+# tools such as scripts/export_terms.py import without any network setup.
+
+# External term files (TSV/CSV/JSON/JSON Lines, glob patterns allowed)
+# If set, they replace TERMS from terms.py; also available as --terms on the command line
+# e.g. TERM_FILES = ["terms/*.tsv"]
+TERM_FILES = []
+
+# Where TERMS came from, recorded with each glossary in the registry
+TERMS_SOURCE = "terms.py"
 
 # ==================== Main Functions ====================
 
+def api_key():
+    """Return the API key, resolving it on first use
+
+    Raises config.ConfigError if no key is configured.
+    """
+    global API_KEY
+    API_KEY = config.resolve_api_key(API_KEY)
+    return API_KEY
+
+
+def api_base_url():
+    """Return the API endpoint, resolving it on first use"""
+    global API_BASE_URL
+    API_BASE_URL = config.resolve_api_base_url(api_key(), API_BASE_URL)
+    return API_BASE_URL
+
+
+def get_api_client():
+    """Return the shared, connection-pooled DeepL client"""
+    from deepl_client import get_client
+
+    def limiter():
+        return AdaptiveLimiter(maximum=BULK_WORKERS) if ADAPTIVE_CONCURRENCY else None
+
+    return get_client(api_key(), api_base_url(),
+                      timeout=HTTP_TIMEOUT,
+                      max_retries=HTTP_MAX_RETRIES,
+                      limiter_factory=limiter)
+
+
+_metadata_cache = None
+
+
+def get_metadata_cache():
+    """Return the shared glossary listing cache"""
+    global _metadata_cache
+    if _metadata_cache is None:
+        _metadata_cache = MetadataCache(METADATA_CACHE_TTL)
+        _metadata_cache.register_gauges()
+    return _metadata_cache
+
+
+_registry = None
+
+
+def get_registry():
+    """Return the glossary registry, importing the legacy info file into a new one"""
+    global _registry
+    if _registry is None:
+        _registry = GlossaryRegistry(REGISTRY_PATH)
+        if _registry.is_empty():
+            imported = _registry.import_legacy(GLOSSARY_INFO_FILE)
+            if imported:
+                print(f"📥 Imported {imported} glossary from {GLOSSARY_INFO_FILE} "
+                      f"into {REGISTRY_PATH}")
+    return _registry
+
+
 def create_glossary():
-    """Create a new DeepL Glossary"""
+    """Create a new DeepL Glossary
 
-    # Build TSV format entries
-    entries = "\n".join([f"{en}\t{zh}" for en, zh in TERMS.items()])
+    Returns:
+        str: The new glossary ID, or None if creation failed
+    """
+    import requests
 
     print("=" * 60)
     print("DeepL Glossary Creation Tool")
@@ -88,44 +192,28 @@ def create_glossary():
     print(f"📊 Number of Terms: {len(TERMS)}")
     print(f"\nTerms Preview:")
     print("-" * 60)
-    for i, (en, zh) in enumerate(list(TERMS.items())[:5], 1):
+    for i, (en, zh) in enumerate(islice(TERMS.items(), 5), 1):
         print(f"{i}. {en} → {zh}")
     if len(TERMS) > 5:
         print(f"... and {len(TERMS) - 5} more terms")
     print("-" * 60)
 
-    # Send creation request
-    url = f"{API_BASE_URL}/v2/glossaries"
-    headers = {
-        "Authorization": f"DeepL-Auth-Key {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "name": GLOSSARY_NAME,
-        "source_lang": SOURCE_LANG,
-        "target_lang": TARGET_LANG,
-        "entries": entries,
-        "entries_format": "tsv"
-    }
-
     print(f"\n🚀 Creating glossary...")
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-
-        result = response.json()
+        result = post_glossary()
         glossary_id = result["glossary_id"]
+        entry_count = glossary_entry_count(result)
 
         print("\n✅ Glossary created successfully!")
         print("=" * 60)
         print(f"Glossary ID: {glossary_id}")
         print(f"Created: {result['creation_time']}")
-        print(f"Entry Count: {result['entry_count']}")
+        print(f"Entry Count: {entry_count}")
         print("=" * 60)
 
         # Generate plugin secret format
-        plugin_secret = f"{API_KEY}#{glossary_id}"
+        plugin_secret = f"{api_key()}#{glossary_id}"
 
         print(f"\n📋 Copy this complete key to your Zotero plugin settings:")
         print("-" * 60)
@@ -138,15 +226,10 @@ def create_glossary():
         print(f"3. Paste the complete key above into the key input box")
         print(f"4. Your glossary will now be used automatically!")
 
-        # Save to file
-        output_file = Path("deepl_glossary_info.txt")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(f"Glossary ID: {glossary_id}\n")
-            f.write(f"Plugin Secret: {plugin_secret}\n")
-            f.write(f"\nCreated: {result['creation_time']}\n")
-            f.write(f"Entry Count: {result['entry_count']}\n")
-
-        print(f"\n💾 Glossary info saved to: {output_file}")
+        version = record_created_glossary(result)
+        print(f"\n💾 Recorded as version {version} of {GLOSSARY_NAME} in: {REGISTRY_PATH}")
+        print(f"   (python glossary_manager.py list --offline shows it again)")
+        return glossary_id
 
     except requests.exceptions.HTTPError as e:
         print(f"\n❌ Error: {e}")
@@ -159,31 +242,135 @@ def create_glossary():
     except Exception as e:
         print(f"\n❌ Unknown error: {e}")
 
+    return None
 
-def list_glossaries():
-    """List all created glossaries"""
-    url = f"{API_BASE_URL}/v2/glossaries"
-    headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
 
-    try:
-        response = requests.get(url, headers=headers)
+def post_glossary():
+    """Send the creation request for TERMS and return the API result
+
+    Raises requests.exceptions.HTTPError if the request fails.
+    """
+    if USE_V3_API:
+        path = "/v3/glossaries"
+        payload = {
+            "name": GLOSSARY_NAME,
+            "dictionaries": [
+                dictionary_payload(source_lang, target_lang, terms)
+                for (source_lang, target_lang), terms in glossary_dictionaries().items()
+            ]
+        }
+    else:
+        path = "/v2/glossaries"
+        payload = {
+            "name": GLOSSARY_NAME,
+            "source_lang": SOURCE_LANG,
+            "target_lang": TARGET_LANG,
+            "entries": canonical_tsv(TERMS),
+            "entries_format": "tsv"
+        }
+
+    response = get_api_client().post(path, json=payload)
+    response.raise_for_status()
+    result = response.json()
+
+    cache = get_metadata_cache()
+    cache.put(path, result)
+    cache.invalidate(V2_LISTING if USE_V3_API else V3_LISTING)
+    return result
+
+
+def glossary_entry_count(result):
+    """Entry count of a created glossary (v3 reports it per dictionary)"""
+    entry_count = result.get("entry_count")
+    if entry_count is None:
+        entry_count = sum(d["entry_count"] for d in result.get("dictionaries", []))
+    return entry_count
+
+
+def record_created_glossary(result):
+    """Record a glossary created from the local terms in the registry
+
+    Returns the term version of the (first) dictionary.
+    """
+    versions = [
+        get_registry().record_glossary(result["glossary_id"], GLOSSARY_NAME,
+                                       source_lang, target_lang, terms,
+                                       source_file=dictionary_source(source_lang, target_lang),
+                                       created_at=result.get("creation_time"),
+                                       api_version=3 if USE_V3_API else 2)
+        for (source_lang, target_lang), terms in glossary_dictionaries().items()
+    ]
+    return versions[0]
+
+
+def fetch_glossaries(refresh=False):
+    """Fetch all glossaries without printing them
+
+    The listing comes from the metadata cache unless it is stale or
+    refresh is True.
+    Raises requests.exceptions.HTTPError if the request fails.
+    """
+    def fetch():
+        response = get_api_client().get(V2_LISTING)
         response.raise_for_status()
+        return response.json().get("glossaries", [])
+
+    return get_metadata_cache().listing(V2_LISTING, fetch, refresh)
+
+
+def delete_remote_glossary(glossary_id):
+    """DELETE a glossary and drop it from the cached listings on success"""
+    response = get_api_client().delete(f"/v2/glossaries/{glossary_id}")
+    if response.status_code == 204:
+        get_metadata_cache().remove(glossary_id)
+        get_registry().mark_deleted(glossary_id)
+    return response
 
-        glossaries = response.json().get("glossaries", [])
+
+def list_glossaries(refresh=False, offline=False):
+    """List all created glossaries (refresh=True bypasses the cache)
+
+    offline=True lists the glossaries recorded in the registry instead;
+    so does a connection failure.
+    """
+    try:
+        if offline:
+            glossaries = get_registry().glossaries()
+            print(f"\n🗄️  From the local registry {REGISTRY_PATH} (no API call)")
+        else:
+            try:
+                glossaries = fetch_glossaries(refresh)
+            except OSError as e:
+                # requests' ConnectionError and Timeout are OSErrors
+                print(f"\n⚠️  API unreachable ({e}), showing the local registry instead")
+                glossaries = get_registry().glossaries()
+
+            age = get_metadata_cache().age(V2_LISTING)
+            if age is not None and age >= 1:
+                print(f"\n🕒 Listing cached {age:.0f}s ago (option 2 refreshes it)")
 
         if not glossaries:
             print("\n📋 No glossaries found")
             return glossaries
 
+        try:
+            key = api_key()
+        except config.ConfigError:
+            key = None
+
         print(f"\n📋 Existing Glossaries ({len(glossaries)}):")
         print("=" * 60)
         for i, g in enumerate(glossaries, 1):
-            print(f"\n[{i}] Name: {g['name']}")
+            # Records imported from legacy files have no name or languages
+            print(f"\n[{i}] Name: {g['name'] or '(unknown)'}")
             print(f"    ID: {g['glossary_id']}")
-            print(f"    Languages: {g['source_lang']} → {g['target_lang']}")
+            print(f"    Languages: {g['source_lang'] or '?'} → {g['target_lang'] or '?'}")
             print(f"    Entries: {g['entry_count']}")
             print(f"    Created: {g['creation_time']}")
-            print(f"\n    Plugin Key: {API_KEY}#{g['glossary_id']}")
+            if g.get("version"):
+                print(f"    Version: {g['version']} (from {g['source_file']})")
+            if key:
+                print(f"\n    Plugin Key: {key}#{g['glossary_id']}")
             print("-" * 60)
 
         return glossaries
@@ -193,48 +380,84 @@ def list_glossaries():
         return []
 
 
-def get_glossary_entries(glossary_id):
-    """Get detailed contents of a glossary"""
-    url = f"{API_BASE_URL}/v2/glossaries/{glossary_id}/entries"
-    headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
-
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+def get_glossary_entries(glossary_id, offline=False, quiet=False):
+    """Show the contents of a glossary, streamed entry by entry
 
-        # DeepL returns TSV format
-        tsv_content = response.text
+    The first VIEW_PRINT_LIMIT entries are printed, followed by the entry
+    count and TSV size. quiet=True prints only the summary, and adds the
+    entries hash compared with the registry record. offline=True shows
+    the term snapshot recorded in the registry instead of calling the API.
 
-        print(f"\n📖 Glossary Contents:")
-        print("=" * 60)
-
-        entries = []
-        for line in tsv_content.strip().split('\n'):
-            if '\t' in line:
-                source, target = line.split('\t', 1)
-                entries.append((source, target))
-                print(f"{source} → {target}")
+    Returns:
+        int: The number of entries, or None if they could not be read
+    """
+    try:
+        if offline:
+            entries = get_registry().entries(glossary_id)
+            if entries is None:
+                print(f"\n❌ No term snapshot of {glossary_id} in {REGISTRY_PATH}")
+                return None
+            print(f"\n🗄️  From the local registry {REGISTRY_PATH} (no API call)")
+        else:
+            entries = iter_remote_entries(glossary_id)
+
+        count = 0
+        size = 0
+
+        def shown():
+            nonlocal count, size
+            for source, target in entries:
+                if not quiet and count < VIEW_PRINT_LIMIT:
+                    print(f"{source} → {target}")
+                count += 1
+                size += len(source.encode("utf-8")) + len(target.encode("utf-8")) + 2
+                yield source, target
+
+        if not quiet:
+            print(f"\n📖 Glossary Contents:")
+            print("=" * 60)
+            for _ in shown():
+                pass
+            if count > VIEW_PRINT_LIMIT:
+                print(f"... and {count - VIEW_PRINT_LIMIT} more (view --quiet shows a summary)")
+            print("=" * 60)
+            print(f"Total: {count} terms, {size:,} bytes as TSV")
+            return count
+
+        # The hash needs source order: sorted in memory, or on disk in runs
+        # for glossaries over SORT_CHUNK_ENTRIES entries
+        hashed = SortedHash(external_sort(shown()))
+        for _ in hashed:
+            pass
 
         print("=" * 60)
-        print(f"Total: {len(entries)} terms")
-
-        return entries
+        print(f"Total: {count} terms, {size:,} bytes as TSV")
+        content_hash = hashed.hexdigest()
+        recorded = None if offline else get_registry().entries_hash(glossary_id)
+        if recorded is None:
+            print(f"🔑 Entries hash: {content_hash[:16]}")
+        elif recorded == content_hash:
+            print(f"🔑 Entries hash: {content_hash[:16]} (matches the registry)")
+        else:
+            print(f"🔑 Entries hash: {content_hash[:16]} "
+                  f"(registry recorded {recorded[:16]}: changed outside this tool?)")
+        return count
 
     except Exception as e:
         print(f"\n❌ Error: {e}")
-        return []
+        return None
 
 
 def delete_glossary(glossary_id):
     """Delete a specific glossary"""
-    url = f"{API_BASE_URL}/v2/glossaries/{glossary_id}"
-    headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
-
     try:
-        # Get glossary info first
-        info_response = requests.get(url, headers=headers)
-        if info_response.status_code == 200:
-            info = info_response.json()
+        # Get glossary info first, from the cached listing if possible
+        info = get_metadata_cache().get(V2_LISTING, glossary_id)
+        if info is None:
+            info_response = get_api_client().get(f"/v2/glossaries/{glossary_id}")
+            if info_response.status_code == 200:
+                info = info_response.json()
+        if info is not None:
             print(f"\n⚠️  About to delete glossary:")
             print(f"Name: {info['name']}")
             print(f"ID: {info['glossary_id']}")
@@ -247,7 +470,7 @@ def delete_glossary(glossary_id):
                 return False
 
         # Execute deletion
-        response = requests.delete(url, headers=headers)
+        response = delete_remote_glossary(glossary_id)
 
         if response.status_code == 204:
             print("\n✅ Glossary deleted successfully!")
@@ -276,30 +499,128 @@ def delete_all_glossaries():
         print("❌ Deletion cancelled")
         return
 
-    success_count = 0
-    for g in glossaries:
-        url = f"{API_BASE_URL}/v2/glossaries/{g['glossary_id']}"
-        headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
+    run_bulk_operation("delete", glossaries)
+
+
+def run_bulk_operation(action_name, glossaries):
+    """Run a bulk action over glossaries and print per-item results"""
+    client = get_api_client()
+    mode = "adaptive, up to" if client.limiter is not None else "fixed,"
+    print(f"\n🚀 Running bulk {action_name} on {len(glossaries)} glossaries "
+          f"({mode} {BULK_WORKERS} workers)...")
+    action = bulk_ops.ACTIONS[action_name](client)
+
+    start = time.perf_counter()
+    results = bulk_ops.run_bulk(glossaries, action,
+                                workers=BULK_WORKERS,
+                                on_result=bulk_ops.print_bulk_result)
+    bulk_ops.print_bulk_summary(results, action_name, time.perf_counter() - start)
+
+    cache = get_metadata_cache()
+    registry = get_registry()
+    if action_name in ("delete", "recreate"):
+        for result in results:
+            if result["ok"]:
+                cache.remove(result["glossary_id"])
+    if action_name == "recreate":
+        cache.invalidate()
+
+    # Keep the registry in step: fetched entries become snapshots
+    for glossary, result in zip(glossaries, results):
+        if not result["ok"]:
+            continue
+        if action_name == "delete":
+            registry.mark_deleted(result["glossary_id"])
+        elif action_name == "recreate":
+            registry.copy_glossary(result["glossary_id"], result["value"])
+        elif action_name == "fetch":
+            registry.record_glossary(glossary["glossary_id"], glossary["name"],
+                                     glossary["source_lang"], glossary["target_lang"],
+                                     result["value"], source_file="DeepL API",
+                                     created_at=glossary["creation_time"])
+    if client.limiter is not None:
+        print_concurrency(client.limiter)
+    return results
+
+
+def print_concurrency(limiter):
+    """Print the adaptive limiter's state after a concurrent run"""
+    s = limiter.snapshot()
+    print(f"🎚️  Concurrency: limit {s['limit']}, peak {s['peak_in_flight']} in flight, "
+          f"{s['throttled']} throttled, {s['decreases']} cut(s), "
+          f"{s['throughput']:.1f} req/s")
+
+
+def bulk_glossaries(action_name, name_pattern=None, source_lang=None,
+                    target_lang=None, older_than_days=None, assume_yes=False):
+    """Select glossaries by name/language/age and delete, fetch or recreate them"""
+    try:
+        glossaries = fetch_glossaries()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return []
+
+    selected = bulk_ops.select_glossaries(glossaries, name_pattern, source_lang,
+                                          target_lang, older_than_days)
+    print(f"\n📋 Selected {len(selected)} of {len(glossaries)} glossaries")
+    for g in selected[:10]:
+        print(f"  - {g['name']} ({g['glossary_id']}) {g['source_lang']} → {g['target_lang']}, "
+              f"created {g['creation_time']}")
+    if len(selected) > 10:
+        print(f"  ... and {len(selected) - 10} more")
+
+    if not selected:
+        return []
+
+    if action_name != "fetch" and not assume_yes:
+        confirm = input(f"\n⚠️  Confirm {action_name} of {len(selected)} glossaries? (yes/no): ").strip().lower()
+        if confirm != 'yes':
+            print("❌ Operation cancelled")
+            return []
+
+    return run_bulk_operation(action_name, selected)
+
+
+def bulk_menu():
+    """Interactive prompts for bulk operations"""
+    action_name = input("\nAction (delete/fetch/recreate): ").strip().lower()
+    if action_name not in bulk_ops.ACTIONS:
+        print("❌ Invalid action")
+        return
 
+    name_pattern = input("Name pattern, e.g. Old_* (Enter for any): ").strip() or None
+    source_lang = input("Source language (Enter for any): ").strip() or None
+    target_lang = input("Target language (Enter for any): ").strip() or None
+    older_than = input("Only older than N days (Enter for any age): ").strip()
+    older_than_days = None
+    if older_than:
         try:
-            response = requests.delete(url, headers=headers)
-            if response.status_code == 204:
-                print(f"✅ Deleted: {g['name']} ({g['glossary_id']})")
-                success_count += 1
-            else:
-                print(f"❌ Failed to delete: {g['name']}")
-        except Exception as e:
-            print(f"❌ Error deleting {g['name']}: {e}")
+            older_than_days = float(older_than)
+        except ValueError:
+            older_than_days = -1
+        if older_than_days < 0:
+            print("❌ Invalid number of days")
+            return
 
-    print(f"\n✅ Successfully deleted {success_count}/{len(glossaries)} glossaries")
+    bulk_glossaries(action_name, name_pattern, source_lang, target_lang, older_than_days)
 
 
-def update_glossary():
+def update_glossary(offline=False):
     """Update glossary (delete old and create new)
 
     Note: DeepL Free API only allows 1 glossary
     To modify terms, you must delete the old one and create a new one
+    With USE_V3_API, changed dictionaries are updated in place instead
+    offline=True only shows what would change, using the registry
     """
+    if offline:
+        preview_update_offline()
+        return
+
+    if USE_V3_API:
+        update_glossary_v3()
+        return
+
     print("\n" + "=" * 60)
     print("⚠️  DeepL Free API Limitation")
     print("=" * 60)
@@ -323,13 +644,18 @@ def update_glossary():
         print(f"\n⚠️  Warning: Detected {len(glossaries)} glossaries")
         print("This shouldn't happen with Free API")
 
-    # Show current terms
-    print("\n📖 Current glossary contents:")
-    current_entries = get_glossary_entries(glossaries[0]['glossary_id'])
+    # Show what changes, from the registry snapshot when there is one
+    recorded = get_registry().entries(glossaries[0]['glossary_id'])
+    if recorded is not None:
+        print(f"\n🗄️  Current contents from the local registry ({len(recorded)} terms)")
+        print_entries_diff(diff_entries(recorded, TERMS))
+    else:
+        print("\n📖 Current glossary contents:")
+        get_glossary_entries(glossaries[0]['glossary_id'])
 
     print(f"\n📝 Will replace with new terms:")
     print("-" * 60)
-    for i, (en, zh) in enumerate(list(TERMS.items())[:5], 1):
+    for i, (en, zh) in enumerate(islice(TERMS.items(), 5), 1):
         print(f"{i}. {en} → {zh}")
     if len(TERMS) > 5:
         print(f"... and {len(TERMS) - 5} more terms")
@@ -343,13 +669,14 @@ def update_glossary():
         print("❌ Update cancelled")
         return
 
+    if BLUE_GREEN_UPDATE:
+        replace_glossary_blue_green(glossaries[0]['glossary_id'])
+        return
+
     # Delete old glossary
     print("\n🗑️  Deleting old glossary...")
-    url = f"{API_BASE_URL}/v2/glossaries/{glossaries[0]['glossary_id']}"
-    headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
-
     try:
-        response = requests.delete(url, headers=headers)
+        response = delete_remote_glossary(glossaries[0]['glossary_id'])
         if response.status_code == 204:
             print("✅ Old glossary deleted")
         else:
@@ -364,12 +691,842 @@ def update_glossary():
     create_glossary()
 
 
+def preview_update_offline():
+    """Show how TERMS differs from the recorded live glossary, without the API"""
+    registry = get_registry()
+    current = [g for g in registry.glossaries()
+               if g["name"] == GLOSSARY_NAME
+               and g["source_lang"] == SOURCE_LANG.lower()
+               and g["target_lang"] == TARGET_LANG.lower()]
+    if not current:
+        print(f"\n📭 No live {GLOSSARY_NAME} ({SOURCE_LANG} → {TARGET_LANG}) in {REGISTRY_PATH}; "
+              f"an update would create it with {len(TERMS)} terms")
+        return
+
+    glossary = current[-1]
+    recorded = registry.entries(glossary["glossary_id"])
+    print(f"\n🗄️  {glossary['glossary_id']} (version {glossary['version']}) "
+          f"from the local registry {REGISTRY_PATH}")
+    if recorded is None:
+        print("⚠️  No term snapshot recorded for it; run without --offline to compare")
+        return
+    diff = diff_entries(recorded, TERMS)
+    if not any(diff.values()):
+        print("✅ Local terms match the recorded glossary, nothing to update")
+        return
+    print_entries_diff(diff)
+    print("\n💡 Run without --offline to apply the update")
+
+
+def verify_glossary(glossary_id, result):
+    """Check that a created glossary holds exactly TERMS
+
+    Compares the reported entry count and the hash of the entries
+    downloaded back from the API with the local terms.
+    """
+    entry_count = glossary_entry_count(result)
+    if entry_count != len(TERMS):
+        print(f"❌ Entry count mismatch: expected {len(TERMS)}, got {entry_count}")
+        return False
+
+    remote_hash = entries_hash(iter_remote_entries(glossary_id))
+    if remote_hash != entries_hash(TERMS):
+        print(f"❌ Entries hash mismatch: the glossary does not match local terms")
+        return False
+
+    return True
+
+
+def discard_glossary(glossary_id):
+    """Delete a glossary without confirmation, reporting whether it worked"""
+    try:
+        return delete_remote_glossary(glossary_id).status_code == 204
+    except Exception as e:
+        print(f"❌ Error deleting {glossary_id}: {e}")
+        return False
+
+
+def replace_glossary_blue_green(old_glossary_id):
+    """Replace a glossary with zero downtime
+
+    The new glossary is created next to the old one and verified, the saved
+    plugin key and hash record are switched to it, and only then is the old
+    glossary deleted. If anything fails before the switch, the new glossary
+    is deleted and the old one stays live.
+
+    Returns:
+        str: The new glossary ID, or None if the old glossary was kept
+    """
+    import requests
+
+    print("\n🟢 Creating new glossary alongside the current one...")
+    try:
+        result = post_glossary()
+    except requests.exceptions.HTTPError as e:
+        print(f"❌ Creation failed: {e}")
+        print(f"Response: {e.response.text}")
+        print(f"✅ Old glossary {old_glossary_id} is still live")
+        return None
+    except Exception as e:
+        print(f"❌ Creation failed: {e}")
+        print(f"✅ Old glossary {old_glossary_id} is still live")
+        return None
+
+    new_glossary_id = result["glossary_id"]
+    print(f"✅ Created {new_glossary_id}, verifying...")
+
+    try:
+        verified = verify_glossary(new_glossary_id, result)
+        if verified:
+            version = record_created_glossary(result)
+    except Exception as e:
+        print(f"❌ Verification failed: {e}")
+        verified = False
+
+    if not verified:
+        print(f"\n↩️  Rolling back: deleting new glossary {new_glossary_id}")
+        if not discard_glossary(new_glossary_id):
+            print(f"⚠️  Could not delete {new_glossary_id}, please delete it manually")
+        print(f"✅ Old glossary {old_glossary_id} is still live")
+        return None
+
+    print(f"✅ Verified and switched, recorded as version {version} in: {REGISTRY_PATH}")
+
+    print(f"\n🔵 Deleting old glossary {old_glossary_id}...")
+    if discard_glossary(old_glossary_id):
+        print("✅ Old glossary deleted")
+    else:
+        print(f"⚠️  Could not delete old glossary {old_glossary_id}, please delete it manually")
+
+    plugin_secret = f"{api_key()}#{new_glossary_id}"
+    print(f"\n📋 Copy this complete key to your Zotero plugin settings:")
+    print("-" * 60)
+    print(plugin_secret)
+    print("-" * 60)
+    return new_glossary_id
+
+
+def iter_remote_entries(glossary_id):
+    """Stream (source, target) pairs of a glossary without buffering the TSV"""
+    response = get_api_client().get(
+        f"/v2/glossaries/{glossary_id}/entries",
+        headers={"Accept": "text/tab-separated-values"},
+        stream=True,
+    )
+    with response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        # Not iter_lines(): it would also split terms at Unicode line
+        # separators such as U+2028 and U+0085
+        yield from iter_tsv_chunks(response.iter_content(chunk_size=TSV_CHUNK_SIZE,
+                                                         decode_unicode=True))
+
+
+def diff_entries(remote_entries, terms):
+    """Compare streamed remote entries with local terms
+
+    Returns:
+        dict: "added" (local only), "removed" (remote only) and "changed"
+        (source -> (remote target, local target)) entries
+    """
+    removed = {}
+    changed = {}
+    seen = set()
+    for source, target in remote_entries:
+        seen.add(source)
+        if source not in terms:
+            removed[source] = target
+        elif terms[source] != target:
+            changed[source] = (target, terms[source])
+
+    added = {source: target for source, target in terms.items() if source not in seen}
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def print_entries_diff(diff):
+    """Print an added/removed/changed diff"""
+    print(f"\n📝 Differences: {len(diff['added'])} added, "
+          f"{len(diff['removed'])} removed, {len(diff['changed'])} changed")
+    print("-" * 60)
+    for source, target in diff["added"].items():
+        print(f"+ {source} → {target}")
+    for source, target in diff["removed"].items():
+        print(f"- {source} → {target}")
+    for source, (old, new) in diff["changed"].items():
+        print(f"~ {source}: {old} → {new}")
+    print("-" * 60)
+
+
+def sync_glossary(assume_yes=False):
+    """Bring the remote glossary in line with TERMS, skipping no-op updates
+
+    The canonical TSV hash of TERMS is compared with the hash recorded when
+    the glossary was created. If there is no record, remote entries are
+    streamed and compared instead. Network writes only happen when the
+    terms actually changed.
+
+    Returns:
+        bool: True if the glossary is up to date afterwards
+    """
+    if USE_V3_API:
+        return update_glossary_v3(assume_yes)
+
+    local_hash = entries_hash(TERMS)
+
+    try:
+        glossaries = fetch_glossaries()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return False
+
+    current = next((g for g in glossaries
+                    if g['name'] == GLOSSARY_NAME
+                    and g['source_lang'] == SOURCE_LANG
+                    and g['target_lang'] == TARGET_LANG), None)
+
+    if current is None:
+        print(f"\n📭 No glossary named {GLOSSARY_NAME} ({SOURCE_LANG} → {TARGET_LANG}), creating it")
+        return create_glossary() is not None
+
+    glossary_id = current['glossary_id']
+    recorded = get_registry().entries_hash(glossary_id, SOURCE_LANG, TARGET_LANG)
+
+    if recorded == local_hash:
+        print(f"\n✅ Glossary {glossary_id} is up to date (hash match), nothing to do")
+        return True
+
+    print(f"\n🔍 Comparing remote entries of {glossary_id} with local terms...")
+    try:
+        diff = diff_entries(iter_remote_entries(glossary_id), TERMS)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return False
+
+    if not any(diff.values()):
+        get_registry().record_glossary(glossary_id, GLOSSARY_NAME, SOURCE_LANG, TARGET_LANG,
+                                       TERMS, source_file=TERMS_SOURCE,
+                                       created_at=current['creation_time'])
+        print(f"✅ Glossary {glossary_id} is up to date, recorded it in the registry")
+        return True
+
+    print_entries_diff(diff)
+
+    if not assume_yes:
+        confirm = input("\n⚠️  Replace remote glossary with local terms? (yes/no): ").strip().lower()
+        if confirm != 'yes':
+            print("❌ Sync cancelled")
+            return False
+
+    if BLUE_GREEN_UPDATE:
+        return replace_glossary_blue_green(glossary_id) is not None
+
+    print("\n🗑️  Deleting old glossary...")
+    try:
+        response = delete_remote_glossary(glossary_id)
+    except Exception as e:
+        print(f"❌ Deletion failed: {e}")
+        return False
+    if response.status_code != 204:
+        print(f"❌ Deletion failed: {response.status_code}")
+        return False
+    print("✅ Old glossary deleted")
+
+    print("\n🚀 Creating new glossary...")
+    return create_glossary() is not None
+
+
+def diff_remote_glossary(glossary_id=None, output=None, fmt="tsv"):
+    """Compare a remote glossary with TERMS without holding either in memory
+
+    Remote entries are streamed and sorted on disk if needed, TERMS is
+    read in source order, and the two are merged in one pass. Every
+    difference goes to output (TSV or JSON, see entry_diff.write_diff);
+    without output the first DIFF_PRINT_LIMIT are printed.
+
+    Returns:
+        bool: True if the glossary matches TERMS
+    """
+    if glossary_id is None:
+        try:
+            glossaries = fetch_glossaries()
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            return False
+        current = next((g for g in glossaries
+                        if g['name'] == GLOSSARY_NAME
+                        and g['source_lang'] == SOURCE_LANG
+                        and g['target_lang'] == TARGET_LANG), None)
+        if current is None:
+            print(f"\n📭 No glossary named {GLOSSARY_NAME} ({SOURCE_LANG} → {TARGET_LANG})")
+            return False
+        glossary_id = current['glossary_id']
+
+    print(f"\n🔍 Comparing remote entries of {glossary_id} with {len(TERMS)} local terms...")
+    remote = SortedHash(external_sort(iter_remote_entries(glossary_id)))
+    changes = merge_diff(remote, sorted_entries(TERMS))
+    try:
+        if output:
+            with open(output, "w", encoding="utf-8", newline="\n") as f:
+                counts = write_diff(changes, f, fmt)
+        else:
+            counts = print_sorted_diff(changes)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return False
+
+    print(f"\n📝 Differences: {counts['added']} added, "
+          f"{counts['removed']} removed, {counts['changed']} changed "
+          f"({remote.count} remote entries, hash {remote.hexdigest()[:16]})")
+    if output:
+        print(f"💾 Full diff written to: {output}")
+    return not any(counts.values())
+
+
+def print_sorted_diff(changes):
+    """Print the first DIFF_PRINT_LIMIT changes from merge_diff; returns the counts"""
+    counts = {"added": 0, "removed": 0, "changed": 0}
+    markers = {"added": "+", "removed": "-", "changed": "~"}
+    print("-" * 60)
+    for change, source, remote_target, local_target in changes:
+        if sum(counts.values()) < DIFF_PRINT_LIMIT:
+            if change == "changed":
+                print(f"~ {source}: {remote_target} → {local_target}")
+            else:
+                print(f"{markers[change]} {source} → {remote_target or local_target}")
+        counts[change] += 1
+    total = sum(counts.values())
+    if total > DIFF_PRINT_LIMIT:
+        print(f"... and {total - DIFF_PRINT_LIMIT} more (use --output FILE for all of them)")
+    print("-" * 60)
+    return counts
+
+
+# ==================== v3 Multilingual Glossaries ====================
+
+_extra_dictionaries = None
+
+
+def load_extra_dictionaries():
+    """Load and validate the term files of EXTRA_DICTIONARIES once
+
+    Raises ValueError if the files of a language pair are invalid.
+    """
+    global _extra_dictionaries
+    if _extra_dictionaries is None:
+        dictionaries = {}
+        for (source_lang, target_lang), patterns in EXTRA_DICTIONARIES.items():
+            if isinstance(patterns, str):
+                patterns = [patterns]
+            print(f"\n📂 Loading {source_lang} → {target_lang} terms from: {', '.join(patterns)}")
+            terms, validator = term_loader.load_terms(patterns)
+            term_loader.print_validation_report(validator)
+            if not validator.ok:
+                raise ValueError(f"invalid term files for {source_lang} → {target_lang}")
+            dictionaries[(source_lang, target_lang)] = terms
+        _extra_dictionaries = dictionaries
+    return _extra_dictionaries
+
+
+def glossary_dictionaries():
+    """Local dictionaries of the glossary: {(source_lang, target_lang): terms}
+
+    With USE_V3_API this includes EXTRA_DICTIONARIES (see
+    load_extra_dictionaries for errors); v2 glossaries hold one pair.
+    """
+    dictionaries = {(SOURCE_LANG, TARGET_LANG): TERMS}
+    if USE_V3_API:
+        for pair, terms in load_extra_dictionaries().items():
+            dictionaries.setdefault(pair, terms)
+    return dictionaries
+
+
+def dictionary_source(source_lang, target_lang):
+    """Where the terms of a language pair came from, for the registry"""
+    patterns = EXTRA_DICTIONARIES.get((source_lang, target_lang))
+    if (source_lang, target_lang) == (SOURCE_LANG, TARGET_LANG) or patterns is None:
+        return TERMS_SOURCE
+    return patterns if isinstance(patterns, str) else ", ".join(patterns)
+
+
+def dictionary_payload(source_lang, target_lang, terms):
+    """Build a v3 dictionary object from terms"""
+    return {
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "entries": canonical_tsv(terms),
+        "entries_format": "tsv"
+    }
+
+
+def fetch_v3_glossaries(refresh=False):
+    """Fetch all v3 glossaries (with their dictionaries) without printing
+
+    Served from the metadata cache like fetch_glossaries.
+    Raises requests.exceptions.HTTPError if the request fails.
+    """
+    def fetch():
+        response = get_api_client().get(V3_LISTING)
+        response.raise_for_status()
+        return response.json().get("glossaries", [])
+
+    return get_metadata_cache().listing(V3_LISTING, fetch, refresh)
+
+
+def fetch_dictionary_entries(glossary_id, source_lang, target_lang):
+    """Fetch the (source, target) entries of one dictionary
+
+    Returns None if the glossary has no dictionary for this language pair.
+    """
+    response = get_api_client().get(
+        f"/v3/glossaries/{glossary_id}/entries",
+        params={"source_lang": source_lang, "target_lang": target_lang},
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+
+    dictionaries = response.json().get("dictionaries", [])
+    if not dictionaries:
+        return None
+
+    entries = []
+    for line in dictionaries[0]["entries"].split('\n'):
+        if '\t' in line:
+            source, target = line.split('\t', 1)
+            entries.append((source, target))
+    return entries
+
+
+def list_dictionaries(glossary_id):
+    """List the dictionaries (language pairs) of a v3 glossary"""
+    try:
+        response = get_api_client().get(f"/v3/glossaries/{glossary_id}")
+        response.raise_for_status()
+        glossary = response.json()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return []
+
+    dictionaries = glossary.get("dictionaries", [])
+    print(f"\n📚 Dictionaries of {glossary['name']} ({len(dictionaries)}):")
+    print("=" * 60)
+    for d in dictionaries:
+        print(f"{d['source_lang']} → {d['target_lang']}: {d['entry_count']} entries")
+    print("=" * 60)
+    return dictionaries
+
+
+def replace_dictionary(glossary_id, source_lang, target_lang, terms):
+    """Replace (or add) one dictionary of a v3 glossary in place"""
+    response = get_api_client().put(
+        f"/v3/glossaries/{glossary_id}/dictionaries",
+        json=dictionary_payload(source_lang, target_lang, terms),
+    )
+    response.raise_for_status()
+    # Entry counts in both listings are out of date now
+    get_metadata_cache().invalidate()
+    return response.json()
+
+
+def patch_dictionary(glossary_id, source_lang, target_lang, terms):
+    """Merge terms into one dictionary of a v3 glossary
+
+    Entries with an existing source term are overwritten; other entries
+    are kept, so this cannot remove terms (use replace_dictionary).
+    """
+    response = get_api_client().patch(
+        f"/v3/glossaries/{glossary_id}",
+        json={"dictionaries": [dictionary_payload(source_lang, target_lang, terms)]},
+    )
+    response.raise_for_status()
+    get_metadata_cache().invalidate()
+    return response.json()
+
+
+def update_glossary_v3(assume_yes=False):
+    """Update changed dictionaries of the v3 glossary without changing its ID
+
+    Unchanged dictionaries are skipped by hash. Dictionaries with only new
+    or changed terms are sent as a small PATCH of just those terms;
+    removals need a PUT of the whole dictionary.
+
+    Returns:
+        bool: True if the glossary is up to date afterwards
+    """
+    try:
+        glossaries = fetch_v3_glossaries()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return False
+
+    current = next((g for g in glossaries if g['name'] == GLOSSARY_NAME), None)
+    if current is None:
+        print(f"\n📭 No v3 glossary named {GLOSSARY_NAME}, creating it")
+        return create_glossary() is not None
+
+    glossary_id = current['glossary_id']
+    registry = get_registry()
+
+    def record(source_lang, target_lang, terms):
+        registry.record_glossary(glossary_id, GLOSSARY_NAME, source_lang, target_lang, terms,
+                                 source_file=dictionary_source(source_lang, target_lang),
+                                 created_at=current.get('creation_time'), api_version=3)
+
+    try:
+        dictionaries = glossary_dictionaries()
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Error: {e}")
+        return False
+
+    for d in current.get('dictionaries', []):
+        if (d['source_lang'], d['target_lang']) not in dictionaries:
+            print(f"ℹ️  {d['source_lang']} → {d['target_lang']}: not configured, left unchanged")
+
+    # Work out what changed in each dictionary
+    pending = []
+    for (source_lang, target_lang), terms in dictionaries.items():
+        local_hash = entries_hash(terms)
+        if registry.entries_hash(glossary_id, source_lang, target_lang) == local_hash:
+            print(f"✅ {source_lang} → {target_lang}: unchanged (hash match)")
+            continue
+
+        try:
+            remote_entries = fetch_dictionary_entries(glossary_id, source_lang, target_lang)
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            return False
+
+        diff = diff_entries(remote_entries or [], terms)
+        if not any(diff.values()):
+            record(source_lang, target_lang, terms)
+            print(f"✅ {source_lang} → {target_lang}: unchanged, recorded it in the registry")
+            continue
+
+        print(f"\n🌐 {source_lang} → {target_lang}")
+        print_entries_diff(diff)
+        pending.append((source_lang, target_lang, terms, diff, remote_entries is None))
+
+    if not pending:
+        print(f"\n✅ Glossary {glossary_id} is up to date, nothing to do")
+        return True
+
+    if not assume_yes:
+        confirm = input(f"\n⚠️  Update {len(pending)} dictionaries in place? (yes/no): ").strip().lower()
+        if confirm != 'yes':
+            print("❌ Update cancelled")
+            return False
+
+    for source_lang, target_lang, terms, diff, is_new in pending:
+        try:
+            if is_new or diff["removed"]:
+                print(f"\n🔄 Replacing dictionary {source_lang} → {target_lang}...")
+                replace_dictionary(glossary_id, source_lang, target_lang, terms)
+            else:
+                patch_terms = dict(diff["added"])
+                patch_terms.update({source: new for source, (old, new) in diff["changed"].items()})
+                print(f"\n🩹 Patching {len(patch_terms)} entries in {source_lang} → {target_lang}...")
+                patch_dictionary(glossary_id, source_lang, target_lang, patch_terms)
+        except Exception as e:
+            print(f"❌ Update failed: {e}")
+            return False
+
+        record(source_lang, target_lang, terms)
+
+    print(f"\n✅ Glossary updated in place, ID unchanged: {glossary_id}")
+    print(f"📋 Plugin key still valid: {api_key()}#{glossary_id}")
+    return True
+
+
+# ==================== Registry History ====================
+
+def show_history():
+    """Print the recorded term versions of GLOSSARY_NAME, without the API"""
+    versions = get_registry().versions(GLOSSARY_NAME, SOURCE_LANG, TARGET_LANG)
+    if not versions:
+        print(f"\n📭 No versions of {GLOSSARY_NAME} ({SOURCE_LANG} → {TARGET_LANG}) "
+              f"in {REGISTRY_PATH}")
+        return versions
+
+    print(f"\n🗂️  Versions of {GLOSSARY_NAME} ({SOURCE_LANG} → {TARGET_LANG}):")
+    print("=" * 60)
+    for v in versions:
+        live = f"  ← live: {', '.join(v['live_ids'])}" if v["live_ids"] else ""
+        print(f"v{v['version']}  {v['recorded_at']}  {v['entry_count']} terms  "
+              f"{v['entries_hash'][:12]}  from {v['source_file']}{live}")
+    print("=" * 60)
+    print("⏪ Restore one with: python glossary_manager.py rollback VERSION")
+    return versions
+
+
+def rollback_glossary(version, assume_yes=False):
+    """Bring the remote glossary back to a recorded term version
+
+    TERMS is replaced by the version's snapshot and the glossary is then
+    synced as usual (recreated, or updated in place with USE_V3_API).
+
+    Returns:
+        bool: True if the glossary holds that version afterwards
+    """
+    global TERMS, TERMS_SOURCE
+
+    entries = get_registry().version_entries(GLOSSARY_NAME, SOURCE_LANG, TARGET_LANG, version)
+    if entries is None:
+        print(f"\n❌ No version {version} of {GLOSSARY_NAME} ({SOURCE_LANG} → {TARGET_LANG}) "
+              f"in {REGISTRY_PATH}")
+        return False
+
+    print(f"\n⏪ Rolling back {GLOSSARY_NAME} to version {version} ({len(entries)} terms)")
+    TERMS = dict(entries)
+    TERMS_SOURCE = f"rollback to v{version}"
+    return sync_glossary(assume_yes)
+
+
+def use_term_files(patterns):
+    """Load TERMS from external term files, validating them in one pass
+
+    Returns:
+        bool: True if the files were valid and TERMS was replaced
+    """
+    global TERMS, TERMS_SOURCE
+
+    print(f"\n📂 Loading terms from: {', '.join(str(p) for p in patterns)}")
+    try:
+        terms, validator = term_loader.load_terms(patterns)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return False
+
+    term_loader.print_validation_report(validator)
+    if not validator.ok:
+        return False
+
+    TERMS = terms
+    TERMS_SOURCE = ", ".join(str(p) for p in patterns)
+    return True
+
+
+def diff_terms_file(path):
+    """Compare local TERMS with a term file, without calling the API
+
+    Entries only in TERMS are reported as added, entries only in the
+    file as removed. Returns True if they are identical.
+    """
+    validator = term_loader.TermValidator()
+    try:
+        diff = diff_entries(term_loader.iter_valid_entries([path], validator), TERMS)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return False
+
+    if not validator.ok:
+        term_loader.print_validation_report(validator)
+        return False
+
+    if not any(diff.values()):
+        print(f"\n✅ TERMS matches {path}")
+        return True
+
+    print_entries_diff(diff)
+    return False
+
+
+def run_command(args):
+    """Run a command-line subcommand; returns the exit code"""
+    global BULK_WORKERS
+
+    term_files = args.terms or TERM_FILES
+    if term_files and not use_term_files(term_files):
+        return 1
+
+    if args.command == "validate":
+        if not term_files:
+            validator = term_loader.TermValidator()
+            for source, target in TERMS.items():
+                validator.check(source, target, f"TERMS[{source!r}]")
+            term_loader.print_validation_report(validator)
+            return 0 if validator.ok else 1
+        return 0
+
+    if args.command == "diff-file":
+        return 0 if diff_terms_file(args.file) else 1
+
+    # Answered from the registry, without an API key
+    if args.command == "history":
+        return 0 if show_history() else 1
+    if getattr(args, "offline", False):
+        if args.command == "list":
+            list_glossaries(offline=True)
+            return 0
+        if args.command == "view":
+            count = get_glossary_entries(args.glossary_id, offline=True, quiet=args.quiet)
+            return 0 if count is not None else 1
+        if args.command == "update":
+            update_glossary(offline=True)
+            return 0
+
+    try:
+        api_key()
+    except config.ConfigError as e:
+        print("❌ Please set your DeepL API Key first!")
+        print(e)
+        return 1
+
+    if args.command == "sync":
+        return 0 if sync_glossary(assume_yes=args.yes) else 1
+    if args.command == "rollback":
+        return 0 if rollback_glossary(args.version, assume_yes=args.yes) else 1
+    if args.command == "list":
+        list_glossaries(refresh=True)
+        return 0
+    if args.command == "view":
+        return 0 if get_glossary_entries(args.glossary_id, quiet=args.quiet) is not None else 1
+    if args.command == "diff":
+        identical = diff_remote_glossary(args.glossary_id, args.output, args.format)
+        return 0 if identical else 1
+    if args.command == "update":
+        if USE_V3_API:
+            return 0 if update_glossary_v3(assume_yes=args.yes) else 1
+        return 0 if sync_glossary(assume_yes=args.yes) else 1
+    if args.command == "bulk":
+        BULK_WORKERS = args.workers
+        results = bulk_glossaries(args.action, args.name, args.source_lang,
+                                  args.target_lang, args.older_than, assume_yes=args.yes)
+        return 0 if all(r["ok"] for r in results) else 1
+    return 0
+
+
+# Command names used to group API metrics and profiles of menu options
+MENU_COMMANDS = {
+    "1": "create",
+    "2": "list",
+    "3": "view",
+    "4": "delete",
+    "5": "delete-all",
+    "6": "update",
+    "7": "sync",
+    "8": "dictionaries",
+    "9": "bulk",
+}
+
+
 def main():
     """Main function"""
+    global API_KEY, API_BASE_URL, ADAPTIVE_CONCURRENCY, METADATA_CACHE_TTL, REGISTRY_PATH
+
+    parser = argparse.ArgumentParser(
+        description="DeepL Glossary Manager (run without a command for the menu)")
+    parser.add_argument("--yes", "-y", action="store_true",
+                        help="Do not ask for confirmation")
+    parser.add_argument("--api-key", help="DeepL API key (default: $API_KEY or config file)")
+    parser.add_argument("--api-base-url", help="DeepL API endpoint (default: picked from the key)")
+    parser.add_argument("--config", metavar="FILE", help="JSON config file with api_key/api_base_url")
+    parser.add_argument("--terms", action="append", metavar="FILE",
+                        help="Load terms from TSV/CSV/JSON files or globs instead of TERMS "
+                             "(can be repeated)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Print per-command API metrics on exit")
+    parser.add_argument("--metrics-log", metavar="FILE",
+                        help="Append one JSON record per API request to FILE")
+    parser.add_argument("--prometheus", metavar="FILE",
+                        help="Write API metrics to a Prometheus textfile on exit")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="PREFIX",
+                        help="Profile the command (or each menu option) and write "
+                             "PREFIX-<command>.pstats/.collapsed/.memory.txt")
+    parser.add_argument("--cache-ttl", type=float, default=METADATA_CACHE_TTL, metavar="SECONDS",
+                        help="Reuse glossary listings for this long within a run; 0 always "
+                             f"fetches them (default: {METADATA_CACHE_TTL})")
+    parser.add_argument("--fixed-concurrency", action="store_true",
+                        help="Always use the full worker count instead of adapting it "
+                             "to 429s and latency")
+    parser.add_argument("--registry", metavar="FILE", default=REGISTRY_PATH,
+                        help=f"Glossary registry database (default: {REGISTRY_PATH})")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # --yes is also accepted after the command (sync --yes); SUPPRESS keeps
+    # a subcommand from resetting a --yes given before it
+    yes_parser = argparse.ArgumentParser(add_help=False)
+    yes_parser.add_argument("--yes", "-y", action="store_true", default=argparse.SUPPRESS,
+                            help="Do not ask for confirmation")
+    subparsers.add_parser("sync", parents=[yes_parser],
+                          help="Update the glossary only if TERMS changed")
+    offline_parser = argparse.ArgumentParser(add_help=False, parents=[yes_parser])
+    offline_parser.add_argument("--offline", action="store_true",
+                                help="Answer from the local glossary registry without "
+                                     "calling the API")
+    subparsers.add_parser("list", parents=[offline_parser],
+                          help="List glossaries (--offline: from the registry)")
+    view_parser = subparsers.add_parser(
+        "view", parents=[offline_parser],
+        help="Show the entries of a glossary (--offline: its recorded snapshot)")
+    view_parser.add_argument("glossary_id")
+    view_parser.add_argument("--quiet", "-q", action="store_true",
+                             help="Only print the summary (count, size, entries hash)")
+    diff_parser = subparsers.add_parser(
+        "diff", parents=[yes_parser],
+        help="Compare the remote glossary with the terms (sort-merge, bounded memory)")
+    diff_parser.add_argument("glossary_id", nargs="?",
+                             help=f"Glossary to compare (default: the one named {GLOSSARY_NAME})")
+    diff_parser.add_argument("--output", "-o", metavar="FILE",
+                             help="Write every difference to FILE")
+    diff_parser.add_argument("--format", choices=DIFF_FORMATS, default="tsv",
+                             help="Format of --output (default: tsv)")
+    subparsers.add_parser(
+        "update", parents=[offline_parser],
+        help="Update the glossary to TERMS (--offline: only show the changes)")
+    subparsers.add_parser("history", parents=[yes_parser],
+                          help="List the recorded term versions of the glossary")
+    rollback_parser = subparsers.add_parser(
+        "rollback", parents=[yes_parser],
+        help="Restore the glossary to a recorded term version")
+    rollback_parser.add_argument("version", type=int, help="Version number (see history)")
+    subparsers.add_parser("validate", parents=[yes_parser],
+                          help="Validate the terms without calling the API")
+    diff_file_parser = subparsers.add_parser(
+        "diff-file", parents=[yes_parser],
+        help="Compare the terms with a term file without calling the API")
+    diff_file_parser.add_argument("file", help="TSV/CSV/JSON term file")
+
+    bulk_parser = subparsers.add_parser(
+        "bulk", parents=[yes_parser],
+        help="Delete, fetch or recreate glossaries selected by filters")
+    bulk_parser.add_argument("action", choices=sorted(bulk_ops.ACTIONS))
+    bulk_parser.add_argument("--name", help="Glossary name pattern, e.g. 'Old_*'")
+    bulk_parser.add_argument("--source-lang", help="Only this source language")
+    bulk_parser.add_argument("--target-lang", help="Only this target language")
+    bulk_parser.add_argument("--older-than", type=float, metavar="DAYS",
+                             help="Only glossaries created more than DAYS ago")
+    bulk_parser.add_argument("--workers", type=int, default=BULK_WORKERS,
+                             help=f"Parallel workers; the upper bound of the adaptive "
+                                  f"concurrency (default: {BULK_WORKERS})")
+
+    args = parser.parse_args()
+
+    if args.config:
+        config.set_config_file(args.config)
+    API_KEY = args.api_key or API_KEY
+    API_BASE_URL = args.api_base_url or API_BASE_URL
+    if args.fixed_concurrency:
+        ADAPTIVE_CONCURRENCY = False
+    METADATA_CACHE_TTL = args.cache_ttl
+    REGISTRY_PATH = args.registry
+
+    instrumentation.setup(args.metrics_log, args.prometheus, args.metrics)
+    if args.command:
+        command = args.command if args.command != "bulk" else f"bulk-{args.action}"
+        instrumentation.set_command(command)
+        with profiling.profiled(args.profile, command):
+            exit_code = run_command(args)
+        sys.exit(exit_code)
+
+    term_files = args.terms or TERM_FILES
+    if term_files and not use_term_files(term_files):
+        sys.exit(1)
 
-    if API_KEY == "YOUR_DEEPL_API_KEY_HERE":
+    try:
+        api_key()
+    except config.ConfigError as e:
         print("❌ Please set your DeepL API Key first!")
-        print("Edit the API_KEY variable in this script")
+        print(e)
         sys.exit(1)
 
     while True:
@@ -384,35 +1541,50 @@ def main():
         print("4. Delete specific glossary")
         print("5. Delete all glossaries")
         print("6. Update glossary (recommended)")
+        print("7. Sync glossary (skips unchanged terms)")
+        print("8. List glossary dictionaries (v3)")
+        print("9. Bulk operations (filter by name/language/age)")
         print("0. Exit")
 
-        choice = input("\nEnter option (0-6): ").strip()
+        choice = input("\nEnter option (0-9): ").strip()
+        command = MENU_COMMANDS.get(choice)
+        instrumentation.set_command(command or "menu")
 
         if choice == "0":
             print("\n👋 Goodbye!")
             break
-        elif choice == "1":
-            create_glossary()
-        elif choice == "2":
-            list_glossaries()
-        elif choice == "3":
-            glossaries = list_glossaries()
-            if glossaries:
+
+        with profiling.profiled(args.profile if command else None, command):
+            if choice == "1":
+                create_glossary()
+            elif choice == "2":
+                list_glossaries(refresh=True)
+            elif choice == "3":
+                glossaries = list_glossaries()
+                if glossaries:
+                    glossary_id = input("\nEnter glossary ID (or press Enter to return): ").strip()
+                    if glossary_id:
+                        get_glossary_entries(glossary_id)
+            elif choice == "4":
+                glossaries = list_glossaries()
+                if glossaries:
+                    glossary_id = input("\nEnter glossary ID to delete (or press Enter to return): ").strip()
+                    if glossary_id:
+                        delete_glossary(glossary_id)
+            elif choice == "5":
+                delete_all_glossaries()
+            elif choice == "6":
+                update_glossary()
+            elif choice == "7":
+                sync_glossary()
+            elif choice == "8":
                 glossary_id = input("\nEnter glossary ID (or press Enter to return): ").strip()
                 if glossary_id:
-                    get_glossary_entries(glossary_id)
-        elif choice == "4":
-            glossaries = list_glossaries()
-            if glossaries:
-                glossary_id = input("\nEnter glossary ID to delete (or press Enter to return): ").strip()
-                if glossary_id:
-                    delete_glossary(glossary_id)
-        elif choice == "5":
-            delete_all_glossaries()
-        elif choice == "6":
-            update_glossary()
-        else:
-            print("❌ Invalid option, please try again")
+                    list_dictionaries(glossary_id)
+            elif choice == "9":
+                bulk_menu()
+            else:
+                print("❌ Invalid option, please try again")
 
         input("\nPress Enter to continue...")
 
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Glossary Registry
+A local SQLite record of every glossary this tool created or saw, with
+a snapshot of the terms of each version, so glossaries can be listed,
+viewed and compared without the API and rolled back to earlier terms.
+
+    glossaries  one row per glossary and language pair (v3 glossaries have
+                one per dictionary): ID, name, entry count, entries hash,
+                source file, creation and deletion time
+    versions    numbered term versions per glossary name and language pair;
+                a version is added whenever new content is recorded, and
+                content seen before keeps its old number
+    snapshots   the canonical TSV of each distinct content, compressed and
+                stored once however many glossaries or versions use it
+
+Writes take an exclusive lock on a file next to the database (fcntl, or
+msvcrt on Windows) and run in one IMMEDIATE transaction, so several
+processes can record glossaries at the same time.
+
+Usage:
+    registry = GlossaryRegistry()
+    registry.record_glossary(glossary_id, "Terms", "en", "zh", terms)
+    registry.glossaries()                    # like GET /v2/glossaries
+    registry.entries(glossary_id)            # [(source, target), ...]
+    registry.version_entries("Terms", "en", "zh", 2)
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import os
+import re
+import sqlite3
+import zlib
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from terms import canonical_tsv, entries_hash, parse_tsv
+
+# Default registry file (created in the working directory)
+DEFAULT_REGISTRY_PATH = "deepl_glossary_registry.sqlite3"
+
+# Seconds to wait for another process holding the database
+LOCK_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS glossaries (
+    glossary_id TEXT NOT NULL,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    name TEXT,
+    entries_hash TEXT,
+    entry_count INTEGER,
+    source_file TEXT,
+    api_version INTEGER NOT NULL DEFAULT 2,
+    created_at TEXT,
+    recorded_at TEXT NOT NULL,
+    deleted_at TEXT,
+    PRIMARY KEY (glossary_id, source_lang, target_lang)
+);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT NOT NULL,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    entries_hash TEXT NOT NULL,
+    source_file TEXT,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (name, source_lang, target_lang, version),
+    UNIQUE (name, source_lang, target_lang, entries_hash)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    entries_hash TEXT PRIMARY KEY,
+    entry_count INTEGER NOT NULL,
+    tsv BLOB NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class GlossaryRegistry:
+    """SQLite registry of glossaries and versioned term snapshots"""
+
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        self.path = path
+        # Transactions are managed explicitly in _write()
+        self._conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # executescript() commits on its own, so it runs under the lock only
+        with self._write(transaction=False):
+            self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @contextmanager
+    def _write(self, transaction=True):
+        """Exclusive file lock plus one IMMEDIATE transaction"""
+        with open(f"{self.path}.lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                if not transaction:
+                    yield
+                    return
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    # ==================== Recording ====================
+
+    def record_glossary(self, glossary_id, name, source_lang, target_lang, terms=None,
+                        content_hash=None, entry_count=None, source_file=None,
+                        created_at=None, api_version=2):
+        """Record a glossary (or one v3 dictionary) and the terms it holds
+
+        terms is a dict or (source, target) pairs; without them only
+        content_hash and entry_count are stored and no version is added.
+        Returns the version number of the content, or None.
+        """
+        source_lang, target_lang = source_lang.lower(), target_lang.lower()
+        tsv = None
+        if terms is not None:
+            if isinstance(terms, Mapping):
+                terms = terms.items()
+            entries = sorted(terms)
+            tsv = canonical_tsv(entries)
+            content_hash = entries_hash(entries)
+            entry_count = len(entries)
+
+        with self._write():
+            version = None
+            if tsv is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO snapshots (entries_hash, entry_count, tsv)"
+                    " VALUES (?, ?, ?)",
+                    (content_hash, entry_count, zlib.compress(tsv.encode("utf-8"))))
+                if name:
+                    version = self._add_version(name, source_lang, target_lang,
+                                                content_hash, source_file)
+
+            # Rows imported from legacy files without a language pair
+            self._conn.execute("DELETE FROM glossaries WHERE glossary_id = ? AND source_lang = ''"
+                               " AND ? != ''", (glossary_id, source_lang))
+            row = self._conn.execute(
+                "SELECT created_at FROM glossaries"
+                " WHERE glossary_id = ? AND source_lang = ? AND target_lang = ?",
+                (glossary_id, source_lang, target_lang)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO glossaries (glossary_id, source_lang, target_lang,"
+                " name, entries_hash, entry_count, source_file, api_version, created_at,"
+                " recorded_at, deleted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                (glossary_id, source_lang, target_lang, name, content_hash, entry_count,
+                 source_file, api_version, created_at or (row and row["created_at"]) or _now(),
+                 _now()))
+        return version
+
+    def _add_version(self, name, source_lang, target_lang, content_hash, source_file):
+        row = self._conn.execute(
+            "SELECT version FROM versions WHERE name = ? AND source_lang = ?"
+            " AND target_lang = ? AND entries_hash = ?",
+            (name, source_lang, target_lang, content_hash)).fetchone()
+        if row:
+            return row["version"]
+        version = self._conn.execute(
+            "SELECT COALESCE(MAX(version), 0) + 1 FROM versions"
+            " WHERE name = ? AND source_lang = ? AND target_lang = ?",
+            (name, source_lang, target_lang)).fetchone()[0]
+        self._conn.execute(
+            "INSERT INTO versions (name, source_lang, target_lang, version, entries_hash,"
+            " source_file, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (name, source_lang, target_lang, version, content_hash, source_file, _now()))
+        return version
+
+    def copy_glossary(self, glossary_id, new_glossary_id, created_at=None):
+        """Record a recreated copy of a glossary and mark the original deleted"""
+        with self._write():
+            rows = self._conn.execute(
+                "SELECT * FROM glossaries WHERE glossary_id = ?", (glossary_id,)).fetchall()
+            for row in rows:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO glossaries (glossary_id, source_lang, target_lang,"
+                    " name, entries_hash, entry_count, source_file, api_version, created_at,"
+                    " recorded_at, deleted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                    (new_glossary_id, row["source_lang"], row["target_lang"], row["name"],
+                     row["entries_hash"], row["entry_count"], row["source_file"],
+                     row["api_version"], created_at or _now(), _now()))
+            self._conn.execute(
+                "UPDATE glossaries SET deleted_at = ? WHERE glossary_id = ? AND deleted_at IS NULL",
+                (_now(), glossary_id))
+        return bool(rows)
+
+    def mark_deleted(self, glossary_id):
+        """Record that a glossary was deleted (its snapshots are kept)"""
+        with self._write():
+            self._conn.execute(
+                "UPDATE glossaries SET deleted_at = ? WHERE glossary_id = ? AND deleted_at IS NULL",
+                (_now(), glossary_id))
+
+    # ==================== Queries ====================
+
+    def glossaries(self, include_deleted=False):
+        """Recorded glossaries in GET /v2/glossaries form, oldest first
+
+        Besides the API fields each dict has entries_hash, source_file,
+        version, api_version, recorded_at and deleted_at.
+        """
+        rows = self._conn.execute(
+            "SELECT g.*, v.version FROM glossaries g LEFT JOIN versions v"
+            " ON v.name = g.name AND v.source_lang = g.source_lang"
+            " AND v.target_lang = g.target_lang AND v.entries_hash = g.entries_hash"
+            + ("" if include_deleted else " WHERE g.deleted_at IS NULL")
+            + " ORDER BY g.created_at, g.glossary_id")
+        return [self._glossary_dict(row) for row in rows]
+
+    def glossary(self, glossary_id, source_lang=None, target_lang=None):
+        """The record of one glossary (first dictionary if no pair is given), or None"""
+        for glossary in self.glossaries(include_deleted=True):
+            if glossary["glossary_id"] != glossary_id:
+                continue
+            if source_lang and glossary["source_lang"] != source_lang.lower():
+                continue
+            if target_lang and glossary["target_lang"] != target_lang.lower():
+                continue
+            return glossary
+        return None
+
+    @staticmethod
+    def _glossary_dict(row):
+        return {
+            "glossary_id": row["glossary_id"],
+            "name": row["name"],
+            "ready": True,
+            "source_lang": row["source_lang"],
+            "target_lang": row["target_lang"],
+            "creation_time": row["created_at"],
+            "entry_count": row["entry_count"],
+            "entries_hash": row["entries_hash"],
+            "source_file": row["source_file"],
+            "version": row["version"],
+            "api_version": row["api_version"],
+            "recorded_at": row["recorded_at"],
+            "deleted_at": row["deleted_at"],
+        }
+
+    def entries_hash(self, glossary_id, source_lang=None, target_lang=None):
+        """Recorded entries hash of a glossary, or None"""
+        glossary = self.glossary(glossary_id, source_lang, target_lang)
+        return glossary["entries_hash"] if glossary else None
+
+    def entries(self, glossary_id, source_lang=None, target_lang=None):
+        """Recorded (source, target) entries of a glossary, or None without a snapshot"""
+        return self.snapshot(self.entries_hash(glossary_id, source_lang, target_lang))
+
+    def snapshot(self, content_hash):
+        """(source, target) entries stored for a content hash, or None"""
+        if content_hash is None:
+            return None
+        row = self._conn.execute("SELECT tsv FROM snapshots WHERE entries_hash = ?",
+                                 (content_hash,)).fetchone()
+        if row is None:
+            return None
+        return parse_tsv(zlib.decompress(row["tsv"]).decode("utf-8"))
+
+    def versions(self, name, source_lang, target_lang):
+        """Term versions of a glossary name and language pair, oldest first
+
+        Each dict has version, entries_hash, entry_count, source_file,
+        recorded_at and live_ids (IDs of undeleted glossaries with it).
+        """
+        rows = self._conn.execute(
+            "SELECT v.*, s.entry_count FROM versions v"
+            " JOIN snapshots s ON s.entries_hash = v.entries_hash"
+            " WHERE v.name = ? AND v.source_lang = ? AND v.target_lang = ?"
+            " ORDER BY v.version",
+            (name, source_lang.lower(), target_lang.lower())).fetchall()
+        versions = []
+        for row in rows:
+            live = self._conn.execute(
+                "SELECT glossary_id FROM glossaries WHERE name = ? AND source_lang = ?"
+                " AND target_lang = ? AND entries_hash = ? AND deleted_at IS NULL",
+                (name, source_lang.lower(), target_lang.lower(), row["entries_hash"]))
+            versions.append({
+                "version": row["version"],
+                "entries_hash": row["entries_hash"],
+                "entry_count": row["entry_count"],
+                "source_file": row["source_file"],
+                "recorded_at": row["recorded_at"],
+                "live_ids": [r["glossary_id"] for r in live],
+            })
+        return versions
+
+    def version_entries(self, name, source_lang, target_lang, version):
+        """(source, target) entries of one version, or None if it does not exist"""
+        row = self._conn.execute(
+            "SELECT entries_hash FROM versions WHERE name = ? AND source_lang = ?"
+            " AND target_lang = ? AND version = ?",
+            (name, source_lang.lower(), target_lang.lower(), version)).fetchone()
+        return self.snapshot(row["entries_hash"]) if row else None
+
+    def is_empty(self):
+        return self._conn.execute("SELECT COUNT(*) FROM glossaries").fetchone()[0] == 0
+
+    # ==================== Legacy Files ====================
+
+    def import_legacy(self, info_file):
+        """Import the glossary info file written by earlier versions
+
+        Returns the number of glossaries imported. The file is left in place.
+        """
+        if not os.path.exists(info_file):
+            return 0
+        with open(info_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        match = re.search(r"^Glossary ID: (\S+)", text, re.MULTILINE)
+        if not match or self.glossary(match.group(1)) is not None:
+            return 0
+        created = re.search(r"^Created: (\S+)", text, re.MULTILINE)
+        count = re.search(r"^Entry Count: (\d+)", text, re.MULTILINE)
+        self.record_glossary(match.group(1), None, "", "",
+                             entry_count=int(count.group(1)) if count else None,
+                             created_at=created.group(1) if created else None)
+        return 1
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Request Instrumentation
+Structured records for every DeepL API call made through deepl_client.py.
+
+Each HTTP call (including its retries) produces one record dict:
+
+    time, command, method, endpoint, path, status, ok, latency, backoff,
+    attempts, retries, bytes_sent, bytes_received, characters,
+    concurrency, error
+
+"latency" is the wall time of the whole call and "backoff" the part of it
+spent sleeping between retries. "characters" is the source text sent to
+/v2/translate, i.e. what DeepL bills. "concurrency" is the client's
+adaptive in-flight limit when the call finished (None without one).
+Records are passed to every registered hook; nothing is recorded while
+no hook is registered.
+
+Gauges (add_gauge) publish current values such as the concurrency limit;
+they are read when the summary or the Prometheus textfile is written.
+
+Built-in sinks: JsonLinesSink (one JSON record per line) and
+MetricsAggregator (per command and endpoint totals, printable as a
+summary or written as a Prometheus textfile).
+
+Usage:
+    import instrumentation
+    instrumentation.add_hook(lambda record: print(record["endpoint"], record["latency"]))
+    instrumentation.setup(log_path="requests.jsonl", prometheus_path="deepl.prom")
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+
+# Path segments that identify a resource, collapsed so endpoints aggregate
+_ID_SEGMENT = re.compile(r"(/glossaries)/[^/]+")
+
+_hooks = []
+_gauges = {}
+_command = "default"
+
+
+# ==================== Hook API ====================
+
+def add_hook(hook):
+    """Register a callable that receives every request record"""
+    if hook not in _hooks:
+        _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    """Unregister a hook added with add_hook"""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def enabled():
+    """True if any hook is registered"""
+    return bool(_hooks)
+
+
+def set_command(name):
+    """Name the CLI command that following requests belong to"""
+    global _command
+    _command = name
+
+
+def current_command():
+    return _command
+
+
+def endpoint_template(path):
+    """/v2/glossaries/abc-123/entries -> /v2/glossaries/{id}/entries"""
+    return _ID_SEGMENT.sub(r"\1/{id}", path.split("?", 1)[0])
+
+
+def emit(record):
+    """Pass a record to every hook; a failing sink never fails the request"""
+    for hook in list(_hooks):
+        try:
+            hook(record)
+        except Exception as e:
+            print(f"⚠️  Instrumentation hook {hook!r} failed: {e}")
+
+
+def add_gauge(name, help_text, read):
+    """Publish a gauge; read() returns its current value"""
+    _gauges[name] = (help_text, read)
+
+
+def remove_gauge(name):
+    _gauges.pop(name, None)
+
+
+def read_gauges():
+    """Return [(name, help_text, value)] for every gauge"""
+    values = []
+    for name, (help_text, read) in sorted(_gauges.items()):
+        try:
+            values.append((name, help_text, read()))
+        except Exception as e:
+            print(f"⚠️  Gauge {name} failed: {e}")
+    return values
+
+
+def record_request(method, path, latency, backoff, attempts,
+                   response=None, error=None, characters=0, streamed=False,
+                   concurrency=None):
+    """Build and emit the record of one finished HTTP call"""
+    bytes_sent = 0
+    bytes_received = 0
+    status = None
+    if response is not None:
+        status = response.status_code
+        body = response.request.body if response.request is not None else None
+        if body is not None:
+            bytes_sent = len(body.encode("utf-8") if isinstance(body, str) else body)
+        length = response.headers.get("Content-Length")
+        if length is not None:
+            bytes_received = int(length)
+        elif not streamed:
+            bytes_received = len(response.content)
+
+    ok = error is None and status is not None and status < 400
+    emit({
+        "time": time.time(),
+        "command": _command,
+        "method": method,
+        "endpoint": endpoint_template(path),
+        "path": path,
+        "status": status,
+        "ok": ok,
+        "latency": latency,
+        "backoff": backoff,
+        "attempts": attempts,
+        "retries": attempts - 1,
+        "bytes_sent": bytes_sent,
+        "bytes_received": bytes_received,
+        # DeepL only bills successful translations
+        "characters": characters if ok else 0,
+        "concurrency": concurrency,
+        "error": error,
+    })
+
+
+# ==================== Sinks ====================
+
+class JsonLinesSink:
+    """Append each record as one JSON line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class MetricsAggregator:
+    """Totals per (command, endpoint)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def __call__(self, record):
+        key = (record["command"], f"{record['method']} {record['endpoint']}")
+        with self.lock:
+            metrics = self.metrics.get(key)
+            if metrics is None:
+                metrics = self.metrics[key] = {
+                    "requests": 0, "errors": 0, "retries": 0,
+                    "latency": 0.0, "latency_max": 0.0, "backoff": 0.0,
+                    "bytes_sent": 0, "bytes_received": 0, "characters": 0,
+                    "statuses": {},
+                }
+            metrics["requests"] += 1
+            metrics["errors"] += 0 if record["ok"] else 1
+            metrics["retries"] += record["retries"]
+            metrics["latency"] += record["latency"]
+            metrics["latency_max"] = max(metrics["latency_max"], record["latency"])
+            metrics["backoff"] += record["backoff"]
+            metrics["bytes_sent"] += record["bytes_sent"]
+            metrics["bytes_received"] += record["bytes_received"]
+            metrics["characters"] += record["characters"]
+            status = str(record["status"] or "error")
+            metrics["statuses"][status] = metrics["statuses"].get(status, 0) + 1
+
+    def print_summary(self):
+        """Print per-command, per-endpoint totals and the gauges"""
+        if not self.metrics:
+            return
+        print("\n" + "=" * 60)
+        print("📈 API Metrics")
+        print("=" * 60)
+        for command in sorted({command for command, _ in self.metrics}):
+            print(f"\n▶ {command}")
+            for (cmd, endpoint), m in sorted(self.metrics.items()):
+                if cmd != command:
+                    continue
+                print(f"  {endpoint}")
+                print(f"    {m['requests']} requests, {m['errors']} failed, "
+                      f"{m['retries']} retries | "
+                      f"{m['latency']:.2f}s total (max {m['latency_max']:.2f}s, "
+                      f"backoff {m['backoff']:.2f}s)")
+                print(f"    ↑ {m['bytes_sent']} B  ↓ {m['bytes_received']} B"
+                      + (f" | {m['characters']} characters billed" if m["characters"] else ""))
+
+        gauges = read_gauges()
+        if gauges:
+            print("\n▶ gauges")
+            for name, _, value in gauges:
+                print(f"  {name}: {value:g}")
+
+    def write_prometheus(self, path):
+        """Write the totals in the Prometheus textfile collector format"""
+        counters = (
+            ("deepl_requests_total", "API requests", "requests"),
+            ("deepl_request_errors_total", "Failed API requests", "errors"),
+            ("deepl_request_retries_total", "Retried attempts", "retries"),
+            ("deepl_request_seconds_total", "Wall time of API requests", "latency"),
+            ("deepl_request_backoff_seconds_total", "Time spent backing off", "backoff"),
+            ("deepl_request_bytes_sent_total", "Request body bytes", "bytes_sent"),
+            ("deepl_request_bytes_received_total", "Response body bytes", "bytes_received"),
+            ("deepl_characters_billed_total", "Source characters sent for translation",
+             "characters"),
+        )
+        with self.lock:
+            items = sorted(self.metrics.items())
+
+        lines = []
+        for name, help_text, field in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (command, endpoint), m in items:
+                lines.append(f"{name}{{{_labels(command, endpoint)}}} {m[field]}")
+
+        lines.append("# HELP deepl_responses_total API responses by status code")
+        lines.append("# TYPE deepl_responses_total counter")
+        for (command, endpoint), m in items:
+            for status, count in sorted(m["statuses"].items()):
+                lines.append(f"deepl_responses_total{{{_labels(command, endpoint)},"
+                             f"status=\"{status}\"}} {count}")
+
+        for name, help_text, value in read_gauges():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        # Write atomically so the collector never reads a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+def _labels(command, endpoint):
+    def escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'command="{escape(command)}",endpoint="{escape(endpoint)}"'
+
+
+# ==================== CLI Setup ====================
+
+def setup(log_path=None, prometheus_path=None, summary=False):
+    """Register the sinks selected on the command line
+
+    The Prometheus textfile and the summary are written when the process
+    exits. Returns the aggregator, or None if nothing was selected.
+    """
+    if log_path:
+        sink = add_hook(JsonLinesSink(log_path))
+        atexit.register(sink.close)
+
+    if not (prometheus_path or summary):
+        return None
+
+    aggregator = add_hook(MetricsAggregator())
+
+    def finish():
+        if summary:
+            aggregator.print_summary()
+        if prometheus_path:
+            aggregator.write_prometheus(prometheus_path)
+            print(f"\n💾 Metrics written to: {prometheus_path}")
+
+    atexit.register(finish)
+    return aggregator
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Glossary Metadata Cache
+An in-process TTL cache of glossary listings (GET /v2/glossaries,
+GET /v3/glossaries), so one command or interactive session does not
+fetch the same listing again and again.
+
+A listing is fetched when it is first needed, when it is older than the
+TTL, or when it was invalidated; otherwise the cached copy is returned.
+Our own writes keep it current without a round trip (write-through):
+a created glossary is added to its listing and a deleted one removed
+from every listing. Changes we cannot describe exactly, such as
+replacing a v3 dictionary, invalidate the listing instead.
+
+Glossaries changed by someone else (another process, the DeepL website)
+are only seen after the TTL; pass refresh=True to force a fetch.
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import threading
+import time
+
+import instrumentation
+
+# Seconds a fetched listing is trusted
+DEFAULT_TTL = 300
+
+V2_LISTING = "/v2/glossaries"
+V3_LISTING = "/v3/glossaries"
+
+
+class MetadataCache:
+    """TTL cache of glossary listings with write-through updates"""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.listings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def listing(self, key, fetch, refresh=False):
+        """Return the listing for key, calling fetch() if it is not fresh
+
+        fetch returns the list of glossary dicts; its exceptions propagate
+        and leave the cache unchanged. A copy of the listing is returned.
+        """
+        with self.lock:
+            cached = self.listings.get(key)
+            if (not refresh and cached is not None
+                    and time.monotonic() - cached[0] < self.ttl):
+                self.hits += 1
+                return list(cached[1])
+            self.misses += 1
+
+        glossaries = fetch()
+        with self.lock:
+            self.listings[key] = (time.monotonic(), list(glossaries))
+        return list(glossaries)
+
+    def get(self, key, glossary_id):
+        """Metadata of one glossary from a fresh cached listing, or None"""
+        with self.lock:
+            cached = self.listings.get(key)
+            if cached is None or time.monotonic() - cached[0] >= self.ttl:
+                return None
+            for glossary in cached[1]:
+                if glossary["glossary_id"] == glossary_id:
+                    self.hits += 1
+                    return glossary
+        return None
+
+    def age(self, key):
+        """Seconds since the listing was fetched, or None if not cached"""
+        with self.lock:
+            cached = self.listings.get(key)
+        return None if cached is None else time.monotonic() - cached[0]
+
+    # ==================== Write-through ====================
+
+    def put(self, key, glossary):
+        """Add or replace a glossary we just created in its listing"""
+        with self.lock:
+            cached = self.listings.get(key)
+            if cached is None:
+                return
+            glossaries = [g for g in cached[1] if g["glossary_id"] != glossary["glossary_id"]]
+            glossaries.append(glossary)
+            self.listings[key] = (cached[0], glossaries)
+
+    def remove(self, glossary_id):
+        """Drop a deleted glossary from every listing"""
+        with self.lock:
+            for key, (fetched, glossaries) in list(self.listings.items()):
+                self.listings[key] = (fetched, [g for g in glossaries
+                                                if g["glossary_id"] != glossary_id])
+
+    def invalidate(self, key=None):
+        """Forget one listing, or all of them"""
+        with self.lock:
+            if key is None:
+                self.listings.clear()
+            else:
+                self.listings.pop(key, None)
+
+    def register_gauges(self):
+        """Publish hit and miss counts through instrumentation gauges"""
+        instrumentation.add_gauge("glossary_metadata_cache_hits",
+                                  "Glossary listings served from the cache",
+                                  lambda: self.hits)
+        instrumentation.add_gauge("glossary_metadata_cache_misses",
+                                  "Glossary listings fetched from the API",
+                                  lambda: self.misses)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Profiling Mode
+Wrap one CLI operation (create, update, run_tests, export, ...) and write:
+
+    {prefix}.pstats       cProfile data (python -m pstats, snakeviz, ...)
+    {prefix}.collapsed    sampled stacks of all threads in the collapsed
+                          format read by flamegraph.pl and speedscope
+    {prefix}.memory.txt   tracemalloc peak and top allocation sites
+
+A summary splits the wall time into local CPU and waiting (network, disk,
+sleeps), and shows how much of it was spent inside DeepL API calls.
+cProfile and tracemalloc slow the operation down, so use the split and
+the relative costs rather than absolute timings.
+
+Usage:
+    with profiling.profiled("profile", "update"):
+        update_glossary()
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import instrumentation
+
+# Seconds between stack samples for the collapsed-stack file
+SAMPLE_INTERVAL = 0.005
+
+# Entries in the printed and written top lists
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 25
+
+# Frames kept per stack by tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+
+class StackSampler(threading.Thread):
+    """Sample the stacks of all other threads at a fixed interval"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                                 f":{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Context manager profiling everything run inside it"""
+
+    def __init__(self, prefix, name=None):
+        self.prefix = f"{prefix}-{name}" if name else prefix
+        self.name = name or prefix
+        self.http_requests = 0
+        self.http_seconds = 0.0
+
+    def _record(self, record):
+        self.http_requests += 1
+        self.http_seconds += record["latency"]
+
+    def __enter__(self):
+        instrumentation.add_hook(self._record)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.sampler = StackSampler()
+        self.sampler.start()
+        self.profile = cProfile.Profile()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        self.wall = time.perf_counter() - self.wall_start
+        self.cpu = time.process_time() - self.cpu_start
+        self.sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        _, self.peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        instrumentation.remove_hook(self._record)
+
+        self.profile.dump_stats(f"{self.prefix}.pstats")
+        self.sampler.write_collapsed(f"{self.prefix}.collapsed")
+        self.write_memory_report(snapshot, f"{self.prefix}.memory.txt")
+        self.print_summary()
+        return False
+
+    def write_memory_report(self, snapshot, path):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {self.peak_memory / 1024 / 1024:.1f} MB\n")
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites still alive at the end:\n\n")
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat.size / 1024:10.1f} KB  {stat.count:8} blocks  "
+                        f"{stat.traceback}\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} by call stack:\n")
+            for stat in snapshot.statistics("traceback")[:TOP_ALLOCATIONS]:
+                f.write(f"\n{stat.size / 1024:.1f} KB in {stat.count} blocks\n")
+                for line in stat.traceback.format():
+                    f.write(f"{line}\n")
+
+    def print_summary(self):
+        waiting = max(self.wall - self.cpu, 0.0)
+        share = (lambda seconds: seconds / self.wall * 100) if self.wall else (lambda s: 0.0)
+
+        print("\n" + "=" * 60)
+        print(f"⏱️  Profile: {self.name}")
+        print("=" * 60)
+        print(f"Wall time:       {self.wall:8.2f}s")
+        print(f"Local CPU:       {self.cpu:8.2f}s ({share(self.cpu):.0f}%)")
+        print(f"Waiting:         {waiting:8.2f}s ({share(waiting):.0f}%) "
+              f"network, disk, sleeps and input")
+        print(f"API requests:    {self.http_requests:8} "
+              f"({self.http_seconds:.2f}s inside DeepL API calls)")
+        print(f"Peak memory:     {self.peak_memory / 1024 / 1024:8.1f} MB (traced)")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+        print(f"\n🔥 Top {TOP_FUNCTIONS} functions by own time (main thread):")
+        lines = stream.getvalue().splitlines()
+        header = next((i for i, line in enumerate(lines) if line.lstrip().startswith("ncalls")), None)
+        for line in lines[header:] if header is not None else lines:
+            if line.strip():
+                print(f"  {line}")
+
+        print(f"\n💾 Profile written to: {self.prefix}.pstats, {self.prefix}.collapsed, "
+              f"{self.prefix}.memory.txt")
+
+
+def profiled(prefix, name=None):
+    """Profiler for prefix, or a no-op context when profiling is off"""
+    if not prefix:
+        return contextlib.nullcontext()
+    return Profiler(prefix, name)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Character Quota Scheduler
+Decide whether a translation job fits the remaining DeepL character quota
+before any character is spent.
+
+A job is made of named parts (e.g. "with glossary" and "baseline"), each
+holding the exact texts that will be sent: already deduplicated and with
+cache hits removed. The plan compares their cost with what /v2/usage says
+is left, minus a reserve, and with an optional per-run budget:
+
+    run      everything fits
+    shrink   optional parts are dropped, in the given order, until it fits
+    refuse   even the required parts do not fit
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+# DeepL Free plan monthly limit, used when /v2/usage reports no limit
+FREE_PLAN_CHARACTER_LIMIT = 500000
+
+
+def character_cost(texts):
+    """Characters DeepL bills for translating texts"""
+    return sum(len(text) for text in texts)
+
+
+def fetch_usage(client):
+    """Return {"character_count", "character_limit"} from /v2/usage"""
+    response = client.get("/v2/usage")
+    response.raise_for_status()
+    usage = response.json()
+    return {
+        "character_count": usage.get("character_count", 0),
+        "character_limit": usage.get("character_limit") or FREE_PLAN_CHARACTER_LIMIT,
+    }
+
+
+def make_part(name, texts, optional=False):
+    """A job part; texts are deduplicated and its cost computed up front"""
+    texts = list(dict.fromkeys(texts))
+    return {
+        "name": name,
+        "texts": texts,
+        "characters": character_cost(texts),
+        "optional": optional,
+    }
+
+
+def plan_job(parts, usage=None, budget=None, reserve=0):
+    """Plan a job within the remaining quota and the per-run budget
+
+    Args:
+        parts: Parts from make_part; optional parts are dropped in list order
+        usage: Result of fetch_usage, or None if unknown
+        budget: Maximum characters this job may spend, or None
+        reserve: Characters that must stay unused in the quota
+
+    Returns:
+        dict: decision ("run", "shrink" or "refuse"), the kept and dropped
+        part names, projected characters, available characters (None if
+        unlimited) and the usage it was planned against
+    """
+    available = None
+    if usage is not None:
+        available = usage["character_limit"] - usage["character_count"] - reserve
+    if budget is not None:
+        available = budget if available is None else min(available, budget)
+    if available is not None:
+        available = max(available, 0)
+
+    kept = list(parts)
+    dropped = []
+    projected = sum(part["characters"] for part in kept)
+
+    if available is not None:
+        for part in parts:
+            if projected <= available:
+                break
+            if part["optional"]:
+                kept.remove(part)
+                dropped.append(part)
+                projected -= part["characters"]
+
+    if available is not None and projected > available:
+        decision = "refuse"
+    elif dropped:
+        decision = "shrink"
+    else:
+        decision = "run"
+
+    return {
+        "decision": decision,
+        "kept": [part["name"] for part in kept],
+        "dropped": [part["name"] for part in dropped],
+        "projected": projected,
+        "total": sum(part["characters"] for part in parts),
+        "available": available,
+        "usage": usage,
+    }
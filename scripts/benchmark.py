@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+End-to-End API Benchmark
+
+Run the DeepL code paths against the local mock server
+(mock_deepl_server.py) and report requests/sec, p50/p95/p99 request
+latency and bytes transferred for glossary create, list, entries fetch,
+bulk delete and batch translate at several glossary and corpus sizes.
+The "adaptive" scenario caps the mock's concurrent requests and compares
+a fixed worker count with the adaptive limiter (concurrency.py).
+
+Unpooled, one-request-per-item baselines run next to the pooled,
+batched and concurrent paths so the difference is visible. No API key
+or network access is needed.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --latency 0.05 --glossary-sizes 100,10000 --corpus-sizes 100,1000
+    python benchmark.py --rate-limit-rate 0.05 --json benchmark.json
+    python benchmark.py --scenarios adaptive --server-max-in-flight 6 --workers 16
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+import bulk_ops
+from concurrency import AdaptiveLimiter
+from deepl_client import RETRY_STATUS_CODES, DeepLClient
+from mock_deepl_server import MockDeepLServer
+from terms import TERMS
+
+API_KEY = "benchmark:fx"
+
+# One-request-per-segment baselines are skipped above this corpus size
+SINGLE_REQUEST_MAX_SEGMENTS = 500
+
+FILLER_WORDS = ("the", "model", "results", "show", "that", "our", "method",
+                "improves", "on", "data", "with", "a", "new", "approach")
+
+
+# ==================== Data ====================
+
+def make_entries(size):
+    """Synthetic glossary: the real TERMS plus generated terms"""
+    entries = dict(list(TERMS.items())[:size])
+    i = 0
+    while len(entries) < size:
+        entries[f"benchmark term {i}"] = f"基准术语{i}"
+        i += 1
+    return entries
+
+
+def make_corpus(size, seed=0):
+    """Synthetic segments that mention glossary terms now and then"""
+    rng = random.Random(seed)
+    terms = list(TERMS)
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(8, 30))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(terms))
+        corpus.append(" ".join(words).capitalize() + ".")
+    return corpus
+
+
+def tsv(entries):
+    return "\n".join(f"{source}\t{target}" for source, target in entries.items())
+
+
+# ==================== Measurement ====================
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Benchmark:
+    """Runs scenarios against one mock server and collects their results"""
+
+    def __init__(self, server):
+        self.server = server
+        self.latencies = []
+        self.results = []
+
+    def record(self, response, *args, **kwargs):
+        """requests response hook: per-request latency"""
+        self.latencies.append(response.elapsed.total_seconds())
+
+    def client(self, **options):
+        client = DeepLClient(API_KEY, self.server.base_url, **options)
+        client.session.hooks["response"].append(self.record)
+        return client
+
+    def unpooled(self, method, path, **kwargs):
+        """One request on a fresh connection, as before pooling
+
+        Injected 429/5xx responses are retried immediately.
+        """
+        headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
+        while True:
+            response = requests.request(method, f"{self.server.base_url}{path}",
+                                        headers=headers, hooks={"response": self.record},
+                                        timeout=60, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+
+    def run(self, scenario, size, mode, operations, func):
+        """Time func and record the server-side counters it produced"""
+        self.latencies = []
+        self.server.reset_stats()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        stats = dict(self.server.stats)
+
+        result = {
+            "scenario": scenario,
+            "size": size,
+            "mode": mode,
+            "operations": operations,
+            "requests": stats["requests"],
+            "connections": stats["connections"],
+            "seconds": elapsed,
+            "requests_per_second": stats["requests"] / elapsed if elapsed else 0.0,
+            "operations_per_second": operations / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(self.latencies, 0.50) * 1000,
+            "p95_ms": percentile(self.latencies, 0.95) * 1000,
+            "p99_ms": percentile(self.latencies, 0.99) * 1000,
+            "bytes_sent": stats["bytes_in"],
+            "bytes_received": stats["bytes_out"],
+            "retried": stats["rate_limited"] + stats["errors_injected"],
+        }
+        self.results.append(result)
+        print_result(result)
+        return result
+
+
+# ==================== Scenarios ====================
+
+def bench_glossaries(bench, sizes, repeat, workers):
+    """create, entries fetch and list at each glossary size, then bulk delete"""
+    client = bench.client(pool_size=max(workers, 1))
+
+    for size in sizes:
+        entries = make_entries(size)
+        payload = {"name": f"bench-{size}", "source_lang": "en", "target_lang": "zh",
+                   "entries": tsv(entries), "entries_format": "tsv"}
+        created = []
+
+        def create():
+            for _ in range(repeat):
+                response = client.post("/v2/glossaries", json=payload)
+                response.raise_for_status()
+                created.append(response.json())
+
+        def fetch():
+            action = bulk_ops.fetch_entries_action(client)
+            for glossary in created:
+                action(glossary)
+
+        bench.run("create", size, "pooled", repeat, create)
+        bench.run("entries", size, "pooled", len(created), fetch)
+
+    def list_pooled():
+        for _ in range(repeat * 4):
+            client.get("/v2/glossaries").raise_for_status()
+
+    def list_unpooled():
+        for _ in range(repeat * 4):
+            bench.unpooled("GET", "/v2/glossaries").raise_for_status()
+
+    glossary_count = len(bench.server.glossaries)
+    bench.run("list", glossary_count, "unpooled", repeat * 4, list_unpooled)
+    bench.run("list", glossary_count, "pooled", repeat * 4, list_pooled)
+
+    # Bulk delete: sequential vs the worker pool, on equally many glossaries
+    small = {"name": "bench-bulk", "source_lang": "en", "target_lang": "zh",
+             "entries": tsv(make_entries(10)), "entries_format": "tsv"}
+    count = max(repeat * 10, 20)
+    for mode, pool_workers in (("sequential", 1), (f"{workers} workers", workers)):
+        glossaries = [client.post("/v2/glossaries", json=small).json() for _ in range(count)]
+        action = bulk_ops.delete_action(client)
+        bench.run("bulk delete", count, mode, count,
+                  lambda: bulk_ops.run_bulk(glossaries, action, workers=pool_workers))
+
+    client.close()
+
+
+def bench_translate(bench, sizes, concurrency):
+    """Translate corpora one segment per request, batched, and batched concurrently"""
+    client = bench.client(pool_size=max(concurrency, 1))
+    glossary = client.post("/v2/glossaries", json={
+        "name": "bench-translate", "source_lang": "en", "target_lang": "zh",
+        "entries": tsv(TERMS), "entries_format": "tsv",
+    }).json()
+    glossary_id = glossary["glossary_id"]
+    options = {"source_lang": "EN", "glossary_id": glossary_id}
+
+    for size in sizes:
+        corpus = make_corpus(size)
+
+        def single():
+            for text in corpus:
+                response = bench.unpooled("POST", "/v2/translate", json={
+                    "text": [text], "target_lang": "ZH", **options})
+                response.raise_for_status()
+
+        def batched():
+            client.translate_texts(corpus, "ZH", **options)
+
+        def concurrent():
+            semaphore = asyncio.Semaphore(concurrency)
+            asyncio.run(client.translate_texts_async(corpus, "ZH", semaphore=semaphore,
+                                                     **options))
+
+        if size <= SINGLE_REQUEST_MAX_SEGMENTS:
+            bench.run("translate", size, "single unpooled", size, single)
+        bench.run("translate", size, "batched", size, batched)
+        bench.run("translate", size, f"batched x{concurrency}", size, concurrent)
+
+    client.close()
+
+
+def bench_adaptive(bench, operations, workers, server_max_in_flight):
+    """Bulk entry fetches against a concurrency-capped server, fixed vs adaptive"""
+    setup = bench.client()
+    glossary = setup.post("/v2/glossaries", json={
+        "name": "bench-adaptive", "source_lang": "en", "target_lang": "zh",
+        "entries": tsv(make_entries(100)), "entries_format": "tsv",
+    }).json()
+    setup.close()
+    glossaries = [glossary] * operations
+
+    # 429s without Retry-After, so clients fall back to their own backoff
+    bench.server.max_in_flight = server_max_in_flight
+    bench.server.retry_after = None
+    try:
+        for mode in ("fixed", "adaptive"):
+            limiter = AdaptiveLimiter(maximum=workers) if mode == "adaptive" else None
+            client = bench.client(pool_size=workers, limiter=limiter)
+            action = bulk_ops.fetch_entries_action(client)
+            result = bench.run("adaptive", operations, f"{mode} {workers}", operations,
+                               lambda: bulk_ops.run_bulk(glossaries, action, workers=workers))
+            result["server_max_in_flight"] = server_max_in_flight
+            result["peak_in_flight"] = bench.server.stats["peak_in_flight"]
+            detail = (f"   ↳ {result['retried']} requests answered 429, "
+                      f"peak {result['peak_in_flight']} in flight at the server "
+                      f"(cap {server_max_in_flight})")
+            if limiter is not None:
+                result["limiter"] = limiter.snapshot()
+                detail += (f", limiter ended at {result['limiter']['limit']} "
+                           f"after {result['limiter']['decreases']} cut(s)")
+            print(detail)
+            client.close()
+    finally:
+        bench.server.max_in_flight = None
+        bench.server.retry_after = 0
+
+
+# ==================== Report ====================
+
+HEADER = (f"{'scenario':<12} {'size':>7} {'mode':<16} {'ops':>6} {'reqs':>6} "
+          f"{'conns':>5} {'ops/s':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'sent':>10} {'received':>10}")
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GB"
+
+
+def print_result(result):
+    print(f"{result['scenario']:<12} {result['size']:>7} {result['mode']:<16} "
+          f"{result['operations']:>6} {result['requests']:>6} {result['connections']:>5} "
+          f"{result['operations_per_second']:>8.1f} {result['requests_per_second']:>8.1f} {result['p50_ms']:>8.1f} "
+          f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+          f"{format_bytes(result['bytes_sent']):>10} "
+          f"{format_bytes(result['bytes_received']):>10}")
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",") if size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DeepL API paths against the mock server")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Simulated server latency per request in seconds (default: 0.02)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--glossary-sizes", type=parse_sizes, default=[100, 1000, 10000],
+                        help="Comma-separated glossary entry counts")
+    parser.add_argument("--corpus-sizes", type=parse_sizes, default=[50, 500, 2000],
+                        help="Comma-separated translate corpus sizes in segments")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Operations per create/entries/list measurement")
+    parser.add_argument("--workers", type=int, default=bulk_ops.DEFAULT_WORKERS,
+                        help="Bulk operation workers")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="In-flight translate requests for the concurrent path")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","),
+                        default=["glossaries", "translate", "adaptive"],
+                        help="Comma-separated scenarios: glossaries, translate, adaptive")
+    parser.add_argument("--adaptive-operations", type=int, default=1000,
+                        help="Entry fetches in the adaptive scenario")
+    parser.add_argument("--server-max-in-flight", type=int, default=6,
+                        help="Concurrent requests the mock accepts in the adaptive scenario")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    server = MockDeepLServer(latency=args.latency, error_rate=args.error_rate,
+                             rate_limit_rate=args.rate_limit_rate, retry_after=0,
+                             character_limit=10 ** 12, seed=0)
+    with server:
+        print(f"🧪 Mock DeepL API on {server.base_url} "
+              f"(latency {args.latency * 1000:.0f} ms, errors {args.error_rate:.0%}, "
+              f"429s {args.rate_limit_rate:.0%})\n")
+        print(HEADER)
+        print("-" * len(HEADER))
+
+        bench = Benchmark(server)
+        if "glossaries" in args.scenarios:
+            bench_glossaries(bench, args.glossary_sizes, args.repeat, args.workers)
+        if "translate" in args.scenarios:
+            bench_translate(bench, args.corpus_sizes, args.concurrency)
+        if "adaptive" in args.scenarios:
+            bench_adaptive(bench, args.adaptive_operations, args.workers,
+                           args.server_max_in_flight)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "settings": vars(args),
+                "results": bench.results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
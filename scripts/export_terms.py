@@ -2,12 +2,18 @@
 """
 Export Glossary Terms to File
 
-Export your TERMS dictionary from glossary_manager.py to various formats
-for backup, sharing, or version control.
+Export your TERMS dictionary (terms.py) to various formats
+for backup, sharing, or version control. Works offline, no API key needed.
+
+Terms can also be read from a compiled term store (term_store.py), and
+exported to one. Entries are written one at a time, so exporting a
+store with millions of entries does not load it into memory.
 
 Usage:
     python export_terms.py --format json --output my_terms.json
     python export_terms.py --format tsv --output my_terms.tsv
+    python export_terms.py --format termstore --output terms.termstore
+    python export_terms.py --store terms.termstore --format tsv --output big.tsv
 """
 
 import sys
@@ -16,19 +22,30 @@ import argparse
 from pathlib import Path
 
 # Import TERMS from parent directory
+# terms.py is a lightweight module: no network libraries, no API key
 sys.path.insert(0, str(Path(__file__).parent.parent))
 try:
-    from glossary_manager import TERMS
+    from terms import TERMS
 except ImportError:
-    print("Error: Cannot import TERMS from glossary_manager.py")
-    print("Make sure glossary_manager.py is in the parent directory")
+    print("Error: Cannot import TERMS from terms.py")
+    print("Make sure terms.py is in the parent directory")
     sys.exit(1)
 
+import profiling
+import term_store
+
+# Where TERMS was read from, for messages
+TERMS_SOURCE = "terms.py"
+
 
 def export_json(output_file):
-    """Export terms to JSON format"""
+    """Export terms to JSON format (same layout as json.dump with indent=2)"""
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(TERMS, f, ensure_ascii=False, indent=2)
+        f.write("{")
+        for i, (source, target) in enumerate(TERMS.items()):
+            f.write(f'{"," if i else ""}\n  {json.dumps(source, ensure_ascii=False)}: '
+                    f'{json.dumps(target, ensure_ascii=False)}')
+        f.write("\n}" if TERMS else "}")
     print(f"✅ Exported {len(TERMS)} terms to {output_file} (JSON format)")
 
 
@@ -52,18 +69,38 @@ def export_markdown(output_file):
     print(f"✅ Exported {len(TERMS)} terms to {output_file} (Markdown format)")
 
 
+def export_termstore(output_file):
+    """Export terms to a compiled term store (memory-mapped binary format)"""
+    stats = term_store.build_store(TERMS, output_file)
+    print(f"✅ Exported {stats['entries']} terms to {output_file} "
+          f"(term store, {stats['bytes']:,} bytes)")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Export glossary terms to file')
     parser.add_argument('--format', '-f',
-                       choices=['json', 'tsv', 'md'],
+                       choices=['json', 'tsv', 'md', 'termstore'],
                        default='json',
                        help='Output format (default: json)')
     parser.add_argument('--output', '-o',
                        default='terms_export',
                        help='Output filename (without extension)')
+    parser.add_argument('--store', metavar='FILE',
+                       help='Read terms from a compiled term store instead of terms.py')
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='PREFIX',
+                       help='Profile the export and write PREFIX-export.pstats/.collapsed/.memory.txt')
 
     args = parser.parse_args()
 
+    global TERMS, TERMS_SOURCE
+    if args.store:
+        try:
+            TERMS = term_store.TermStore(args.store)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        TERMS_SOURCE = args.store
+
     # Add extension if not provided
     if args.format == 'json' and not args.output.endswith('.json'):
         output_file = f"{args.output}.json"
@@ -71,20 +108,20 @@ def main():
         output_file = f"{args.output}.tsv"
     elif args.format == 'md' and not args.output.endswith('.md'):
         output_file = f"{args.output}.md"
+    elif args.format == 'termstore' and not term_store.is_store(args.output):
+        output_file = f"{args.output}{term_store.STORE_SUFFIX}"
     else:
         output_file = args.output
 
-    print(f"\n📦 Exporting {len(TERMS)} terms from glossary_manager.py...")
+    print(f"\n📦 Exporting {len(TERMS)} terms from {TERMS_SOURCE}...")
     print(f"Format: {args.format.upper()}")
     print(f"Output: {output_file}\n")
 
     # Export based on format
-    if args.format == 'json':
-        export_json(output_file)
-    elif args.format == 'tsv':
-        export_tsv(output_file)
-    elif args.format == 'md':
-        export_markdown(output_file)
+    exporters = {'json': export_json, 'tsv': export_tsv, 'md': export_markdown,
+                 'termstore': export_termstore}
+    with profiling.profiled(args.profile, 'export'):
+        exporters[args.format](output_file)
 
     print(f"\n💾 Backup completed!")
     print(f"You can now:")
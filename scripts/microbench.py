@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for Local Hot Paths
+
+Time the CPU-bound pieces on synthetic glossaries of 1k, 100k and 1M
+entries and record their peak memory (tracemalloc):
+
+    tsv_build      canonical_tsv(), the TSV upload body of create_glossary
+    tsv_parse      parse_tsv(), the entry parsing of registry snapshots
+    tsv_stream     iter_tsv_chunks(), the streamed entry parsing of
+                   get_glossary_entries and diff (64 KiB chunks)
+    highlight      highlight_terms() in test_glossary.py
+    export_json    export_json() in export_terms.py
+    export_tsv     export_tsv() in export_terms.py
+    export_md      export_markdown() in export_terms.py
+
+Save the results as a baseline, then compare later runs against it; the
+run fails (exit code 1) when time or peak memory regresses beyond the
+threshold. Timings are the best of --repeat runs; memory is measured in
+a separate traced run so tracing does not skew the timings.
+
+Usage:
+    python microbench.py --save microbench_baseline.json
+    python microbench.py --baseline microbench_baseline.json --threshold 0.25
+    python microbench.py --only tsv_build,tsv_parse --sizes 1000,100000
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+import export_terms
+from terms import canonical_tsv, iter_tsv_chunks, parse_tsv
+from test_glossary import highlight_terms
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+# Building the term automaton for 1M terms takes minutes and gigabytes
+# under tracemalloc, so highlight stops at 100k unless --sizes says otherwise
+SIZE_CAPS = {"highlight": 100_000}
+
+# Relative slowdown / memory growth tolerated before failing
+DEFAULT_THRESHOLD = 0.25
+
+# Results below these are too noisy to fail a run on
+MIN_COMPARABLE_SECONDS = 0.005
+MIN_COMPARABLE_BYTES = 64 * 1024
+
+WORDS = ("model", "learning", "policy", "network", "vision", "agent",
+         "robot", "graph", "token", "reward", "language", "diffusion")
+
+
+# ==================== Synthetic Data ====================
+
+def make_glossary(size, seed=0):
+    """Glossary of size entries in random order, mixing kept and translated terms"""
+    rng = random.Random(seed)
+    terms = {}
+    for i in range(size):
+        source = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        terms[source] = source if i % 5 == 0 else f"合成术语{i}"
+    return terms
+
+
+def make_text(terms, segments=200, seed=0):
+    """Document text mentioning glossary terms"""
+    rng = random.Random(seed)
+    sources = list(terms)
+    lines = []
+    for _ in range(segments):
+        words = rng.choices(WORDS, k=12)
+        words.insert(rng.randrange(len(words)), rng.choice(sources))
+        lines.append(" ".join(words) + ".")
+    return "\n".join(lines)
+
+
+# ==================== Benchmarks ====================
+# Each setup(terms, workdir) prepares its input and returns the function to time
+
+def setup_tsv_build(terms, workdir):
+    return lambda: canonical_tsv(terms)
+
+
+def setup_tsv_parse(terms, workdir):
+    text = canonical_tsv(terms)
+    return lambda: parse_tsv(text)
+
+
+def setup_tsv_stream(terms, workdir):
+    text = canonical_tsv(terms)
+    chunks = [text[i:i + 65536] for i in range(0, len(text), 65536)]
+
+    def run():
+        for _ in iter_tsv_chunks(chunks):
+            pass
+    return run
+
+
+def setup_highlight(terms, workdir):
+    text = make_text(terms)
+    return lambda: highlight_terms(text, terms)
+
+
+def _exporter(export, suffix):
+    def setup(terms, workdir):
+        output_file = workdir / f"export{suffix}"
+
+        def run():
+            export_terms.TERMS = terms
+            with contextlib.redirect_stdout(io.StringIO()):
+                export(output_file)
+        return run
+    return setup
+
+
+BENCHMARKS = {
+    "tsv_build": setup_tsv_build,
+    "tsv_parse": setup_tsv_parse,
+    "tsv_stream": setup_tsv_stream,
+    "highlight": setup_highlight,
+    "export_json": _exporter(export_terms.export_json, ".json"),
+    "export_tsv": _exporter(export_terms.export_tsv, ".tsv"),
+    "export_md": _exporter(export_terms.export_markdown, ".md"),
+}
+
+
+def measure(func, repeat):
+    """Best-of-repeat wall time, then peak traced memory of one more run"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(names, sizes, repeat, capped=True):
+    """Run the selected benchmarks; returns {"name@size": result}"""
+    results = {}
+    original_terms = export_terms.TERMS
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for size in sizes:
+            terms = make_glossary(size)
+            for name in names:
+                if capped and size > SIZE_CAPS.get(name, size):
+                    continue
+                func = BENCHMARKS[name](terms, workdir)
+                seconds, peak = measure(func, repeat)
+                results[f"{name}@{size}"] = {
+                    "benchmark": name,
+                    "size": size,
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                }
+                print(f"  {name:<12} {size:>9,}  {seconds * 1000:>10.2f} ms  "
+                      f"{peak / 1024 / 1024:>9.1f} MB")
+            del terms
+    export_terms.TERMS = original_terms
+    return results
+
+
+# ==================== Baselines ====================
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages against baseline results"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if base["seconds"] >= MIN_COMPARABLE_SECONDS or result["seconds"] >= MIN_COMPARABLE_SECONDS:
+            ratio = result["seconds"] / max(base["seconds"], 1e-9)
+            if ratio > 1 + threshold:
+                regressions.append(f"{key}: time {base['seconds'] * 1000:.2f} ms → "
+                                   f"{result['seconds'] * 1000:.2f} ms (x{ratio:.2f})")
+        if max(base["peak_bytes"], result["peak_bytes"]) < MIN_COMPARABLE_BYTES:
+            continue
+        ratio = result["peak_bytes"] / max(base["peak_bytes"], 1)
+        if ratio > 1 + threshold:
+            regressions.append(f"{key}: peak memory {base['peak_bytes'] / 1024 / 1024:.1f} MB → "
+                               f"{result['peak_bytes'] / 1024 / 1024:.1f} MB (x{ratio:.2f})")
+    return regressions
+
+
+def parse_list(value):
+    return [item for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for local hot paths")
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in parse_list(v)],
+                        help="Comma-separated glossary sizes (default: 1000,100000,1000000; "
+                             "highlight is capped at 100000 unless sizes are given)")
+    parser.add_argument("--only", type=parse_list, default=list(BENCHMARKS),
+                        help=f"Comma-separated benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--save", metavar="FILE", help="Save the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed relative regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.only if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    print(f"\n⏱️  Microbenchmarks (best of {args.repeat}, peak memory via tracemalloc)")
+    print(f"  {'benchmark':<12} {'entries':>9}  {'time':>13}  {'peak mem':>12}")
+    results = run_benchmarks(args.only, args.sizes or DEFAULT_SIZES, args.repeat,
+                             capped=args.sizes is None)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline saved to: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
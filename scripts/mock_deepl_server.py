@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Local Mock DeepL Server
+
+A stand-in for the DeepL API for performance tests and offline
+development. It implements:
+
+    /v2/glossaries                 GET (list), POST (create)
+    /v2/glossaries/{id}            GET, DELETE
+    /v2/glossaries/{id}/entries    GET (TSV)
+    /v2/translate                  POST (JSON or form)
+    /v2/usage                      GET, POST
+    /v3/glossaries                 GET, POST
+    /v3/glossaries/{id}            GET, PATCH, DELETE
+    /v3/glossaries/{id}/entries    GET (?source_lang=&target_lang=)
+    /v3/glossaries/{id}/dictionaries  PUT, DELETE
+
+"Translations" are the source text with glossary terms replaced by their
+targets, so glossary effects can be checked. Latency, server errors and
+429 responses can be injected, and a real rate limit can be enforced:
+requests beyond --max-in-flight concurrent ones or --requests-per-second
+(token bucket, one second of burst) are answered with 429.
+
+Usage:
+    python mock_deepl_server.py --port 8787 --latency 0.05 --error-rate 0.01
+    python mock_deepl_server.py --latency 0.05 --max-in-flight 6 --requests-per-second 80
+    API_KEY=test:fx DEEPL_API_BASE_URL=http://127.0.0.1:8787 python glossary_manager.py
+
+Or in-process:
+    server = MockDeepLServer(latency=0.02).start()
+    ... use server.base_url ...
+    server.stop()
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# Reuse the term matcher for glossary replacement
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from term_scanner import TermAutomaton
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _parse_tsv(text):
+    entries = {}
+    for line in text.split("\n"):
+        if "\t" in line:
+            source, target = line.rstrip("\r").split("\t", 1)
+            entries[source] = target
+    return entries
+
+
+def _to_tsv(entries):
+    return "\n".join(f"{source}\t{target}" for source, target in entries.items())
+
+
+class MockDeepLServer:
+    """In-memory DeepL API stand-in running in a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 character_limit=500000, seed=None,
+                 max_in_flight=None, requests_per_second=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.character_limit = character_limit
+        self.character_count = 0
+        self.random = random.Random(seed)
+
+        self.max_in_flight = max_in_flight
+        self.requests_per_second = requests_per_second
+        self.in_flight = 0
+        self.tokens = float(requests_per_second or 0)
+        self.tokens_updated = time.monotonic()
+
+        self.glossaries = {}
+        self._automata = {}
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        """Reset request and byte counters"""
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "errors_injected": 0,
+                "rate_limited": 0,
+                "peak_in_flight": 0,
+                "connections": 0,
+                "by_endpoint": {},
+            }
+
+    def record(self, endpoint, bytes_in, bytes_out):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_in"] += bytes_in
+            self.stats["bytes_out"] += bytes_out
+            by_endpoint = self.stats["by_endpoint"]
+            by_endpoint[endpoint] = by_endpoint.get(endpoint, 0) + 1
+
+    def inject_fault(self):
+        """Return (status, headers) for an injected failure, or None"""
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            with self.lock:
+                self.stats["rate_limited"] += 1
+            return 429, self.rate_limit_headers()
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self.lock:
+                self.stats["errors_injected"] += 1
+            return 503, {}
+        return None
+
+    def admit(self):
+        """Start a request under the rate limit; False if it must get a 429"""
+        with self.lock:
+            if self.requests_per_second:
+                now = time.monotonic()
+                self.tokens = min(self.tokens + (now - self.tokens_updated) * self.requests_per_second,
+                                  float(self.requests_per_second))
+                self.tokens_updated = now
+                if self.tokens < 1:
+                    self.stats["rate_limited"] += 1
+                    return False
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                self.stats["rate_limited"] += 1
+                return False
+            if self.requests_per_second:
+                self.tokens -= 1
+            self.in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+            return True
+
+    def finish(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def rate_limit_headers(self):
+        return {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+
+    # ==================== Glossary Store ====================
+
+    def create_glossary(self, name, dictionaries):
+        glossary_id = str(uuid.uuid4())
+        with self.lock:
+            self.glossaries[glossary_id] = {
+                "glossary_id": glossary_id,
+                "name": name,
+                "creation_time": _now(),
+                "dictionaries": dictionaries,
+            }
+        return glossary_id
+
+    def automaton(self, glossary_id, source_lang, target_lang):
+        key = (glossary_id, source_lang, target_lang)
+        with self.lock:
+            automaton = self._automata.get(key)
+            if automaton is None:
+                glossary = self.glossaries.get(glossary_id)
+                if glossary is None:
+                    return None, None
+                entries = glossary["dictionaries"].get((source_lang, target_lang))
+                if entries is None:
+                    return None, None
+                automaton = (TermAutomaton(entries), entries)
+                self._automata[key] = automaton
+            return automaton
+
+    def invalidate(self, glossary_id):
+        with self.lock:
+            for key in [k for k in self._automata if k[0] == glossary_id]:
+                del self._automata[key]
+
+
+def v2_view(glossary):
+    (source_lang, target_lang), entries = next(iter(glossary["dictionaries"].items()))
+    return {
+        "glossary_id": glossary["glossary_id"],
+        "name": glossary["name"],
+        "ready": True,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "creation_time": glossary["creation_time"],
+        "entry_count": len(entries),
+    }
+
+
+def v3_view(glossary):
+    return {
+        "glossary_id": glossary["glossary_id"],
+        "name": glossary["name"],
+        "creation_time": glossary["creation_time"],
+        "dictionaries": [
+            {"source_lang": s, "target_lang": t, "entry_count": len(entries)}
+            for (s, t), entries in glossary["dictionaries"].items()
+        ],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+    mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.mock.lock:
+            self.mock.stats["connections"] += 1
+
+    # ==================== Plumbing ====================
+
+    def _dispatch(self):
+        mock = self.mock
+        url = urlsplit(self.path)
+        self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        self.raw_body = self.rfile.read(length) if length else b""
+        self._bytes_in = len(self.raw_body)
+
+        if not mock.admit():
+            return self.send_json(429, {"message": "Too many requests"}, url.path,
+                                  mock.rate_limit_headers())
+        try:
+            self._handle(url)
+        finally:
+            mock.finish()
+
+    def _handle(self, url):
+        mock = self.mock
+        if mock.latency:
+            time.sleep(mock.latency)
+
+        if not self.headers.get("Authorization", "").startswith("DeepL-Auth-Key "):
+            return self.send_json(403, {"message": "Authorization failure"}, url.path)
+
+        fault = mock.inject_fault()
+        if fault:
+            status, headers = fault
+            return self.send_json(status, {"message": "Injected failure"}, url.path, headers)
+
+        for method, pattern, handler in ROUTES:
+            if method != self.command:
+                continue
+            match = re.fullmatch(pattern, url.path)
+            if match:
+                return handler(self, *match.groups())
+        self.send_json(404, {"message": "Not found"}, url.path)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    def body(self):
+        if not self.raw_body:
+            return {}
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(self.raw_body)
+        form = parse_qs(self.raw_body.decode("utf-8"))
+        return {k: v if k == "text" else v[0] for k, v in form.items()}
+
+    def send_raw(self, status, data, content_type, endpoint, headers=None):
+        self.send_response(status)
+        if data or status != 204:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.mock.record(endpoint, self._bytes_in, len(data))
+
+    def send_json(self, status, payload, endpoint, headers=None):
+        data = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_raw(status, data, "application/json", endpoint, headers)
+
+    def glossary_or_404(self, glossary_id, endpoint):
+        glossary = self.mock.glossaries.get(glossary_id)
+        if glossary is None:
+            self.send_json(404, {"message": "Glossary not found"}, endpoint)
+        return glossary
+
+    # ==================== v2 ====================
+
+    def v2_list(self):
+        glossaries = [v2_view(g) for g in list(self.mock.glossaries.values())
+                      if len(g["dictionaries"]) == 1]
+        self.send_json(200, {"glossaries": glossaries}, "v2/glossaries")
+
+    def v2_create(self):
+        body = self.body()
+        try:
+            entries = _parse_tsv(body["entries"])
+            key = (body["source_lang"].lower(), body["target_lang"].lower())
+            name = body["name"]
+        except KeyError as e:
+            return self.send_json(400, {"message": f"Missing {e}"}, "v2/glossaries")
+        glossary_id = self.mock.create_glossary(name, {key: entries})
+        self.send_json(201, v2_view(self.mock.glossaries[glossary_id]), "v2/glossaries")
+
+    def v2_get(self, glossary_id):
+        glossary = self.glossary_or_404(glossary_id, "v2/glossaries/{id}")
+        if glossary:
+            self.send_json(200, v2_view(glossary), "v2/glossaries/{id}")
+
+    def v2_entries(self, glossary_id):
+        glossary = self.glossary_or_404(glossary_id, "v2/glossaries/{id}/entries")
+        if glossary:
+            entries = next(iter(glossary["dictionaries"].values()))
+            self.send_raw(200, _to_tsv(entries).encode("utf-8"),
+                          "text/tab-separated-values; charset=utf-8",
+                          "v2/glossaries/{id}/entries")
+
+    def delete(self, glossary_id):
+        with self.mock.lock:
+            glossary = self.mock.glossaries.pop(glossary_id, None)
+        if glossary is None:
+            return self.send_json(404, {"message": "Glossary not found"}, "glossaries/{id}")
+        self.mock.invalidate(glossary_id)
+        self.send_json(204, None, "glossaries/{id}")
+
+    def translate(self):
+        body = self.body()
+        texts = body.get("text") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        source_lang = (body.get("source_lang") or "EN").lower()
+        target_lang = body.get("target_lang", "").lower()
+        if not texts or not target_lang:
+            return self.send_json(400, {"message": "text and target_lang are required"}, "v2/translate")
+
+        characters = sum(len(t) for t in texts)
+        with self.mock.lock:
+            if self.mock.character_count + characters > self.mock.character_limit:
+                quota_exceeded = True
+            else:
+                quota_exceeded = False
+                self.mock.character_count += characters
+        if quota_exceeded:
+            return self.send_json(456, {"message": "Quota exceeded"}, "v2/translate")
+
+        automaton = entries = None
+        glossary_id = body.get("glossary_id")
+        if glossary_id:
+            automaton, entries = self.mock.automaton(glossary_id, source_lang, target_lang.split("-")[0])
+            if automaton is None:
+                return self.send_json(400, {"message": "Glossary not found for language pair"},
+                                      "v2/translate")
+
+        translations = []
+        for text in texts:
+            if automaton:
+                parts, last = [], 0
+                for start, end, term in automaton.find(text):
+                    parts.append(text[last:start])
+                    parts.append(entries[term])
+                    last = end
+                parts.append(text[last:])
+                text = "".join(parts)
+            translations.append({"detected_source_language": source_lang.upper(), "text": text})
+        self.send_json(200, {"translations": translations}, "v2/translate")
+
+    def usage(self):
+        self.send_json(200, {
+            "character_count": self.mock.character_count,
+            "character_limit": self.mock.character_limit,
+        }, "v2/usage")
+
+    # ==================== v3 ====================
+
+    def v3_list(self):
+        glossaries = [v3_view(g) for g in list(self.mock.glossaries.values())]
+        self.send_json(200, {"glossaries": glossaries}, "v3/glossaries")
+
+    def v3_create(self):
+        body = self.body()
+        try:
+            dictionaries = {
+                (d["source_lang"].lower(), d["target_lang"].lower()): _parse_tsv(d["entries"])
+                for d in body["dictionaries"]
+            }
+            name = body["name"]
+        except KeyError as e:
+            return self.send_json(400, {"message": f"Missing {e}"}, "v3/glossaries")
+        glossary_id = self.mock.create_glossary(name, dictionaries)
+        self.send_json(201, v3_view(self.mock.glossaries[glossary_id]), "v3/glossaries")
+
+    def v3_get(self, glossary_id):
+        glossary = self.glossary_or_404(glossary_id, "v3/glossaries/{id}")
+        if glossary:
+            self.send_json(200, v3_view(glossary), "v3/glossaries/{id}")
+
+    def v3_patch(self, glossary_id):
+        glossary = self.glossary_or_404(glossary_id, "v3/glossaries/{id}")
+        if not glossary:
+            return
+        body = self.body()
+        with self.mock.lock:
+            if body.get("name"):
+                glossary["name"] = body["name"]
+            for d in body.get("dictionaries", []):
+                key = (d["source_lang"].lower(), d["target_lang"].lower())
+                glossary["dictionaries"].setdefault(key, {}).update(_parse_tsv(d["entries"]))
+        self.mock.invalidate(glossary_id)
+        self.send_json(200, v3_view(glossary), "v3/glossaries/{id}")
+
+    def v3_entries(self, glossary_id):
+        endpoint = "v3/glossaries/{id}/entries"
+        glossary = self.glossary_or_404(glossary_id, endpoint)
+        if not glossary:
+            return
+        key = (self.query.get("source_lang", "").lower(), self.query.get("target_lang", "").lower())
+        entries = glossary["dictionaries"].get(key)
+        if entries is None:
+            return self.send_json(404, {"message": "Dictionary not found"}, endpoint)
+        self.send_json(200, {"dictionaries": [{
+            "source_lang": key[0], "target_lang": key[1],
+            "entries": _to_tsv(entries), "entries_format": "tsv",
+        }]}, endpoint)
+
+    def v3_put_dictionary(self, glossary_id):
+        endpoint = "v3/glossaries/{id}/dictionaries"
+        glossary = self.glossary_or_404(glossary_id, endpoint)
+        if not glossary:
+            return
+        d = self.body()
+        key = (d["source_lang"].lower(), d["target_lang"].lower())
+        with self.mock.lock:
+            glossary["dictionaries"][key] = _parse_tsv(d["entries"])
+        self.mock.invalidate(glossary_id)
+        self.send_json(200, {"source_lang": key[0], "target_lang": key[1],
+                             "entry_count": len(glossary["dictionaries"][key])}, endpoint)
+
+    def v3_delete_dictionary(self, glossary_id):
+        endpoint = "v3/glossaries/{id}/dictionaries"
+        glossary = self.glossary_or_404(glossary_id, endpoint)
+        if not glossary:
+            return
+        key = (self.query.get("source_lang", "").lower(), self.query.get("target_lang", "").lower())
+        with self.mock.lock:
+            removed = glossary["dictionaries"].pop(key, None)
+        if removed is None:
+            return self.send_json(404, {"message": "Dictionary not found"}, endpoint)
+        self.mock.invalidate(glossary_id)
+        self.send_json(204, None, endpoint)
+
+
+_ID = r"([^/]+)"
+ROUTES = [
+    ("GET", r"/v2/glossaries", _Handler.v2_list),
+    ("POST", r"/v2/glossaries", _Handler.v2_create),
+    ("GET", rf"/v2/glossaries/{_ID}", _Handler.v2_get),
+    ("GET", rf"/v2/glossaries/{_ID}/entries", _Handler.v2_entries),
+    ("DELETE", rf"/v2/glossaries/{_ID}", _Handler.delete),
+    ("POST", r"/v2/translate", _Handler.translate),
+    ("GET", r"/v2/usage", _Handler.usage),
+    ("POST", r"/v2/usage", _Handler.usage),
+    ("GET", r"/v3/glossaries", _Handler.v3_list),
+    ("POST", r"/v3/glossaries", _Handler.v3_create),
+    ("GET", rf"/v3/glossaries/{_ID}", _Handler.v3_get),
+    ("PATCH", rf"/v3/glossaries/{_ID}", _Handler.v3_patch),
+    ("DELETE", rf"/v3/glossaries/{_ID}", _Handler.delete),
+    ("GET", rf"/v3/glossaries/{_ID}/entries", _Handler.v3_entries),
+    ("PUT", rf"/v3/glossaries/{_ID}/dictionaries", _Handler.v3_put_dictionary),
+    ("DELETE", rf"/v3/glossaries/{_ID}/dictionaries", _Handler.v3_delete_dictionary),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock DeepL API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1,
+                        help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--no-retry-after", action="store_true",
+                        help="Send 429 responses without Retry-After")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="Answer requests beyond this many concurrent ones with 429")
+    parser.add_argument("--requests-per-second", type=float,
+                        help="Answer requests above this rate with 429")
+    parser.add_argument("--character-limit", type=int, default=500000)
+    args = parser.parse_args()
+
+    retry_after = None if args.no_retry_after else args.retry_after
+    server = MockDeepLServer(args.host, args.port, args.latency, args.error_rate,
+                             args.rate_limit_rate, retry_after, args.character_limit,
+                             max_in_flight=args.max_in_flight,
+                             requests_per_second=args.requests_per_second)
+    print(f"🧪 Mock DeepL API listening on {server.base_url}")
+    print(f"   Use: DEEPL_API_BASE_URL={server.base_url} API_KEY=test:fx")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Term Compliance Checker
+Check translated segments against the glossary in one pass per segment.
+
+Source terms and their target renderings are each compiled once into an
+Aho-Corasick automaton (see term_scanner.py). For every segment the
+checker reports which expected target terms were found or missing, which
+source terms appear without their target rendering in the translation
+(violations), and non-overlapping spans for highlighting.
+Large batches are spread over worker processes.
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from term_scanner import TermAutomaton
+
+# Batches at least this large are checked in parallel worker processes
+PARALLEL_THRESHOLD = 2000
+
+# Segments sent to a worker process at a time
+DEFAULT_CHUNKSIZE = 256
+
+
+class ComplianceChecker:
+    """Glossary compliance checks for translated segments"""
+
+    def __init__(self, terms, extra_targets=(), case_sensitive=True):
+        self.terms = dict(terms)
+        self.source_automaton = TermAutomaton(self.terms, case_sensitive)
+        targets = list(self.terms.values()) + list(extra_targets)
+        self.target_automaton = TermAutomaton(targets, case_sensitive)
+
+    def find_targets(self, translation):
+        """Non-overlapping (start, end, term) target term spans"""
+        if not translation:
+            return []
+        return self.target_automaton.find(translation)
+
+    def check(self, translation, expected_terms=None, source_text=None):
+        """Check one translated segment
+
+        Args:
+            translation: The translated text
+            expected_terms: Target terms that must appear (default: the
+                targets of the source terms found in source_text)
+            source_text: The original text, used to detect violations
+
+        Returns:
+            dict: "found" and "missing" expected terms, "violated" as
+            (source term, expected target) pairs, and "spans" for highlighting
+        """
+        spans = self.find_targets(translation)
+        present = {term for _, _, term in spans}
+
+        source_terms = []
+        if source_text:
+            source_terms = [source for _, _, source in self.source_automaton.find(source_text)]
+
+        violated = []
+        for source in dict.fromkeys(source_terms):
+            target = self.terms[source]
+            if target not in present:
+                violated.append((source, target))
+
+        if expected_terms is None:
+            expected_terms = list(dict.fromkeys(self.terms[s] for s in source_terms))
+
+        found = [term for term in expected_terms if term in present]
+        missing = [term for term in expected_terms if term not in present]
+        return {
+            "found": found,
+            "missing": missing,
+            "violated": violated,
+            "spans": spans,
+        }
+
+
+def highlight(text, spans, terms=None):
+    """Wrap spans in 【】, optionally only those whose term is in terms"""
+    parts = []
+    last = 0
+    for start, end, term in spans:
+        if terms is not None and term not in terms:
+            continue
+        parts.append(text[last:start])
+        parts.append(f"【{text[start:end]}】")
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+# ==================== Batch Checking ====================
+
+_worker_checker = None
+
+
+def _init_worker(terms, extra_targets, case_sensitive):
+    """Build the checker once per worker process"""
+    global _worker_checker
+    _worker_checker = ComplianceChecker(terms, extra_targets, case_sensitive)
+
+
+def _check_item(item):
+    source_text, translation, expected_terms = item
+    return _worker_checker.check(translation, expected_terms, source_text)
+
+
+def check_segments(items, checker, processes=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Check many (source_text, translation, expected_terms) items in order
+
+    expected_terms may be None to derive them from the source text.
+    Batches of PARALLEL_THRESHOLD items or more are checked in worker
+    processes (processes=1 forces a single process).
+    """
+    items = list(items)
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes <= 1 or len(items) < PARALLEL_THRESHOLD:
+        return [checker.check(translation, expected_terms, source_text)
+                for source_text, translation, expected_terms in items]
+
+    glossary_targets = set(checker.terms.values())
+    extra_targets = [t for t in checker.target_automaton.terms
+                     if t not in glossary_targets]
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(checker.terms, extra_targets, checker.source_automaton.case_sensitive),
+    ) as pool:
+        return list(pool.map(_check_item, items, chunksize=chunksize))
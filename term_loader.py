@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Term File Loader
+Stream glossary terms from external TSV, CSV, JSON and JSON Lines files
+(or glob patterns of them) instead of the TERMS dict in glossary_manager.py.
+A single compiled term store (term_store.py) is memory-mapped as it is:
+it was validated when it was built.
+
+Entries are validated in a single pass while they are read: tabs or
+newlines inside terms, empty values, duplicate source terms with
+conflicting targets, and the running upload size against DeepL's
+glossary size limit.
+
+Usage:
+    terms, validator = load_terms(["terms/*.tsv", "extra.csv"])
+    print_validation_report(validator)
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import csv
+import glob
+import json
+from pathlib import Path
+
+import term_store
+
+# DeepL limits the entries of one glossary (dictionary) to 10 MB of TSV
+DEEPL_GLOSSARY_MAX_BYTES = 10 * 1024 * 1024
+
+# Optional header rows that are skipped in TSV/CSV files
+HEADER_ROWS = {("source", "target"), ("en", "zh"), ("english", "chinese")}
+
+# Issues printed by print_validation_report before truncating
+MAX_REPORTED_ISSUES = 20
+
+
+class TermValidator:
+    """Single-pass validation state for a stream of term entries"""
+
+    def __init__(self, max_bytes=DEEPL_GLOSSARY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.seen = {}
+        self.errors = []
+        self.warnings = []
+        self.entries = 0
+        self.duplicates = 0
+        self.upload_bytes = 0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def error(self, location, message):
+        self.errors.append((location, message))
+
+    def warning(self, location, message):
+        self.warnings.append((location, message))
+
+    def check(self, source, target, location):
+        """Validate one entry; returns True if it should be kept"""
+        for label, value in (("source", source), ("target", target)):
+            if not value:
+                self.error(location, f"empty {label} term")
+                return False
+            if "\t" in value or "\n" in value or "\r" in value:
+                self.error(location, f"tab or newline in {label} term {value!r}")
+                return False
+            if value != value.strip():
+                self.error(location, f"leading/trailing whitespace in {label} term {value!r}")
+                return False
+
+        previous = self.seen.get(source)
+        if previous is not None:
+            self.duplicates += 1
+            if previous != target:
+                self.error(location, f"conflicting targets for {source!r}: "
+                                     f"{previous!r} vs {target!r}")
+            else:
+                self.warning(location, f"duplicate entry {source!r} skipped")
+            return False
+
+        self.seen[source] = target
+        self.entries += 1
+
+        # source<TAB>target plus the newline separating entries
+        entry_bytes = len(source.encode("utf-8")) + len(target.encode("utf-8")) + 2
+        was_within_limit = self.upload_bytes <= self.max_bytes
+        self.upload_bytes += entry_bytes
+        if was_within_limit and self.upload_bytes > self.max_bytes:
+            self.error(location, f"glossary exceeds DeepL's size limit of "
+                                 f"{self.max_bytes} bytes")
+        return True
+
+
+# ==================== File Readers ====================
+
+def expand_patterns(patterns):
+    """Expand file names and glob patterns into a sorted list of paths"""
+    if isinstance(patterns, (str, Path)):
+        patterns = [patterns]
+
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(str(pattern), recursive=True))
+        if not matches:
+            raise FileNotFoundError(f"No term files match: {pattern}")
+        paths.extend(Path(match) for match in matches)
+    return paths
+
+
+def _iter_rows(path, rows):
+    """Yield (source, target, location) from delimited rows"""
+    for line_number, row in enumerate(rows, 1):
+        location = f"{path}:{line_number}"
+        if not row or (len(row) == 1 and not row[0].strip()):
+            continue
+        if line_number == 1 and tuple(c.strip().lower() for c in row) in HEADER_ROWS:
+            continue
+        if len(row) != 2:
+            yield None, f"expected 2 columns, got {len(row)}", location
+            continue
+        yield row[0], row[1], location
+
+
+def iter_tsv_entries(path):
+    """Stream entries from a TSV file (source<TAB>target per line)"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = (line.rstrip("\r\n").split("\t") for line in f)
+        yield from _iter_rows(path, rows)
+
+
+def iter_csv_entries(path):
+    """Stream entries from a CSV file (source,target per row)"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from _iter_rows(path, csv.reader(f))
+
+
+def _json_entry(item, location):
+    """Turn a JSON item ([s, t] or {"source": s, "target": t}) into an entry"""
+    if isinstance(item, dict) and "source" in item and "target" in item:
+        return item["source"], item["target"], location
+    if isinstance(item, (list, tuple)) and len(item) == 2:
+        return item[0], item[1], location
+    return None, 'expected [source, target] or {"source": ..., "target": ...}', location
+
+
+def iter_jsonl_entries(path):
+    """Stream entries from a JSON Lines file, one entry per line"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield _json_entry(json.loads(line), f"{path}:{line_number}")
+
+
+def iter_json_entries(path):
+    """Read entries from a JSON file
+
+    Accepts {"source": "target", ...} (duplicate keys are kept so they can
+    be reported) or a list of entries. The standard library has no
+    streaming JSON parser, so use TSV/CSV/JSON Lines for very large files.
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        data = json.load(f, object_pairs_hook=lambda pairs: pairs)
+
+    if isinstance(data, list) and all(isinstance(p, tuple) for p in data):
+        # A top-level object: list of (key, value) pairs from the hook
+        for source, target in data:
+            yield source, target, f"{path}:{source!r}"
+        return
+
+    for i, item in enumerate(data):
+        if isinstance(item, list) and all(isinstance(p, tuple) for p in item):
+            item = dict(item)
+        yield _json_entry(item, f"{path}[{i}]")
+
+
+def iter_store_entries(path):
+    """Stream entries from a compiled term store"""
+    with term_store.TermStore(path) as store:
+        for source, target in store.iter_items():
+            yield source, target, f"{path}:{source!r}"
+
+
+READERS = {
+    ".tsv": iter_tsv_entries,
+    ".txt": iter_tsv_entries,
+    ".csv": iter_csv_entries,
+    ".json": iter_json_entries,
+    ".jsonl": iter_jsonl_entries,
+    term_store.STORE_SUFFIX: iter_store_entries,
+}
+
+
+def iter_file_entries(path):
+    """Stream (source, target, location) entries from one term file
+
+    Malformed rows are yielded as (None, error message, location).
+    """
+    reader = READERS.get(Path(path).suffix.lower())
+    if reader is None:
+        raise ValueError(f"Unsupported term file type: {path} "
+                         f"(use {', '.join(sorted(READERS))})")
+    yield from reader(path)
+
+
+# ==================== Loading ====================
+
+def iter_valid_entries(patterns, validator):
+    """Stream validated (source, target) entries from files and globs"""
+    for path in expand_patterns(patterns):
+        for source, target, location in iter_file_entries(path):
+            if source is None:
+                validator.error(location, target)
+                continue
+            if not isinstance(source, str) or not isinstance(target, str):
+                validator.error(location, "terms must be strings")
+                continue
+            if validator.check(source, target, location):
+                yield source, target
+
+
+def load_terms(patterns, max_bytes=DEEPL_GLOSSARY_MAX_BYTES):
+    """Load and validate terms from files and globs in one pass
+
+    Returns:
+        tuple: (terms dict, TermValidator with the collected issues)
+        For a single compiled store the TermStore itself is returned
+        instead of a dict, without reading its entries.
+    """
+    validator = TermValidator(max_bytes)
+    paths = expand_patterns(patterns)
+    if len(paths) == 1 and term_store.is_store(paths[0]):
+        store = term_store.TermStore(paths[0])
+        validator.entries = len(store)
+        validator.upload_bytes = store.tsv_bytes
+        if store.tsv_bytes > max_bytes:
+            validator.error(str(paths[0]), f"glossary exceeds DeepL's size limit of "
+                                           f"{max_bytes} bytes")
+        return store, validator
+
+    terms = dict(iter_valid_entries(patterns, validator))
+    return terms, validator
+
+
+def print_validation_report(validator):
+    """Print the result of a validation pass"""
+    print(f"\n📊 Entries: {validator.entries} "
+          f"(duplicates skipped: {validator.duplicates})")
+    print(f"📦 Upload size: {validator.upload_bytes} / {validator.max_bytes} bytes "
+          f"({validator.upload_bytes / validator.max_bytes * 100:.1f}%)")
+
+    for label, issues in (("❌ Errors", validator.errors),
+                          ("⚠️  Warnings", validator.warnings)):
+        if not issues:
+            continue
+        print(f"\n{label} ({len(issues)}):")
+        for location, message in issues[:MAX_REPORTED_ISSUES]:
+            print(f"  {location}: {message}")
+        if len(issues) > MAX_REPORTED_ISSUES:
+            print(f"  ... and {len(issues) - MAX_REPORTED_ISSUES} more")
+
+    if validator.ok:
+        print("\n✅ Terms are valid")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Term Scanner
+Find which glossary terms occur in a set of documents before translating.
+
+All terms are compiled once into an Aho-Corasick automaton, so scanning
+is linear in the length of the text whatever the number of terms.
+Matches respect word boundaries and prefer the longest term at each
+position ("large language models" wins over "large language model").
+Matching is case-sensitive by default, as DeepL glossaries are.
+
+Usage:
+    python term_scanner.py paper1.txt paper2.md
+    python term_scanner.py --terms 'terms/*.tsv' --json report.json corpus/*.txt
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter, deque
+
+from terms import TERMS
+
+
+# Scripts written without spaces between words: no word boundaries apply
+CJK_RANGES = (
+    ("\u3040", "\u30ff"),  # Hiragana, Katakana
+    ("\u3400", "\u4dbf"),  # CJK Extension A
+    ("\u4e00", "\u9fff"),  # CJK Unified Ideographs
+    ("\uf900", "\ufaff"),  # CJK Compatibility Ideographs
+)
+
+
+def is_word_char(char):
+    """Characters that continue a word (term boundaries must not touch one)"""
+    if not (char.isalnum() or char == "_"):
+        return False
+    return not any(low <= char <= high for low, high in CJK_RANGES)
+
+
+class TermAutomaton:
+    """Aho-Corasick automaton over a set of terms"""
+
+    def __init__(self, terms, case_sensitive=True):
+        self.case_sensitive = case_sensitive
+        self.terms = []
+        self.goto = [{}]
+        self.fail = [0]
+        # Longest term ending at each state, following failure links
+        self.output = [None]
+        # Longest term that is exactly the path to each state
+        self._own = [None]
+
+        for term in dict.fromkeys(terms):
+            if term:
+                self._add(term)
+        self._build()
+
+    def _normalize(self, text):
+        """Case-fold per character, keeping offsets aligned with the text"""
+        if self.case_sensitive:
+            return text
+        return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+    def _add(self, term):
+        term_index = len(self.terms)
+        self.terms.append(term)
+        key = self._normalize(term)
+
+        state = 0
+        for char in key:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self._own.append(None)
+            state = next_state
+        self._own[state] = (term_index, len(key))
+
+    def _build(self):
+        """Compute failure links and outputs breadth-first"""
+        queue = deque()
+        for state in self.goto[0].values():
+            self.output[state] = self._own[state]
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+
+                # The own term of a state is always the longest ending there
+                self.output[next_state] = self._own[next_state] or self.output[self.fail[next_state]]
+                queue.append(next_state)
+
+    def _iter_candidates(self, text):
+        """Yield (start, end, term_index) for every match at word boundaries
+
+        Terms ending at the same position are reached from the longest to
+        the shortest through the failure chain.
+        """
+        key = self._normalize(text)
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+
+        state = 0
+        for position, char in enumerate(key):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            match_state = state
+            end = position + 1
+            while match_state:
+                found = output[match_state]
+                if found is None:
+                    break
+                term_index, length = found
+                start = end - length
+                if ((start == 0 or not is_word_char(text[start - 1])
+                        or not is_word_char(text[start]))
+                        and (end == len(text) or not is_word_char(text[end])
+                             or not is_word_char(text[end - 1]))):
+                    yield start, end, term_index
+                # Try the next shorter term ending here
+                match_state = self._shorter(match_state, length)
+
+    def _shorter(self, state, length):
+        """State whose output is the next shorter term than length"""
+        state = self.fail[state]
+        while state and (self.output[state] is None or self.output[state][1] >= length):
+            state = self.fail[state]
+        return state
+
+    def find(self, text):
+        """Return non-overlapping (start, end, term) matches, longest first
+
+        Overlaps are resolved left to right, preferring the longer term
+        when two matches start at the same position.
+        """
+        candidates = sorted(self._iter_candidates(text),
+                            key=lambda m: (m[0], -(m[1] - m[0])))
+        matches = []
+        last_end = 0
+        for start, end, term_index in candidates:
+            if start >= last_end:
+                matches.append((start, end, self.terms[term_index]))
+                last_end = end
+        return matches
+
+
+# ==================== Corpus Scanning ====================
+
+def iter_segments(paths):
+    """Stream (location, segment) pairs: one non-empty line per segment"""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                segment = line.strip()
+                if segment:
+                    yield f"{path}:{line_number}", segment
+
+
+def scan_segments(segments, automaton):
+    """Scan (location, text) segments and collect coverage statistics
+
+    Returns a dict with per-term counts, per-segment hits, the locations
+    of segments without any term, and the terms that never occur.
+    """
+    counts = Counter()
+    segment_hits = []
+    term_free = []
+    total = 0
+
+    for location, text in segments:
+        total += 1
+        found = [term for _, _, term in automaton.find(text)]
+        if found:
+            counts.update(found)
+            segment_hits.append({"location": location, "terms": found})
+        else:
+            term_free.append(location)
+
+    return {
+        "segments": total,
+        "segments_with_terms": len(segment_hits),
+        "term_counts": dict(counts.most_common()),
+        "segment_hits": segment_hits,
+        "term_free_segments": term_free,
+        "unused_terms": [t for t in automaton.terms if t not in counts],
+    }
+
+
+def print_scan_report(report):
+    """Print a coverage summary"""
+    print("\n" + "=" * 60)
+    print("📊 Term Coverage Report")
+    print("=" * 60)
+    print(f"Segments: {report['segments']} "
+          f"({report['segments_with_terms']} with terms, "
+          f"{len(report['term_free_segments'])} term-free)")
+
+    print(f"\n🔤 Term occurrences ({len(report['term_counts'])} terms found):")
+    for term, count in report["term_counts"].items():
+        print(f"  {count:>6}  {term}")
+
+    if report["unused_terms"]:
+        print(f"\n💤 Terms never found ({len(report['unused_terms'])}):")
+        for term in report["unused_terms"]:
+            print(f"  - {term}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan documents for glossary terms")
+    parser.add_argument("files", nargs="+", help="Plain text / Markdown files (one segment per line)")
+    parser.add_argument("--terms", action="append", metavar="FILE",
+                        help="Load terms from TSV/CSV/JSON files or globs instead of TERMS")
+    parser.add_argument("--ignore-case", action="store_true",
+                        help="Match terms case-insensitively")
+    parser.add_argument("--json", metavar="FILE", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    terms = TERMS
+    if args.terms:
+        import term_loader
+
+        terms, validator = term_loader.load_terms(args.terms)
+        if not validator.ok:
+            term_loader.print_validation_report(validator)
+            sys.exit(1)
+
+    automaton = TermAutomaton(terms, case_sensitive=not args.ignore_case)
+    report = scan_segments(iter_segments(args.files), automaton)
+    print_scan_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Compiled Term Store
+A compact binary file of glossary terms that is memory-mapped instead of
+parsed, for glossaries with millions of entries.
+
+A dict of str -> str costs well over 100 bytes per entry and re-reading
+TSV files takes seconds at that size. The store is built once from the
+term files and opened in milliseconds; only the pages a lookup or scan
+touches are read from disk.
+
+Layout (little-endian, sections 8-byte aligned):
+
+    header      magic, format version, entry/string/slot counts, the TSV
+                upload size and the offset of each section
+    offsets     uint32 end offset of every string in the blob
+    blob        UTF-8 strings, each distinct string stored once (a target
+                used by many sources, or "LLM" -> "LLM", costs nothing extra)
+    entries     (source string id, target string id) uint32 pairs, sorted
+                by source term: the canonical TSV order
+    index       open-addressing hash table of entry numbers (+1, 0 = empty)
+                over the source terms, at most half full
+
+TermStore is a read-only Mapping, so it can be used wherever TERMS is:
+len(), iteration in sorted order, store[source], `in`, items().
+
+Usage:
+    python term_store.py build 'terms/*.tsv' -o terms.termstore
+    python term_store.py info terms.termstore
+    python glossary_manager.py --terms terms.termstore sync
+
+    store = TermStore("terms.termstore")
+    store["policy"], len(store), list(itertools.islice(store.items(), 5))
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import ItemsView, Mapping
+from pathlib import Path
+
+STORE_SUFFIX = ".termstore"
+
+MAGIC = b"DGTS"
+FORMAT_VERSION = 1
+
+# magic, version, flags, entries, strings, index slots, TSV bytes,
+# then the offsets of the offsets, blob, entries and index sections
+HEADER = struct.Struct("<4sHHIIIQQQQQ")
+
+# Index slots per entry (at least); more slots mean shorter probe chains
+INDEX_LOAD = 2
+
+_UINT32_MAX = 2 ** 32 - 1
+
+
+def _hash(data):
+    """64-bit hash of a UTF-8 source term, the same on every platform"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+# ==================== Building ====================
+
+def build_store(entries, path):
+    """Compile (source, target) pairs (or a dict) into a store file
+
+    Later duplicates of a source term replace earlier ones; validate the
+    entries first (term_loader) to report them. The file is written
+    atomically. Returns a dict with entries, strings and size in bytes.
+    """
+    if isinstance(entries, Mapping):
+        entries = entries.items()
+    terms = dict(entries)
+    sources = sorted(terms)
+
+    ids = {}
+    blob = bytearray()
+    offsets = array("I")
+    pairs = array("I")
+    tsv_bytes = 0
+
+    def intern(text):
+        string_id = ids.get(text)
+        if string_id is None:
+            string_id = ids[text] = len(offsets)
+            blob.extend(text.encode("utf-8"))
+            offsets.append(len(blob))
+        return string_id
+
+    for source in sources:
+        target = terms[source]
+        pairs.append(intern(source))
+        pairs.append(intern(target))
+        # source<TAB>target plus the newline separating entries
+        tsv_bytes += len(source.encode("utf-8")) + len(target.encode("utf-8")) + 2
+    if len(blob) > _UINT32_MAX:
+        raise ValueError("term store strings exceed 4 GB")
+
+    slots = 8
+    while slots < len(sources) * INDEX_LOAD:
+        slots *= 2
+    index = array("I", bytes(4 * slots))
+    mask = slots - 1
+    for entry, source in enumerate(sources):
+        slot = _hash(source.encode("utf-8")) & mask
+        while index[slot]:
+            slot = (slot + 1) & mask
+        index[slot] = entry + 1
+
+    sections = [_little_endian(offsets), bytes(blob), _little_endian(pairs), _little_endian(index)]
+    positions = []
+    position = HEADER.size
+    for data in sections:
+        position = _align(position)
+        positions.append(position)
+        position += len(data)
+
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sources), len(offsets), slots,
+                            tsv_bytes, *positions))
+        for start, data in zip(positions, sections):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, path)
+
+    return {"entries": len(sources), "strings": len(offsets), "bytes": position}
+
+
+# ==================== Reading ====================
+
+class _Items(ItemsView):
+    def __iter__(self):
+        return self._mapping.iter_items()
+
+
+class TermStore(Mapping):
+    """Read-only memory-mapped mapping of source terms to target terms"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (magic, version, _flags, self._count, strings, self._slots, self.tsv_bytes,
+             offsets_at, self._blob_at, entries_at, index_at) = HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic, version = None, None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} term store")
+
+        self._views = []
+        self._offsets = self._array(offsets_at, strings)
+        self._entries = self._array(entries_at, 2 * self._count)
+        self._index = self._array(index_at, self._slots)
+
+    def _array(self, offset, length):
+        """uint32 section as a zero-copy view (copied on big-endian hosts)"""
+        view = memoryview(self._mm)[offset:offset + 4 * length]
+        if sys.byteorder == "little":
+            values = view.cast("I")
+            self._views.extend((view, values))
+            return values
+        values = array("I", view)
+        values.byteswap()
+        view.release()
+        return values
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the views and unmap the file"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mm.close()
+
+    def _bytes(self, string_id):
+        start = self._offsets[string_id - 1] if string_id else 0
+        return self._mm[self._blob_at + start:self._blob_at + self._offsets[string_id]]
+
+    def _string(self, string_id):
+        return self._bytes(string_id).decode("utf-8")
+
+    def _find(self, source):
+        """Entry number of a source term, or -1"""
+        if not isinstance(source, str):
+            return -1
+        key = source.encode("utf-8")
+        mask = self._slots - 1
+        slot = _hash(key) & mask
+        while True:
+            entry = self._index[slot]
+            if not entry:
+                return -1
+            if self._bytes(self._entries[2 * (entry - 1)]) == key:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, source):
+        entry = self._find(source)
+        if entry < 0:
+            raise KeyError(source)
+        return self._string(self._entries[2 * entry + 1])
+
+    def __contains__(self, source):
+        return self._find(source) >= 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for entry in range(self._count):
+            yield self._string(self._entries[2 * entry])
+
+    def items(self):
+        return _Items(self)
+
+    def iter_items(self):
+        """(source, target) pairs in sorted source order"""
+        entries = self._entries
+        for entry in range(self._count):
+            yield self._string(entries[2 * entry]), self._string(entries[2 * entry + 1])
+
+    def stats(self):
+        """Entry, string and byte counts of the store"""
+        return {
+            "entries": self._count,
+            "strings": len(self._offsets),
+            "index_slots": self._slots,
+            "tsv_bytes": self.tsv_bytes,
+            "bytes": len(self._mm),
+        }
+
+
+def is_store(path):
+    """Whether a path names a compiled term store (by its suffix)"""
+    return Path(path).suffix.lower() == STORE_SUFFIX
+
+
+# ==================== Main ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect a compiled term store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Compile term files (default: TERMS)")
+    build_parser.add_argument("files", nargs="*", help="TSV/CSV/JSON term files or globs")
+    build_parser.add_argument("--output", "-o", default=f"terms{STORE_SUFFIX}",
+                              help=f"Store file (default: terms{STORE_SUFFIX})")
+    info_parser = subparsers.add_parser("info", help="Show the size of a store and time opening it")
+    info_parser.add_argument("store")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        import term_loader
+        from terms import TERMS
+
+        start = time.perf_counter()
+        if args.files:
+            terms, validator = term_loader.load_terms(args.files)
+            term_loader.print_validation_report(validator)
+            if not validator.ok:
+                sys.exit(1)
+        else:
+            terms = TERMS
+        stats = build_store(terms, args.output)
+        print(f"\n📦 {args.output}: {stats['entries']:,} entries, {stats['strings']:,} distinct "
+              f"strings, {stats['bytes']:,} bytes ({time.perf_counter() - start:.2f}s)")
+        return
+
+    start = time.perf_counter()
+    with TermStore(args.store) as store:
+        elapsed = time.perf_counter() - start
+        stats = store.stats()
+    per_entry = stats["bytes"] / stats["entries"] if stats["entries"] else 0
+    print(f"📦 {args.store}: {stats['entries']:,} entries, {stats['strings']:,} distinct strings")
+    print(f"💾 {stats['bytes']:,} bytes ({per_entry:.1f} per entry), "
+          f"{stats['tsv_bytes']:,} bytes as TSV")
+    print(f"⚡ Opened in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
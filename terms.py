@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Glossary Terms
+The TERMS dictionary and lightweight helpers for glossary entries.
+Importing this module needs no API key and no network libraries.
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import hashlib
+from collections.abc import Mapping
+
+# ==================== Terms Configuration ====================
+# Format: "English term": "Chinese translation" or "English term": "English term" (to keep English)
+#
+# Two types of terms:
+# 1. Keep English: "LLM": "LLM"
+# 2. Translate to Chinese: "policy": "策略"
+
+TERMS = {
+    # ========== Keep English (Abbreviations and Proper Nouns) ==========
+    "LLM": "LLM",
+    "LLMs": "LLM",
+    "GPT": "GPT",
+    "API": "API",
+    "NLP": "NLP",
+
+    # ========== Translate to Chinese (Full Terms) ==========
+    "large language model": "大语言模型",
+    "large language models": "大语言模型",
+    "reinforcement learning": "强化学习",
+    "embodied AI": "具身智能",
+    "embodied decision making": "具身决策",
+    "policy": "策略",
+    "reward": "奖励",
+    "agent": "agent",  # Keep English or change to "智能体"
+    "environment": "环境",
+    "state": "状态",
+    "action": "动作",
+    "Markov Decision Process": "马尔可夫决策过程",
+    "MDP": "马尔可夫决策过程",
+    "Q-learning": "Q学习",
+    "actor-critic": "演员-评论家",
+    "imitation learning": "模仿学习",
+    "demonstration": "演示",
+    "trajectory": "轨迹",
+    "visuomotor control": "视觉-运动控制",
+    "multimodal": "多模态",
+}
+
+# ==================== Helpers ====================
+
+def canonical_tsv(entries):
+    """Build the canonical TSV for a set of entries
+
+    entries may be a dict (or other mapping, such as a TermStore) or an
+    iterable of (source, target) pairs.
+    Entries are sorted by source term so the same terms always give the
+    same text, whatever order they were defined or returned in.
+    """
+    if isinstance(entries, Mapping):
+        entries = entries.items()
+    return "\n".join(f"{source}\t{target}" for source, target in sorted(entries))
+
+
+def parse_tsv(text):
+    """Parse glossary TSV (as returned by DeepL) into (source, target) pairs"""
+    entries = []
+    for line in text.split("\n"):
+        if "\t" in line:
+            source, target = line.rstrip("\r").split("\t", 1)
+            entries.append((source, target))
+    return entries
+
+
+def iter_tsv_chunks(chunks):
+    """Stream (source, target) pairs from glossary TSV arriving in text chunks
+
+    Lines may span chunks. Like parse_tsv, lines are split on \n only, so
+    Unicode line separators (U+2028, U+0085) inside terms are kept.
+    """
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if "\t" in line:
+                source, target = line.rstrip("\r").split("\t", 1)
+                yield source, target
+    if "\t" in pending:
+        source, target = pending.rstrip("\r").split("\t", 1)
+        yield source, target
+
+
+def entries_hash(entries):
+    """SHA-256 of the canonical TSV, identifying a glossary by its content"""
+    return hashlib.sha256(canonical_tsv(entries).encode("utf-8")).hexdigest()
@@ -4,22 +4,78 @@ DeepL Glossary 翻译测试脚本
 测试术语表是否正确应用到翻译结果中
 """
 
-import requests
-import os
+import argparse
+import asyncio
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import instrumentation
+from concurrency import AdaptiveLimiter
+from glossary_registry import GlossaryRegistry, DEFAULT_REGISTRY_PATH
+import profiling
+import quota
+from deepl_client import get_client
+from term_compliance import ComplianceChecker, check_segments, highlight
+from term_scanner import TermAutomaton
+from terms import TERMS, entries_hash, parse_tsv
+from translation_cache import TranslationCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES
+from translation_memory import TranslationMemory, DEFAULT_MEMORY_PATH
 
 # ==================== 配置区 ====================
 
 # 你的 DeepL API Key
-API_KEY = os.environ["API_KEY"]
+# None 表示首次调用 API 时再读取: --api-key、环境变量 API_KEY 或配置文件 (见 config.py)
+API_KEY = None
 
 # 选择 API 端点
-API_BASE_URL = "https://api-free.deepl.com"
+# None 表示根据密钥自动选择 (免费版密钥以 ':fx' 结尾)，也可在配置文件中设置
+API_BASE_URL = None
 
 # 你的 Glossary ID (从管理脚本中获取)
 # 如果不知道，设置为 None，脚本会自动获取第一个
 GLOSSARY_ID = None  # 例如: "abc123-def456-ghi789"
 
+# HTTP 设置: (连接, 读取) 超时秒数, 以及 429/5xx 的重试次数
+HTTP_TIMEOUT = (10, 60)
+HTTP_MAX_RETRIES = 5
+
+# 并发模式: 同时进行的最大请求数 (None 表示顺序执行)
+# 也可以通过命令行参数 --concurrency 设置
+CONCURRENCY = None
+
+# 自适应并发: 从少量并发请求开始，响应正常时逐步增加，遇到 429/503 或
+# Retry-After 时减半 (见 concurrency.py)，此时 CONCURRENCY 为并发上限
+# False 表示始终使用 CONCURRENCY 个并发请求
+ADAPTIVE_CONCURRENCY = True
+
+# 翻译缓存 (SQLite): 重复运行相同语料时直接使用缓存结果，不再消耗字符额度
+# 缓存键包含原文、语言对和术语表内容哈希；可用 --no-cache 临时跳过
+USE_CACHE = True
+CACHE_PATH = DEFAULT_CACHE_PATH
+CACHE_MAX_ENTRIES = DEFAULT_MAX_ENTRIES
+
+# 翻译记忆 (SQLite): 保存 (原文, 术语表哈希, 译文)，用 MinHash 索引查找相似句子
+# 缓存未命中时先查询翻译记忆: 完全相同 (忽略空白差异) 的句子直接复用译文；
+# 相似度不低于 MEMORY_REUSE_SCORE 的句子也复用 (None 表示只复用完全相同的句子)；
+# 相似度不低于 MEMORY_MIN_SCORE 的句子在报告中列出供参考。可用 --no-memory 跳过
+USE_MEMORY = True
+MEMORY_PATH = DEFAULT_MEMORY_PATH
+MEMORY_MIN_SCORE = 0.75
+MEMORY_REUSE_SCORE = None
+
+# glossary_manager.py 的术语表登记库: 已登记的术语表直接使用其中的内容哈希
+REGISTRY_PATH = DEFAULT_REGISTRY_PATH
+
+# 字符额度保护: 自动测试前查询 /v2/usage，并预估本次消耗 (已去重、扣除缓存命中)
+# 超出可用额度时先跳过对照翻译 (不使用术语表)，仍不够则拒绝运行
+# QUOTA_BUDGET: 单次运行最多消耗的字符数 (None 表示不限)
+# QUOTA_RESERVE: 额度中始终保留、不允许测试消耗的字符数
+CHECK_QUOTA = True
+QUOTA_BUDGET = None
+QUOTA_RESERVE = 0
+
 # ==================== 测试用例 ====================
 
 # 测试文本 - 这些应该包含你的术语表中的专业术语
@@ -64,13 +120,119 @@ TEST_CASES = [
 
 # ==================== 主程序 ====================
 
+def get_api_client():
+    """返回共享的 DeepL 客户端 (复用连接池)"""
+    global API_KEY, API_BASE_URL
+    API_KEY = config.resolve_api_key(API_KEY)
+    API_BASE_URL = config.resolve_api_base_url(API_KEY, API_BASE_URL)
+    return get_client(API_KEY, API_BASE_URL,
+                      timeout=HTTP_TIMEOUT,
+                      max_retries=HTTP_MAX_RETRIES,
+                      limiter_factory=lambda: AdaptiveLimiter() if ADAPTIVE_CONCURRENCY else None)
+
+
+_cache = None
+_memory = None
+_memory_suggestions = {}
+_glossary_hashes = {}
+
+
+def get_cache():
+    """返回共享的翻译缓存"""
+    global _cache
+    if _cache is None:
+        _cache = TranslationCache(CACHE_PATH, CACHE_MAX_ENTRIES, enabled=USE_CACHE)
+    return _cache
+
+
+def get_memory():
+    """返回共享的翻译记忆"""
+    global _memory
+    if _memory is None:
+        _memory = TranslationMemory(MEMORY_PATH, enabled=USE_MEMORY)
+    return _memory
+
+
+def get_glossary_hash(glossary_id):
+    """获取术语表的内容哈希 (按条目计算，重建相同术语表时不变)
+
+    glossary_manager.py 创建的术语表在本地登记库中已有哈希，无需请求 API。
+    """
+    if glossary_id not in _glossary_hashes and os.path.exists(REGISTRY_PATH):
+        with GlossaryRegistry(REGISTRY_PATH) as registry:
+            recorded = registry.entries_hash(glossary_id)
+        if recorded:
+            _glossary_hashes[glossary_id] = recorded
+    if glossary_id not in _glossary_hashes:
+        response = get_api_client().get(
+            f"/v2/glossaries/{glossary_id}/entries",
+            headers={"Accept": "text/tab-separated-values"}
+        )
+        response.raise_for_status()
+        # 与登记库、代理相同，只按 \n 分行 (parse_tsv)，哈希才能一致
+        _glossary_hashes[glossary_id] = entries_hash(parse_tsv(response.text))
+    return _glossary_hashes[glossary_id]
+
+
+def lookup_cache(texts, glossary_id):
+    """查询缓存和翻译记忆，返回 (结果列表, 缓存键, 未命中的下标)
+
+    缓存未命中的文本再查询翻译记忆: 可复用的匹配直接填入结果，
+    其余相似句子记录下来，供 memory_suggestion 在报告中显示。
+    """
+    glossary_hash = get_glossary_hash(glossary_id) if glossary_id else None
+    keys = [TranslationCache.make_key(text, "EN", "ZH", glossary_hash)
+            for text in texts]
+    cached = get_cache().get_many(keys)
+
+    results = [cached.get(key) for key in keys]
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if not missing:
+        return results, keys, missing
+
+    matches = get_memory().lookup_many([texts[i] for i in missing], "EN", "ZH",
+                                       glossary_hash, MEMORY_MIN_SCORE)
+    still_missing = []
+    for i, match in zip(missing, matches):
+        if match and (match['exact'] or (MEMORY_REUSE_SCORE is not None
+                                         and match['score'] >= MEMORY_REUSE_SCORE)):
+            results[i] = match['translation']
+            continue
+        if match:
+            _memory_suggestions[(texts[i], glossary_hash)] = match
+        still_missing.append(i)
+    return results, keys, still_missing
+
+
+def store_cache(results, keys, missing, translations, texts=None, glossary_id=None):
+    """把新译文填入结果列表，写入缓存和翻译记忆 (需要 texts)"""
+    for i, translation in zip(missing, translations):
+        results[i] = translation
+    get_cache().put_many((keys[i], results[i]) for i in missing)
+    if texts is not None:
+        glossary_hash = get_glossary_hash(glossary_id) if glossary_id else None
+        get_memory().add_many(((texts[i], results[i]) for i in missing), "EN", "ZH",
+                              glossary_hash)
+    return results
+
+
+def memory_suggestion(text, glossary_id):
+    """翻译记忆中与 text 相似 (但未复用) 的句子，没有则返回 None"""
+    glossary_hash = get_glossary_hash(glossary_id) if glossary_id else None
+    return _memory_suggestions.get((text, glossary_hash))
+
+
+def print_memory_suggestion(text, glossary_id):
+    match = memory_suggestion(text, glossary_id)
+    if match:
+        print(f"    📚 翻译记忆相似句 (相似度 {match['score']*100:.0f}%): {match['source']}")
+        print(f"       → {match['translation']}")
+
+
 def get_first_glossary():
     """自动获取第一个可用的术语表"""
-    url = f"{API_BASE_URL}/v2/glossaries"
-    headers = {"Authorization": f"DeepL-Auth-Key {API_KEY}"}
-
     try:
-        response = requests.get(url, headers=headers)
+        response = get_api_client().get("/v2/glossaries")
         response.raise_for_status()
 
         glossaries = response.json().get("glossaries", [])
@@ -95,47 +257,164 @@ def get_first_glossary():
         return None
 
 
-def translate_text(text, use_glossary=True, glossary_id=None):
-    """翻译文本，可选择是否使用术语表"""
-    url = f"{API_BASE_URL}/v2/translate"
-    headers = {
-        "Authorization": f"DeepL-Auth-Key {API_KEY}",
-        "Content-Type": "application/json"
-    }
+def translate_texts(texts, use_glossary=True, glossary_id=None, lookup=None):
+    """批量翻译多段文本，按原顺序返回译文
 
-    payload = {
-        "text": [text],
-        "source_lang": "EN",
-        "target_lang": "ZH"
-    }
+    文本会按 DeepL 单次请求的条数和大小上限打包发送，
+    N 段文本只需约 N/50 次请求，重复文本只翻译一次。
+    lookup 为已有的 lookup_cache 结果 (可省略)。失败时返回全为 None 的列表。
+    """
+    texts = list(texts)
 
     # 如果使用术语表，添加 glossary_id
-    if use_glossary and glossary_id:
-        payload["glossary_id"] = glossary_id
+    if not use_glossary:
+        glossary_id = None
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-
-        result = response.json()
-        return result["translations"][0]["text"]
+        results, keys, missing = lookup or lookup_cache(texts, glossary_id)
+        translations = get_api_client().translate_texts(
+            [texts[i] for i in missing],
+            source_lang="EN",
+            target_lang="ZH",
+            glossary_id=glossary_id
+        )
+        return store_cache(results, keys, missing, translations, texts, glossary_id)
 
     except Exception as e:
         print(f"❌ 翻译失败: {e}")
-        return None
+        return [None] * len(texts)
+
+
+async def translate_cases_async(texts, glossary_id, concurrency, lookups=None,
+                                with_baseline=True):
+    """并发翻译: 同时发出不使用/使用术语表的全部请求
+
+    两组请求共用一个并发上限，返回 (不使用术语表译文, 使用术语表译文)，
+    均按原顺序排列。某一组失败或被跳过 (with_baseline=False) 时，
+    该组返回全为 None 的列表。lookups 为两组已有的 lookup_cache 结果 (可省略)。
+    """
+    texts = list(texts)
+    client = get_api_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # 先查缓存，只并发翻译未命中的文本
+    if lookups is None:
+        lookups = []
+        for variant_glossary_id in (None, glossary_id):
+            try:
+                lookups.append(lookup_cache(texts, variant_glossary_id))
+            except Exception as e:
+                lookups.append(e)
+
+    # 每个并发请求占用一个线程 (默认线程池可能小于 concurrency)；
+    # 线程池只用于本次调用，结束时关闭
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def translate_variant(lookup, variant_glossary_id):
+        if isinstance(lookup, Exception):
+            raise lookup
+        results, keys, missing = lookup
+        translations = await client.translate_texts_async(
+            [texts[i] for i in missing],
+            source_lang="EN",
+            target_lang="ZH",
+            glossary_id=variant_glossary_id,
+            semaphore=semaphore,
+            executor=executor
+        )
+        return store_cache(results, keys, missing, translations, texts,
+                           variant_glossary_id)
+
+    async def skip_variant():
+        return [None] * len(texts)
+
+    with executor:
+        results = await asyncio.gather(
+            translate_variant(lookups[0], None) if with_baseline else skip_variant(),
+            translate_variant(lookups[1], glossary_id),
+            return_exceptions=True
+        )
+
+    translations = []
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"❌ 翻译失败: {result}")
+            result = [None] * len(texts)
+        translations.append(result)
+    return translations[0], translations[1]
+
+
+def translate_text(text, use_glossary=True, glossary_id=None):
+    """翻译文本，可选择是否使用术语表"""
+    return translate_texts([text], use_glossary, glossary_id)[0]
+
+
+def plan_quota(texts, glossary_id):
+    """预估字符消耗并按额度决定运行、缩减或拒绝
+
+    返回 (额度计划, [不使用术语表, 使用术语表] 两组 lookup_cache 结果)，
+    查询结果可直接传给翻译函数，避免重复查询缓存。
+    """
+    lookups = [lookup_cache(texts, None), lookup_cache(texts, glossary_id)]
+    parts = [
+        quota.make_part("对照翻译 (不使用术语表)", [texts[i] for i in lookups[0][2]], optional=True),
+        quota.make_part("术语表翻译", [texts[i] for i in lookups[1][2]]),
+    ]
+
+    usage = None
+    if CHECK_QUOTA:
+        try:
+            usage = quota.fetch_usage(get_api_client())
+        except Exception as e:
+            print(f"⚠️  查询字符额度失败，仅按预算检查: {e}")
+
+    plan = quota.plan_job(parts, usage, QUOTA_BUDGET, QUOTA_RESERVE)
+    print_quota_plan(plan)
+    return plan, lookups
+
+
+def print_quota_plan(plan):
+    """显示预估消耗和额度决定"""
+    print(f"\n💰 字符额度:")
+    usage = plan['usage']
+    if usage is not None:
+        remaining = usage['character_limit'] - usage['character_count']
+        print(f"    本月已用: {usage['character_count']:,} / {usage['character_limit']:,} "
+              f"(剩余 {remaining:,})")
+    if plan['available'] is not None:
+        print(f"    本次可用: {plan['available']:,}")
+    print(f"    本次预估: {plan['total']:,} 字符 (已去重并扣除缓存命中)")
+
+    if plan['decision'] == 'run':
+        print(f"    ✅ 额度充足，全部运行")
+    elif plan['decision'] == 'shrink':
+        print(f"    ⚠️  额度不足，跳过: {', '.join(plan['dropped'])} "
+              f"(预估降至 {plan['projected']:,} 字符)")
+    else:
+        print(f"    ❌ 额度不足，拒绝运行: 至少需要 {plan['projected']:,} 字符，"
+              f"可用 {plan['available']:,}")
 
 
 def highlight_terms(text, terms):
-    """高亮显示文本中的术语（简单版）"""
-    highlighted = text
-    for term in terms:
-        if term in text:
-            highlighted = highlighted.replace(term, f"【{term}】")
-    return highlighted
+    """高亮显示文本中的术语 (不重叠，长术语优先)"""
+    return highlight(text, TermAutomaton(terms).find(text))
+
 
+def get_compliance_checker():
+    """构建术语检查器: 术语表译文和测试用例的期望术语只编译一次"""
+    expected = [term for test_case in TEST_CASES for term in test_case['expected_terms']]
+    return ComplianceChecker(TERMS, extra_targets=expected)
 
-def run_tests():
-    """运行所有测试用例"""
+
+def run_tests(concurrency=None, dry_run=False):
+    """运行所有测试用例
+
+    concurrency 为 None 时顺序翻译；否则以 asyncio 并发模式同时发出
+    全部翻译请求 (最多 concurrency 个同时进行)，再按原顺序输出报告。
+    翻译前先做字符额度检查；dry_run 为 True 时只显示预估消耗。
+    """
+    if concurrency is None:
+        concurrency = CONCURRENCY
 
     # 获取 Glossary ID
     global GLOSSARY_ID
@@ -152,6 +431,58 @@ def run_tests():
     failed = 0
     comparison_results = []  # 存储对比结果
 
+    # 额度检查: 预估本次消耗，必要时跳过对照翻译或拒绝运行
+    texts = [test_case['text'] for test_case in TEST_CASES]
+    try:
+        plan, lookups = plan_quota(texts, GLOSSARY_ID)
+    except Exception as e:
+        print(f"❌ 查询翻译缓存失败: {e}")
+        return
+    if plan['decision'] == 'refuse' or dry_run:
+        return
+    with_baseline = not plan['dropped']
+
+    # 统计实际发送的字符数
+    sent = {'characters': 0}
+
+    def count_characters(record):
+        sent['characters'] += record['characters']
+
+    instrumentation.add_hook(count_characters)
+
+    # 批量翻译所有测试用例: 不使用/使用术语表各一批
+    if concurrency:
+        limiter = get_api_client().limiter
+        mode = "自适应, 上限" if limiter is not None else "固定"
+        print(f"\n🚀 并发翻译 {len(texts)} 条测试文本 (并发数: {mode} {concurrency})...")
+        translations_without, translations_with = asyncio.run(
+            translate_cases_async(texts, GLOSSARY_ID, concurrency, lookups, with_baseline)
+        )
+        if limiter is not None:
+            s = limiter.snapshot()
+            print(f"🎚️  并发: 当前上限 {s['limit']}, 峰值 {s['peak_in_flight']} 个请求, "
+                  f"限流 {s['throttled']} 次, 降低 {s['decreases']} 次, "
+                  f"{s['throughput']:.1f} 请求/秒")
+    else:
+        print(f"\n🚀 批量翻译 {len(texts)} 条测试文本...")
+        if with_baseline:
+            translations_without = translate_texts(texts, use_glossary=False, lookup=lookups[0])
+        else:
+            translations_without = [None] * len(texts)
+        translations_with = translate_texts(texts, use_glossary=True, glossary_id=GLOSSARY_ID,
+                                            lookup=lookups[1])
+    instrumentation.remove_hook(count_characters)
+
+    # 一次性检查所有译文中的术语 (大批量时使用多进程)
+    checker = get_compliance_checker()
+    compliance = check_segments(
+        [(test_case['text'], translation or "", test_case['expected_terms'])
+         for test_case, translation in zip(TEST_CASES, translations_with)],
+        checker
+    )
+    baseline_terms = [{term for _, _, term in checker.find_targets(translation)}
+                      for translation in translations_without]
+
     for i, test_case in enumerate(TEST_CASES, 1):
         print(f"\n{'='*60}")
         print(f"[测试 {i}/{len(TEST_CASES)}] {test_case['description']}")
@@ -161,23 +492,18 @@ def run_tests():
 
         # 1️⃣ 不使用术语表翻译
         print(f"\n[1] 🚫 不使用术语表翻译:")
-        translation_without_glossary = translate_text(
-            test_case['text'],
-            use_glossary=False
-        )
+        translation_without_glossary = translations_without[i - 1]
 
-        if not translation_without_glossary:
+        if not with_baseline:
+            print("    ⏭️  已跳过 (字符额度不足)")
+        elif not translation_without_glossary:
             print("❌ 翻译失败")
         else:
             print(f"    {translation_without_glossary}")
 
         # 2️⃣ 使用术语表翻译
         print(f"\n[2] ✅ 使用术语表翻译:")
-        translation_with_glossary = translate_text(
-            test_case['text'],
-            use_glossary=True,
-            glossary_id=GLOSSARY_ID
-        )
+        translation_with_glossary = translations_with[i - 1]
 
         if not translation_with_glossary:
             print("❌ 翻译失败，跳过")
@@ -185,11 +511,15 @@ def run_tests():
             continue
         else:
             print(f"    {translation_with_glossary}")
+            print_memory_suggestion(test_case['text'], GLOSSARY_ID)
 
         # 3️⃣ 差异分析
         print(f"\n[3] 🔍 差异分析:")
 
-        if translation_without_glossary == translation_with_glossary:
+        if not with_baseline:
+            print("    ⏭️  未进行对照翻译，跳过差异分析")
+            has_difference = None
+        elif translation_without_glossary == translation_with_glossary:
             print("    ⚠️  两次翻译结果相同，术语表可能未对此文本生效")
             has_difference = False
         else:
@@ -206,18 +536,18 @@ def run_tests():
 
         # 4️⃣ 检查期望的术语是否出现
         print(f"\n[4] 📊 术语检测:")
-        found_terms = []
-        missing_terms = []
+        result = compliance[i - 1]
+        found_terms = result['found']
+        missing_terms = result['missing']
         keep_english_terms = test_case.get('keep_english', [])
 
         for term in test_case['expected_terms']:
-            if term in translation_with_glossary:
-                found_terms.append(term)
+            if term in found_terms:
                 # 判断是"保持英文"还是"翻译为中文"
                 is_keep_english = term in keep_english_terms
 
                 if translation_without_glossary:
-                    if term not in translation_without_glossary:
+                    if term not in baseline_terms[i - 1]:
                         if is_keep_english:
                             print(f"    ✅ 【{term}】- 保持英文成功 (原翻译会被翻译)")
                         else:
@@ -233,7 +563,6 @@ def run_tests():
                     else:
                         print(f"    ✅ 【{term}】- 找到")
             else:
-                missing_terms.append(term)
                 is_keep_english = term in keep_english_terms
                 if is_keep_english:
                     print(f"    ❌ 【{term}】- 未能保持英文 (可能被翻译了)")
@@ -245,11 +574,13 @@ def run_tests():
         if keep_english_terms:
             keep_english_found = [t for t in found_terms if t in keep_english_terms]
             print(f"    保持英文: {len(keep_english_found)}/{len(keep_english_terms)}")
+        for source, target in result['violated']:
+            print(f"    ⚠️  原文含 【{source}】，但译文中没有术语表译法 【{target}】")
 
         # 5️⃣ 高亮显示
         print(f"\n[5] 🎨 术语高亮显示:")
         if found_terms:
-            highlighted = highlight_terms(translation_with_glossary, found_terms)
+            highlighted = highlight(translation_with_glossary, result['spans'], set(found_terms))
             print(f"    {highlighted}")
         else:
             print(f"    {translation_with_glossary} (无术语)")
@@ -262,6 +593,10 @@ def run_tests():
             print("    ✅ 完全通过! (所有术语都匹配，且术语表生效)")
             passed += 1
             result_status = "完全通过"
+        elif test_passed and has_difference is None:
+            print("    ✅ 通过! (所有术语都匹配，未做对照翻译)")
+            passed += 1
+            result_status = "通过 (无对照)"
         elif test_passed and not has_difference:
             print("    ⚠️  术语匹配但无差异 (术语表可能未起作用)")
             result_status = "术语匹配但无差异"
@@ -283,6 +618,7 @@ def run_tests():
             "with_glossary": translation_with_glossary,
             "found_terms": found_terms,
             "missing_terms": missing_terms,
+            "violated_terms": result['violated'],
             "has_difference": has_difference,
             "status": result_status
         })
@@ -301,6 +637,8 @@ def run_tests():
         print(f"使用术语表:   {result['with_glossary']}")
         if result['has_difference']:
             print(f"✅ 术语表生效: {', '.join(['【' + t + '】' for t in result['found_terms']])}")
+        elif result['has_difference'] is None:
+            print(f"⏭️  未做对照翻译")
         else:
             print(f"⚠️  无明显差异")
         print("-" * 60)
@@ -318,6 +656,29 @@ def run_tests():
     print(f"🔄 术语表生效次数: {effective_count}/{len(TEST_CASES)}")
     print(f"📊 术语表生效率: {effective_count/len(TEST_CASES)*100:.1f}%")
 
+    # 字符消耗: 预估 vs 实际
+    print(f"💰 字符消耗: 预估 {plan['projected']:,}, 实际发送 {sent['characters']:,}", end="")
+    if plan['usage'] is not None:
+        try:
+            usage_after = quota.fetch_usage(get_api_client())
+            billed = usage_after['character_count'] - plan['usage']['character_count']
+            print(f", 额度增加 {billed:,} (/v2/usage)")
+        except Exception:
+            print()
+    else:
+        print()
+
+    # 缓存统计
+    cache_stats = get_cache().stats()
+    if cache_stats['enabled']:
+        print(f"💾 翻译缓存: 命中 {cache_stats['hits']}, 未命中 {cache_stats['misses']} "
+              f"(命中率 {cache_stats['hit_rate']*100:.1f}%, 共 {cache_stats['entries']} 条)")
+    memory_stats = get_memory().stats()
+    if memory_stats['enabled']:
+        print(f"📚 翻译记忆: 完全匹配 {memory_stats['exact_hits']}, "
+              f"相似匹配 {memory_stats['fuzzy_hits']}, 未命中 {memory_stats['misses']} "
+              f"(共 {memory_stats['entries']} 条)")
+
     if passed == len(TEST_CASES):
         print("\n🎉 所有测试通过! 术语表工作正常!")
     elif passed > 0:
@@ -362,7 +723,7 @@ def interactive_test():
 
         # 1. 不使用术语表
         print("\n[1] 🚫 不使用术语表:")
-        trans1 = translate_text(text, use_glossary=False)
+        trans1 = translate_texts([text], use_glossary=False)[0]
         if trans1:
             print(f"    译文: {trans1}")
         else:
@@ -370,9 +731,10 @@ def interactive_test():
 
         # 2. 使用术语表
         print("\n[2] ✅ 使用术语表:")
-        trans2 = translate_text(text, use_glossary=True, glossary_id=GLOSSARY_ID)
+        trans2 = translate_texts([text], use_glossary=True, glossary_id=GLOSSARY_ID)[0]
         if trans2:
             print(f"    译文: {trans2}")
+            print_memory_suggestion(text, GLOSSARY_ID)
         else:
             print("    ❌ 翻译失败")
 
@@ -408,8 +770,74 @@ def interactive_test():
         print("-" * 60)
 
 
-if __name__ == "__main__":
-    import sys
+def main():
+    """主函数"""
+    global USE_CACHE, USE_MEMORY, MEMORY_REUSE_SCORE, API_KEY
+    global CHECK_QUOTA, QUOTA_BUDGET, QUOTA_RESERVE, ADAPTIVE_CONCURRENCY
+
+    parser = argparse.ArgumentParser(description='DeepL Glossary 测试工具')
+    parser.add_argument('mode', nargs='?',
+                        choices=['auto', 'interactive'],
+                        help='直接运行指定模式 (不显示菜单)')
+    parser.add_argument('--concurrency', '-c', type=int, default=CONCURRENCY,
+                        help='自动测试的并发请求数上限 (默认顺序执行)')
+    parser.add_argument('--fixed-concurrency', action='store_true',
+                        help='始终使用 --concurrency 个并发请求，不根据 429 和延迟自动调整')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='跳过翻译缓存和翻译记忆，全部重新调用 API')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='不查询、不写入翻译记忆')
+    parser.add_argument('--memory-reuse', type=float, default=MEMORY_REUSE_SCORE, metavar='SCORE',
+                        help='复用相似度不低于 SCORE (0-1) 的翻译记忆译文 (默认只复用完全相同的句子)')
+    parser.add_argument('--budget', type=int, default=QUOTA_BUDGET,
+                        help='单次运行最多消耗的字符数 (超出时先跳过对照翻译)')
+    parser.add_argument('--reserve', type=int, default=QUOTA_RESERVE,
+                        help='额度中保留不用的字符数')
+    parser.add_argument('--no-quota-check', action='store_true',
+                        help='不查询 /v2/usage (仍按 --budget 检查)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只显示自动测试的预估字符消耗，不翻译')
+    parser.add_argument('--api-key', help='DeepL API 密钥 (默认读取环境变量 API_KEY 或配置文件)')
+    parser.add_argument('--config', help='JSON 配置文件 (api_key / api_base_url)')
+    parser.add_argument('--metrics', action='store_true', help='退出时打印 API 请求统计')
+    parser.add_argument('--metrics-log', metavar='FILE', help='每个 API 请求追加一行 JSON 记录')
+    parser.add_argument('--prometheus', metavar='FILE', help='退出时写入 Prometheus textfile 指标')
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='PREFIX',
+                        help='性能分析所选操作，写入 PREFIX-<操作>.pstats/.collapsed/.memory.txt')
+    args = parser.parse_args()
+
+    if args.no_cache:
+        USE_CACHE = False
+    if args.no_cache or args.no_memory:
+        USE_MEMORY = False
+    MEMORY_REUSE_SCORE = args.memory_reuse
+    if args.no_quota_check:
+        CHECK_QUOTA = False
+    if args.fixed_concurrency:
+        ADAPTIVE_CONCURRENCY = False
+    QUOTA_BUDGET = args.budget
+    QUOTA_RESERVE = args.reserve
+    if args.config:
+        config.set_config_file(args.config)
+    API_KEY = args.api_key or API_KEY
+    instrumentation.setup(args.metrics_log, args.prometheus, args.metrics)
+
+    try:
+        config.resolve_api_key(API_KEY)
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        return
+
+    if args.mode == 'auto':
+        instrumentation.set_command('run_tests')
+        with profiling.profiled(args.profile, 'run_tests'):
+            run_tests(args.concurrency, args.dry_run)
+        return
+    if args.mode == 'interactive':
+        instrumentation.set_command('interactive')
+        with profiling.profiled(args.profile, 'interactive'):
+            interactive_test()
+        return
 
     print("=" * 60)
     print("DeepL Glossary 测试工具")
@@ -422,10 +850,18 @@ if __name__ == "__main__":
     choice = input("\n请选择 (0-2): ").strip()
 
     if choice == "1":
-        run_tests()
+        instrumentation.set_command('run_tests')
+        with profiling.profiled(args.profile, 'run_tests'):
+            run_tests(args.concurrency, args.dry_run)
     elif choice == "2":
-        interactive_test()
+        instrumentation.set_command('interactive')
+        with profiling.profiled(args.profile, 'interactive'):
+            interactive_test()
     elif choice == "0":
         print("👋 再见!")
     else:
         print("❌ 无效选项")
+
+
+if __name__ == "__main__":
+    main()
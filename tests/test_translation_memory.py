@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Translation memory regression tests (python -m unittest discover tests)
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from translation_memory import MAX_CANDIDATES, TranslationMemory
+
+
+class FuzzyScopeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.memory = TranslationMemory(os.path.join(self.tmp.name, "memory.sqlite3"))
+
+    def tearDown(self):
+        self.memory.close()
+        self.tmp.cleanup()
+
+    def test_other_scopes_do_not_push_out_candidates(self):
+        query = "The transformer model uses self-attention over the input tokens."
+        near = "The transformer model uses self-attention over all input tokens."
+        self.memory.add_many([(near, "近似译文")], "EN", "ZH", "wanted")
+        match = self.memory.lookup(query, "EN", "ZH", "wanted", 0.75)
+        self.assertIsNotNone(match)
+        self.assertEqual(match["translation"], "近似译文")
+
+        # The query text itself, stored under more glossary hashes than
+        # MAX_CANDIDATES, shares every bucket with the query
+        for i in range(MAX_CANDIDATES + 2):
+            self.memory.add_many([(query, f"其他 {i}")], "EN", "ZH", f"other-{i}")
+        self.memory.add_many([(query, "无术语表")], "EN", "ZH", None)
+
+        match = self.memory.lookup(query, "EN", "ZH", "wanted", 0.75)
+        self.assertIsNotNone(match)
+        self.assertEqual(match["translation"], "近似译文")
+        self.assertFalse(match["exact"])
+
+
+if __name__ == "__main__":
+    unittest.main()
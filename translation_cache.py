@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Translation Cache
+A persistent SQLite cache for DeepL translations.
+
+Entries are keyed by source text, language pair, request options and the
+content hash of the glossary (see terms.entries_hash), not its ID, so a
+recreated glossary with identical terms keeps its cache hits. The cache is
+bounded to a maximum number of entries with least-recently-used eviction.
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+# Default cache file (created in the working directory)
+DEFAULT_CACHE_PATH = ".deepl_translation_cache.sqlite3"
+
+# Maximum cached translations before least-recently-used ones are evicted
+DEFAULT_MAX_ENTRIES = 100000
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+class TranslationCache:
+    """Size-bounded LRU translation cache stored in SQLite"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH,
+                 max_entries=DEFAULT_MAX_ENTRIES,
+                 enabled=True,
+                 check_same_thread=True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+        if enabled:
+            # Pass check_same_thread=False to share the cache between
+            # threads; the caller must then serialise access to it
+            self._conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " translation TEXT NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS translations_last_used"
+                " ON translations (last_used)"
+            )
+            self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def make_key(text, source_lang, target_lang, glossary_hash=None,
+                 options=None):
+        """Build the cache key for one segment"""
+        material = json.dumps(
+            [text, (source_lang or "").upper(), target_lang.upper(),
+             glossary_hash or "", options or {}],
+            ensure_ascii=False, sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: translation} for the cached keys
+
+        Hits are marked as recently used. Every requested key counts as
+        either a hit or a miss in the statistics.
+        """
+        keys = list(keys)
+        if not self.enabled:
+            self.misses += len(keys)
+            return {}
+
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _QUERY_CHUNK):
+            chunk = unique[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, translation FROM translations"
+                f" WHERE key IN ({placeholders})",
+                chunk,
+            )
+            found.update(rows)
+
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._conn.commit()
+
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items):
+        """Store (key, translation) pairs, then evict down to max_entries"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO translations (key, translation, last_used)"
+            " VALUES (?, ?, ?)",
+            [(key, translation, now) for key, translation in items
+             if translation is not None],
+        )
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        """Delete least-recently-used entries above max_entries"""
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN ("
+                " SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self):
+        """Remove all cached translations"""
+        if self.enabled:
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss statistics and the current number of entries"""
+        entries = 0
+        if self.enabled:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM translations"
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Translation Memory
+A persistent SQLite store of (source, glossary hash, translation) triples
+with fuzzy lookup for near-duplicate segments.
+
+Lookups first try an exact match on the whitespace-normalised source, the
+language pair and the glossary content hash. Otherwise candidates come
+from a MinHash / LSH index over character n-grams: each segment's
+signature is split into bands, and only segments sharing at least one
+band bucket are compared, so a lookup does not scan the whole memory.
+The candidates sharing the most buckets (an estimate of their n-gram
+overlap) are scored with difflib's ratio (1.0 = identical), and the best
+one at or above the minimum score is returned.
+
+Exact matches can replace an API call. Fuzzy matches are returned with
+their score; whether they are reused is up to the caller.
+
+Usage:
+    memory = TranslationMemory()
+    memory.add_many([(source, translation)], "EN", "ZH", glossary_hash)
+    match = memory.lookup(text, "EN", "ZH", glossary_hash, min_score=0.8)
+    if match:
+        print(match["score"], match["source"], match["translation"])
+
+Author: wzhxzkk
+License: MIT
+Repository: https://github.com/wzhxzkk/deepl-glossary-manager
+"""
+
+import hashlib
+import random
+import sqlite3
+import struct
+import time
+from difflib import SequenceMatcher
+
+# Default memory file (created in the working directory)
+DEFAULT_MEMORY_PATH = ".deepl_translation_memory.sqlite3"
+
+# Maximum stored segments before least-recently-used ones are evicted
+DEFAULT_MAX_ENTRIES = 200000
+
+# Matches below this score are not returned
+DEFAULT_MIN_SCORE = 0.75
+
+# Character n-gram length used for the MinHash signature
+SHINGLE_SIZE = 4
+
+# MinHash signature: BANDS bands of ROWS values each. Two segments become
+# candidates with probability 1 - (1 - J**ROWS)**BANDS for n-gram
+# Jaccard similarity J (about 50% at J = 0.5, over 99% at J = 0.8)
+BANDS = 16
+ROWS = 4
+
+# Candidates scored with difflib per lookup, most shared buckets first
+MAX_CANDIDATES = 10
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+# One XOR mask per signature value: min(h ^ mask) over well-mixed 64-bit
+# n-gram hashes acts as one random permutation, and is cheap in Python
+_MASKS = [random.Random(20240611 + i).getrandbits(64) for i in range(BANDS * ROWS)]
+
+
+def normalize(text):
+    """Collapse whitespace; exact matches compare normalised sources"""
+    return " ".join(text.split())
+
+
+def shingles(text):
+    """64-bit hashes of the character n-grams of the lower-cased, normalised text"""
+    text = normalize(text).lower()
+    grams = ([text] if len(text) <= SHINGLE_SIZE else
+             [text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)])
+    return {int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+            for gram in grams}
+
+
+def minhash(hashes):
+    """MinHash signature of a set of n-gram hashes"""
+    return [min(h ^ mask for h in hashes) for mask in _MASKS]
+
+
+def band_buckets(signature):
+    """One bucket ID per band; equal IDs mean an identical band"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f">H{ROWS}Q", band, *rows), digest_size=7)
+        buckets.append(int.from_bytes(digest.digest(), "big"))
+    return buckets
+
+
+def similarity(a, b):
+    """Edit-based similarity of two segments, 0.0 to 1.0"""
+    return SequenceMatcher(None, normalize(a), normalize(b), autojunk=False).ratio()
+
+
+class TranslationMemory:
+    """Size-bounded translation memory with exact and fuzzy lookup"""
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH,
+                 max_entries=DEFAULT_MAX_ENTRIES,
+                 enabled=True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._conn = None
+
+        if enabled:
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                " id INTEGER PRIMARY KEY,"
+                " source TEXT NOT NULL,"
+                " source_lang TEXT NOT NULL,"
+                " target_lang TEXT NOT NULL,"
+                " glossary_hash TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " UNIQUE (source, source_lang, target_lang, glossary_hash));"
+                "CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used);"
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " bucket INTEGER NOT NULL,"
+                " segment_id INTEGER NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket);"
+                "CREATE INDEX IF NOT EXISTS buckets_segment ON buckets (segment_id);"
+            )
+            self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _scope(source_lang, target_lang, glossary_hash):
+        return ((source_lang or "").upper(), target_lang.upper(), glossary_hash or "")
+
+    # ==================== Lookup ====================
+
+    def lookup(self, text, source_lang, target_lang, glossary_hash=None,
+               min_score=DEFAULT_MIN_SCORE):
+        """Best match for one segment, or None
+
+        Returns a dict with source, translation, score (1.0 for exact
+        matches) and exact.
+        """
+        return self.lookup_many([text], source_lang, target_lang,
+                                glossary_hash, min_score)[0]
+
+    def lookup_many(self, texts, source_lang, target_lang, glossary_hash=None,
+                    min_score=DEFAULT_MIN_SCORE):
+        """lookup() for many segments; exact matches are found in one query"""
+        texts = list(texts)
+        if not self.enabled:
+            self.misses += len(texts)
+            return [None] * len(texts)
+
+        scope = self._scope(source_lang, target_lang, glossary_hash)
+        normalized = [normalize(text) for text in texts]
+        exact = self._exact(set(normalized), scope)
+
+        matches = []
+        used = []
+        for text, source in zip(texts, normalized):
+            match = None
+            if source in exact:
+                segment_id, translation = exact[source]
+                match = {"source": source, "translation": translation,
+                         "score": 1.0, "exact": True}
+                self.exact_hits += 1
+            else:
+                segment_id, match = self._fuzzy(text, scope, min_score)
+                if match:
+                    self.fuzzy_hits += 1
+                else:
+                    self.misses += 1
+            if match:
+                used.append(segment_id)
+            matches.append(match)
+
+        if used:
+            now = time.time()
+            self._conn.executemany("UPDATE segments SET last_used = ? WHERE id = ?",
+                                   [(now, segment_id) for segment_id in set(used)])
+            self._conn.commit()
+        return matches
+
+    def _exact(self, sources, scope):
+        found = {}
+        sources = list(sources)
+        for start in range(0, len(sources), _QUERY_CHUNK):
+            chunk = sources[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT source, id, translation FROM segments"
+                f" WHERE source_lang = ? AND target_lang = ? AND glossary_hash = ?"
+                f" AND source IN ({placeholders})",
+                (*scope, *chunk),
+            )
+            found.update((source, (segment_id, translation))
+                         for source, segment_id, translation in rows)
+        return found
+
+    def _fuzzy(self, text, scope, min_score):
+        buckets = band_buckets(minhash(shingles(text)))
+        placeholders = ",".join("?" * len(buckets))
+        # The scope is applied before the LIMIT, so segments stored for other
+        # glossary hashes or language pairs cannot push out the candidates
+        rows = self._conn.execute(
+            f"SELECT s.id, s.source, s.translation FROM segments s"
+            f" JOIN (SELECT b.segment_id, COUNT(*) AS shared FROM buckets b"
+            f"       JOIN segments t ON t.id = b.segment_id"
+            f"       WHERE b.bucket IN ({placeholders})"
+            f"       AND t.source_lang = ? AND t.target_lang = ? AND t.glossary_hash = ?"
+            f"       GROUP BY b.segment_id"
+            f"       ORDER BY shared DESC LIMIT ?) c ON c.segment_id = s.id",
+            (*buckets, *scope, MAX_CANDIDATES),
+        )
+
+        matcher = SequenceMatcher(None, autojunk=False)
+        matcher.set_seq2(normalize(text))
+        best_id, best = None, None
+        for segment_id, source, translation in rows:
+            matcher.set_seq1(source)
+            if matcher.quick_ratio() < min_score:
+                continue
+            score = matcher.ratio()
+            if score >= min_score and (best is None or score > best["score"]):
+                best_id = segment_id
+                best = {"source": source, "translation": translation,
+                        "score": score, "exact": False}
+        return best_id, best
+
+    # ==================== Storage ====================
+
+    def add_many(self, pairs, source_lang, target_lang, glossary_hash=None):
+        """Store (source, translation) pairs, then evict down to max_entries"""
+        if not self.enabled:
+            return
+
+        scope = self._scope(source_lang, target_lang, glossary_hash)
+        now = time.time()
+        for source, translation in pairs:
+            if translation is None:
+                continue
+            source = normalize(source)
+            row = self._conn.execute(
+                "SELECT id FROM segments WHERE source = ? AND source_lang = ?"
+                " AND target_lang = ? AND glossary_hash = ?",
+                (source, *scope),
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    "UPDATE segments SET translation = ?, last_used = ? WHERE id = ?",
+                    (translation, now, row[0]))
+                continue
+            cursor = self._conn.execute(
+                "INSERT INTO segments (source, source_lang, target_lang, glossary_hash,"
+                " translation, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (source, *scope, translation, now))
+            self._conn.executemany(
+                "INSERT INTO buckets (bucket, segment_id) VALUES (?, ?)",
+                [(bucket, cursor.lastrowid)
+                 for bucket in band_buckets(minhash(shingles(source)))])
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        """Delete least-recently-used segments above max_entries"""
+        count = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS evicted (id INTEGER PRIMARY KEY)")
+            self._conn.execute(
+                "INSERT INTO evicted SELECT id FROM segments ORDER BY last_used LIMIT ?",
+                (excess,))
+            self._conn.execute("DELETE FROM buckets WHERE segment_id IN (SELECT id FROM evicted)")
+            self._conn.execute("DELETE FROM segments WHERE id IN (SELECT id FROM evicted)")
+            self._conn.execute("DELETE FROM evicted")
+
+    def clear(self):
+        """Remove all stored segments"""
+        if self.enabled:
+            self._conn.execute("DELETE FROM buckets")
+            self._conn.execute("DELETE FROM segments")
+            self._conn.commit()
+
+    def stats(self):
+        """Return exact/fuzzy hit counts and the number of stored segments"""
+        entries = 0
+        if self.enabled:
+            entries = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {
+            "enabled": self.enabled,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }